@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARTIFACT CACHE - Degismeyen pipeline adimlarini atlar
+
+Her adim icin girdilerin (dosya yolu + icerik) ve adimin kod dosyalarinin
+sha256 ozeti hesaplanir ve ciktilarin yanina bir manifest dosyasina yazilir.
+Bir sonraki calismada ozet ayniysa ve ciktilar manifestteki haliyle
+duruyorsa adim atlanir, onceki ciktilar kullanilir.
+
+Manifest formati (JSON):
+    {"stage": ..., "key": <girdi+kod ozeti>, "outputs": {yol: sha256}, "created": ...}
+
+PIPELINE_NO_CACHE=1 ortam degiskeni ile cache devre disi birakilir.
+"""
+import os
+import json
+import hashlib
+from datetime import datetime
+
+# Manifest formati veya ozet hesabi degisirse artir
+CACHE_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_enabled():
+    return os.environ.get('PIPELINE_NO_CACHE', '') not in ('1', 'true', 'yes')
+
+
+def file_digest(path):
+    """Dosyanin sha256 ozeti; dosya yoksa None."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def combined_digest(paths, extra=None):
+    """Birden fazla dosyanin (yol + icerik) tek bir ozeti.
+
+    Yollar siralanir; eksik dosyalar da ozete girer ki dosyanin ortaya
+    cikmasi/kaybolmasi anahtari degistirsin.
+    """
+    h = hashlib.sha256()
+    h.update(f"v{CACHE_VERSION}".encode())
+    for path in sorted(os.path.abspath(p) for p in paths):
+        h.update(path.encode('utf-8'))
+        h.update((file_digest(path) or 'missing').encode())
+    if extra is not None:
+        h.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+class StageCache:
+    """Tek bir pipeline adiminin manifest'i.
+
+    inputs  : adimin okudugu dosyalar
+    code    : adimin kaynak dosyalari (kod degisirse cache gecersiz)
+    outputs : adimin urettigi dosyalar
+    extra   : anahtara eklenecek diger parametreler (ornegin CLI argumanlari)
+    """
+
+    def __init__(self, stage, inputs, code, outputs, manifest_path=None, extra=None):
+        self.stage = stage
+        self.inputs = list(inputs)
+        self.code = list(code)
+        self.outputs = list(outputs)
+        self.extra = extra
+        if manifest_path is None:
+            out_dir = os.path.dirname(self.outputs[0]) if self.outputs else '.'
+            manifest_path = os.path.join(out_dir, f".{stage}.manifest")
+        self.manifest_path = manifest_path
+        self._key = None
+
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = combined_digest(self.inputs + self.code, self.extra)
+        return self._key
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self):
+        """Girdiler/kod degismediyse ve ciktilar yerindeyse True."""
+        if not cache_enabled():
+            return False
+        manifest = self.load_manifest()
+        if not manifest or manifest.get('key') != self.key:
+            return False
+        recorded = manifest.get('outputs', {})
+        for path in self.outputs:
+            digest = recorded.get(os.path.abspath(path))
+            if digest is None or file_digest(path) != digest:
+                return False
+        return True
+
+    def record(self):
+        """Adim basariyla bittikten sonra manifest'i yazar."""
+        manifest = {
+            'stage': self.stage,
+            'key': self.key,
+            'outputs': {os.path.abspath(p): file_digest(p) for p in self.outputs},
+            'created': datetime.now().isoformat(),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
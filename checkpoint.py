@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CHECKPOINT - Uzun scraper calismalari icin kaldigi yerden devam
+
+Her tamamlanan is birimi (bir mac, bir lig) aninda bir JSONL journal'a
+eklenir (cache/checkpoints/<ad>.jsonl):
+
+    {"key": "12345", "ts": 1760781234.5, "data": {...}}
+
+Surec 403 ile durur ya da oldurulurse, sonraki calisma load() ile taze
+(ts + ttl > simdi) birimleri alir ve sadece kalanlari ceker. Yarim
+yazilmis son satir okunurken atlanir. Calisma basariyla bitince clear()
+ile journal silinir; boylece normal bir sonraki calisma taze veri ceker.
+
+CHECKPOINT_DISABLE=1 ile kapatilir (load bos doner, append yazmaz).
+"""
+import os
+import json
+import time
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', os.path.join(BASE_DIR, 'cache', 'checkpoints'))
+
+
+def checkpoints_enabled():
+    return os.environ.get('CHECKPOINT_DISABLE', '0') != '1'
+
+
+class CheckpointJournal:
+    def __init__(self, name, ttl, directory=CHECKPOINT_DIR):
+        self.name = name
+        self.ttl = ttl
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.enabled = checkpoints_enabled()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """{key: data} - sadece taze birimler; ayni key icin son kayit gecerli."""
+        if not self.enabled:
+            return {}
+        oldest = time.time() - self.ttl
+        done = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # oldurulen surecten kalan yarim satir
+                    if entry.get('ts', 0) >= oldest:
+                        done[entry['key']] = entry.get('data')
+                    else:
+                        done.pop(entry.get('key'), None)
+        except OSError:
+            return {}
+        return done
+
+    def append(self, key, data):
+        """Tamamlanan birimi journal'a ekler (thread-safe, her satir flush'lanir)."""
+        if not self.enabled:
+            return
+        line = json.dumps({'key': str(key), 'ts': time.time(), 'data': data}, ensure_ascii=False)
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a+b') as f:
+                    # Oldurulen surecin yarim satiri yeni kaydi bozmasin
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            f.write(b'\n')
+                    f.write((line + '\n').encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"[WARN] Checkpoint yazilamadi ({self.path}): {e}")
+
+    def clear(self):
+        """Calisma tamamlandi: journal silinir."""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[WARN] Checkpoint silinemedi ({self.path}): {e}")
@@ -1,42 +1,37 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Clean JSON verilerini siler - filter_bot.py öncesinde çalışır
+Clean - filter_bot.py öncesinde çalışır
+
+Canlı çıktılar (oddsy-data/data/*.json) artık silinmez: filter_bot.py
+dosyaları staging'e yazar ve sadece değişenleri atomik olarak yerine koyar
+(bkz. publish.py). Burada sadece yarım kalmış bir çalışmadan artakalan
+staging klasörü temizlenir.
 """
 import os
-import json
-
-def clean_old_data():
-    """Eski JSON dosyalarını siler"""
-    
-    repo_root = os.path.abspath(os.path.dirname(__file__))
-    data_dir = os.path.join(repo_root, 'public', 'data')
-    
+
+from publish import StagedPublisher
+
+
+def clean_old_data(data_dir=None):
+    """Önceki çalışmadan kalan staging dosyalarını siler"""
+    if data_dir is None:
+        from pipeline import DATA_OUTPUT_DIR
+        data_dir = DATA_OUTPUT_DIR
+
     print("="*70)
     print("ESKI VERILERI TEMİZLEME")
     print("="*70)
-    
-    files_to_delete = [
-        'halfTimeGoals.json',
-        'dailyChoices.json',
-        'dailySurprises.json'
-    ]
-    
-    deleted_count = 0
-    for filename in files_to_delete:
-        filepath = os.path.join(data_dir, filename)
-        
-        if os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-                print(f"[DELETE] {filename} silindi")
-                deleted_count += 1
-            except Exception as e:
-                print(f"[ERROR] {filename} silinirken hata: {e}")
-        else:
-            print(f"[SKIP] {filename} bulunamadı")
-    
-    print(f"\n[OK] {deleted_count}/{len(files_to_delete)} dosya silindi")
+
+    publisher = StagedPublisher(data_dir)
+    if os.path.isdir(publisher.staging_dir):
+        leftovers = os.listdir(publisher.staging_dir)
+        publisher.discard()
+        print(f"[DELETE] Yarım kalan staging temizlendi ({len(leftovers)} dosya)")
+    else:
+        print("[SKIP] Temizlenecek staging yok")
+
+    print("[OK] Canlı çıktılar korunuyor, değişenler atomik olarak güncellenecek")
     print("="*70 + "\n")
 
 if __name__ == "__main__":
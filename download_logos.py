@@ -11,19 +11,20 @@ import re
 import json
 import time
 import sys
-import urllib.request
 import urllib.parse
-import urllib.error
-import ssl
+
+import urllib3
+
+import http_client
 
 # Windows console encoding fix
 sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
 # SSL verification skip (bazı sistemlerde gerekebilir)
-ssl_ctx = ssl.create_default_context()
-ssl_ctx.check_hostname = False
-ssl_ctx.verify_mode = ssl.CERT_NONE
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+session = http_client.create_session({'User-Agent': 'Oddsy-Logo-Downloader'})
+session.verify = False
 
 LOGOS_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'logos')
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'oddsy-data')
@@ -91,10 +92,10 @@ def normalize_filename(name):
 
 def fetch_json(url):
     """URL'den JSON çek."""
-    req = urllib.request.Request(url, headers={'User-Agent': 'Oddsy-Logo-Downloader'})
     try:
-        with urllib.request.urlopen(req, context=ssl_ctx, timeout=30) as resp:
-            return json.loads(resp.read().decode('utf-8'))
+        resp = session.get(url, timeout=30)
+        resp.raise_for_status()
+        return json.loads(resp.content.decode('utf-8'))
     except Exception as e:
         print(f"  [HATA] {url}: {e}")
         return None
@@ -110,11 +111,11 @@ def encode_url(url):
 def download_file(url, filepath):
     """Dosya indir."""
     # download_url zaten encode'lu geliyor, tekrar encode etme
-    req = urllib.request.Request(url, headers={'User-Agent': 'Oddsy-Logo-Downloader'})
     try:
-        with urllib.request.urlopen(req, context=ssl_ctx, timeout=30) as resp:
-            with open(filepath, 'wb') as f:
-                f.write(resp.read())
+        resp = session.get(url, timeout=30)
+        resp.raise_for_status()
+        with open(filepath, 'wb') as f:
+            f.write(resp.content)
         return True
     except Exception as e:
         print(f"  [HATA] Indirilemedi: {e}")
@@ -1,28 +1,25 @@
 import requests
 import json
+import os
 from datetime import datetime
 import pytz
 
+import http_client
+import metrics
+import odds_decoder
+import run_ledger
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class DroppingOddsBot:
     def __init__(self):
         self.base_url = "https://api.sofascore.com/api/v1"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Origin': 'https://www.sofascore.com',
-            'Referer': 'https://www.sofascore.com/',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-            'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
-            'Sec-Ch-Ua-Mobile': '?0',
-            'Sec-Ch-Ua-Platform': '"Windows"',
-            'Connection': 'keep-alive',
-        }
+        self.headers = dict(http_client.SOFASCORE_HEADERS)
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        http_client.configure(self.session, cache=True)
+        run_ledger.track_session(self.session)
+        metrics.track_session(self.session, 'sofascore_dropping')
 
     def warm_up(self):
         """Önce ana siteye gir, cookie al"""
@@ -57,6 +54,7 @@ class DroppingOddsBot:
                 return []
 
             print(f"📊 {len(events)} oran düşen maç bulundu\n")
+            run_ledger.add_records(records_in=len(events))
 
             dropping_matches = []
             tz_gmt3 = pytz.timezone('Europe/Istanbul')
@@ -79,25 +77,13 @@ class DroppingOddsBot:
                     current_odds = {}
                     initial_odds = {}
 
-                    for choice in choices:
+                    current_values = odds_decoder.decode_choices(choices, 'fractionalValue', '0/1')
+                    initial_values = odds_decoder.decode_choices(choices, 'initialFractionalValue', '0/1')
+                    for choice, current_decimal, initial_decimal in zip(choices, current_values, initial_values):
                         name = choice.get('name')
-                        current_frac = choice.get('fractionalValue', '0/1')
-                        initial_frac = choice.get('initialFractionalValue', '0/1')
-
-                        try:
-                            num, den = current_frac.split('/')
-                            current_decimal = round(float(num) / float(den) + 1, 2)
-                        except:
-                            current_decimal = 0
-
-                        try:
-                            num, den = initial_frac.split('/')
-                            initial_decimal = round(float(num) / float(den) + 1, 2)
-                        except:
-                            initial_decimal = 0
-
-                        current_odds[name] = current_decimal
-                        initial_odds[name] = initial_decimal
+                        # Cozulemeyen oran eskisi gibi 0 yazilir
+                        current_odds[name] = current_decimal or 0
+                        initial_odds[name] = initial_decimal or 0
 
                     start_timestamp = event.get('startTimestamp')
                     if start_timestamp:
@@ -134,6 +120,7 @@ class DroppingOddsBot:
             return dropping_matches
 
         except Exception as e:
+            metrics.note_exception('sofascore_dropping', e)
             print(f"❌ Hata: {e}")
             return []
 
@@ -142,10 +129,12 @@ class DroppingOddsBot:
             print("⚠️ Kaydedilecek maç yok")
             return
 
-        output_file = 'filtered/oran_dusen_maclar.json'
+        output_file = os.path.join(BASE_DIR, 'filtered', 'oran_dusen_maclar.json')
 
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(matches, f, ensure_ascii=False, indent=2)
+        run_ledger.add_records(records_out=len(matches))
+        metrics.set_gauge('oddsy_output_records', len(matches), file=os.path.basename(output_file))
 
         print(f"\n✅ {len(matches)} maç kaydedildi!")
 
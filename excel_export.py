@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EXCEL EXPORT - Pipeline'in ortak xlsx yazici katmani
+
+Excel ciktilari (SofaScore, guncel bulten, filtre yedekleri) frontend
+tarafindan okunmaz; sadece elle inceleme icindir. Bu yuzden:
+
+  - openpyxl write_only (akan) workbook ile satir satir yazilir, butun
+    sayfa bellekte tutulmaz
+  - Sayi formati sutun bazinda verilir ({'MS 1': '0.00'}) ve hucre
+    yazilirken uygulanir; kaydettikten sonra butun hucreleri tek tek
+    gezip number_format atamak gerekmez
+  - Varsayilan olarak arka plandaki tek bir thread'de yazilir; adim
+    Excel'i beklemeden biter (EXCEL_BACKGROUND=0 ile senkron)
+  - EXCEL_EXPORT=0 ile tamamen kapanir (production)
+
+required=True verilen ciktilar (istatistik/excel_to_json.py'nin okudugu
+KART_DATA dosyalari gibi) her zaman ve senkron yazilir.
+
+    export(path, [records_sheet('Maclar', rows, columns)], formats={'draw': '0.00'})
+"""
+import os
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+EXPORT_ENABLED = os.environ.get('EXCEL_EXPORT', '1') != '0'
+BACKGROUND = os.environ.get('EXCEL_BACKGROUND', '1') != '0'
+
+HEADER_FONT = Font(bold=True)
+
+_executor = None
+_pending = []
+_lock = threading.Lock()
+
+
+def records_sheet(name, records, columns=None):
+    """Sozluk listesinden (sayfa, sutunlar, satirlar); sutunlar verilmezse
+    kayitlardaki anahtarlar ilk gorulme sirasiyla (DataFrame(records) gibi)."""
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+    rows = [[record.get(column) for column in columns] for record in records]
+    return name, list(columns), rows
+
+
+def _clean(value):
+    # pandas'tan gelen NaN'lar bos hucre olarak yazilir
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def write_workbook(path, sheets, formats=None):
+    """sheets: [(sayfa_adi, sutunlar, satirlar)] -> xlsx (write_only)."""
+    formats = formats or {}
+    workbook = Workbook(write_only=True)
+    for name, columns, rows in sheets:
+        sheet = workbook.create_sheet(title=name)
+        header = []
+        for column in columns:
+            cell = WriteOnlyCell(sheet, value=column)
+            cell.font = HEADER_FONT
+            header.append(cell)
+        sheet.append(header)
+
+        formatted = [(index, formats[column]) for index, column in enumerate(columns)
+                     if column in formats]
+        for row in rows:
+            row = [_clean(value) for value in row]
+            for index, number_format in formatted:
+                if row[index] is not None:
+                    cell = WriteOnlyCell(sheet, value=row[index])
+                    cell.number_format = number_format
+                    row[index] = cell
+            sheet.append(row)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_logged(path, sheets, formats):
+    try:
+        write_workbook(path, sheets, formats)
+        print(f"[OK] Excel kaydedildi: {path}")
+    except Exception as e:
+        print(f"[WARN] Excel yazilamadi ({path}): {e}")
+        raise
+
+
+def export(path, sheets, formats=None, required=False):
+    """Excel ciktisini yazar ya da arka plan kuyruguna ekler.
+
+    Donus: arka planda ise Future, senkron yazildiysa None; kapaliysa False.
+    """
+    global _executor
+    if not required and not EXPORT_ENABLED:
+        print(f"[INFO] Excel atlandi (EXCEL_EXPORT=0): {os.path.basename(path)}")
+        return False
+    if required or not BACKGROUND:
+        _write_logged(path, sheets, formats)
+        return None
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='excel-export')
+        future = _executor.submit(_write_logged, path, sheets, formats)
+        _pending.append(future)
+    return future
+
+
+def wait():
+    """Kuyruktaki butun Excel yazimlari bitene kadar bekler."""
+    with _lock:
+        pending = list(_pending)
+        _pending.clear()
+    for future in pending:
+        try:
+            future.result()
+        except Exception:
+            pass  # _write_logged zaten uyardi
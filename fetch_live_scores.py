@@ -1,16 +1,20 @@
 # fetch_live_scores.py
-import requests
 import json
 from firebase_admin import credentials, firestore, initialize_app
 import time
 
+import http_client
+
 cred = credentials.Certificate("serviceAccountKey.json")
 initialize_app(cred)
 db = firestore.client()
 
+# Canli skorlar 10 sn cache'lenir, sonra ETag ile yeniden dogrulanir
+session = http_client.create_session(cache=True)
+
 def fetch_sofascore():
     try:
-        response = requests.get('https://www.sofascore.com/api/v1/sport/football/events/live')
+        response = session.get('https://www.sofascore.com/api/v1/sport/football/events/live')
         data = response.json()
         
         matches = []
@@ -1,9 +1,15 @@
 import json
 import os
 import glob
-import pandas as pd
 from datetime import datetime
 
+import pytz
+
+import excel_export
+import metrics
+import run_ledger
+from publish import StagedPublisher
+
 """
 FILTER BOT - Firebase KULLANMAZ
 Verileri filtreler ve JSON dosyaları olarak oddsy-data reposuna kaydeder.
@@ -18,8 +24,31 @@ ODDSY_DATA_DIR = _ci_path if os.path.exists(_ci_path) else _local_path
 DATA_OUTPUT_DIR = os.path.join(ODDSY_DATA_DIR, 'data')
 
 
-def filter_matches():
-    today = datetime.now().strftime("%d.%m.%Y")
+def save_output_json(publisher, filename, matches):
+    """Listeyi (uretici sirasiyla) staging'e yazar; canliya publish_outputs() tasir."""
+    publisher.stage_json(filename, matches)
+    print(f"  ✅ {filename} -> {len(matches)} maç")
+    metrics.set_gauge('oddsy_output_records', len(matches), file=filename)
+
+
+def publish_outputs(publisher):
+    """Staging'deki dosyalardan sadece icerigi degisenleri oddsy-data/data/'ya tasir."""
+    changed = publisher.commit()
+    for filename, size in changed:
+        print(f"  🔄 {filename} güncellendi")
+        metrics.inc('oddsy_published_bytes_total', size)
+    if not changed:
+        print("  ⏸️ Çıktılarda değişiklik yok, canlı dosyalara dokunulmadı")
+    return changed
+
+
+def filter_matches(merged_file=None):
+    """merged_file verilmezse bugunun (Europe/Istanbul) merged dosyasi okunur.
+
+    Pipeline cache anahtarina giren dosyanin aynisini verir (bkz. pipeline._filter_step).
+    """
+    # Container saati UTC; tarih pipeline/merger gibi Istanbul'a gore
+    today = datetime.now(pytz.timezone('Europe/Istanbul')).strftime("%d.%m.%Y")
 
     # Çıktı klasörünü oluştur
     os.makedirs(DATA_OUTPUT_DIR, exist_ok=True)
@@ -37,7 +66,7 @@ def filter_matches():
             print(f"⚠️ Oran düşen maçlar okunamadı: {e}\n")
 
     # Sadece bugünün merged dosyasını bul (Eski dosyalar karışmasın)
-    today_merged_file = os.path.join(BASE_DIR, "merged", "merged_json", f"merged_{today}.json")
+    today_merged_file = merged_file or os.path.join(BASE_DIR, "merged", "merged_json", f"merged_{today}.json")
     merged_files = [today_merged_file] if os.path.exists(today_merged_file) else []
 
     if not merged_files:
@@ -56,6 +85,7 @@ def filter_matches():
             print(f"⚠️ Dosya okuma hatası ({merged_file}): {e}")
 
     print(f"✅ {len(all_matches)} maç yüklendi\n")
+    run_ledger.add_records(records_in=len(all_matches) + len(dropping_odds))
 
     # ===== İLK YARI GOL LİSTESİ =====
     ilk_yari_gol_listesi = []
@@ -115,29 +145,14 @@ def filter_matches():
     # ===== JSON DOSYALARINA KAYDET (oddsy-data/data/) =====
     print("📁 JSON dosyaları oluşturuluyor...\n")
 
-    # halfTimeGoals.json
-    half_time_path = os.path.join(DATA_OUTPUT_DIR, 'halfTimeGoals.json')
-    with open(half_time_path, 'w', encoding='utf-8') as f:
-        json.dump(ilk_yari_gol_listesi, f, ensure_ascii=False, indent=2)
-    print(f"  ✅ halfTimeGoals.json -> {len(ilk_yari_gol_listesi)} maç")
-
-    # dailyChoices.json
-    daily_choices_path = os.path.join(DATA_OUTPUT_DIR, 'dailyChoices.json')
-    with open(daily_choices_path, 'w', encoding='utf-8') as f:
-        json.dump(gunun_tercihleri, f, ensure_ascii=False, indent=2)
-    print(f"  ✅ dailyChoices.json -> {len(gunun_tercihleri)} maç")
-
-    # dailySurprises.json
-    daily_surprises_path = os.path.join(DATA_OUTPUT_DIR, 'dailySurprises.json')
-    with open(daily_surprises_path, 'w', encoding='utf-8') as f:
-        json.dump(gunun_surprizleri, f, ensure_ascii=False, indent=2)
-    print(f"  ✅ dailySurprises.json -> {len(gunun_surprizleri)} maç")
-
-    # droppingOdds.json
-    dropping_odds_path = os.path.join(DATA_OUTPUT_DIR, 'droppingOdds.json')
-    with open(dropping_odds_path, 'w', encoding='utf-8') as f:
-        json.dump(dropping_odds, f, ensure_ascii=False, indent=2)
-    print(f"  ✅ droppingOdds.json -> {len(dropping_odds)} maç")
+    publisher = StagedPublisher(DATA_OUTPUT_DIR)
+    save_output_json(publisher, 'halfTimeGoals.json', ilk_yari_gol_listesi)
+    save_output_json(publisher, 'dailyChoices.json', gunun_tercihleri)
+    save_output_json(publisher, 'dailySurprises.json', gunun_surprizleri)
+    save_output_json(publisher, 'droppingOdds.json', dropping_odds)
+    publish_outputs(publisher)
+    run_ledger.add_records(records_out=len(ilk_yari_gol_listesi) + len(gunun_tercihleri)
+                           + len(gunun_surprizleri) + len(dropping_odds))
 
     print(f"\n📊 ÖZET:")
     print(f"  🔻 Oran Düşen Maçlar: {len(dropping_odds)} maç")
@@ -146,21 +161,16 @@ def filter_matches():
     print(f"  🔥 Günün Sürprizleri: {len(gunun_surprizleri)} maç")
     print(f"  📁 Çıktı dizini: {os.path.abspath(DATA_OUTPUT_DIR)}\n")
 
-    # Excel'e de kaydet (yedek)
+    # Excel'e de kaydet (yedek; arka planda, EXCEL_EXPORT=0 ile kapali)
     output_dir = os.path.join(BASE_DIR, "filtered")
     os.makedirs(output_dir, exist_ok=True)
 
-    if ilk_yari_gol_listesi:
-        df = pd.DataFrame(ilk_yari_gol_listesi)
-        df.to_excel(f"{output_dir}/ilk_yari_gol_{today}.xlsx", index=False)
-
-    if gunun_tercihleri:
-        df = pd.DataFrame(gunun_tercihleri)
-        df.to_excel(f"{output_dir}/gunun_tercihleri_{today}.xlsx", index=False)
-
-    if gunun_surprizleri:
-        df = pd.DataFrame(gunun_surprizleri)
-        df.to_excel(f"{output_dir}/gunun_surprizleri_{today}.xlsx", index=False)
+    for name, records in (("ilk_yari_gol", ilk_yari_gol_listesi),
+                          ("gunun_tercihleri", gunun_tercihleri),
+                          ("gunun_surprizleri", gunun_surprizleri)):
+        if records:
+            excel_export.export(f"{output_dir}/{name}_{today}.xlsx",
+                                [excel_export.records_sheet("Sheet1", records)])
 
 
 if __name__ == "__main__":
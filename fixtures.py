@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FIXTURES - Upstream cevaplari icin kayit / tekrar oynatma
+
+HTTP_FIXTURES=record  : her upstream cevabi (status, header, ham govde)
+                        fixtures/http/<host>/<anahtar>.json.gz olarak saklanir
+HTTP_FIXTURES=replay  : hicbir istek internete cikmaz; istekler yerel stub
+                        sunucusuna (127.0.0.1) yonlenir ve kayittan cevaplanir.
+                        Kaydi olmayan istek 599 + X-Fixture-Missing doner.
+
+Anahtar: sha256("METHOD URL") (+ govde ozeti). Kapsam:
+
+  - requests / cloudscraper : http_client.configure() zincirinde
+                              (SofaScore, dropping odds, Mackolik, logolar)
+  - aiohttp                 : sofa/async_fetch.py
+  - Selenium (adamchoi)     : sayfa goruntusu (page_source) anahtarla
+                              kaydedilir, replay'de stub'tan yuklenir
+
+Stub sunucusu replay modunda ilk istekte surec icinde baslar; tarayici gibi
+dis istemciler icin tek basina da calisir:
+
+    HTTP_FIXTURES=replay python fixtures.py serve --port 8765
+
+Kayit/replay sirasinda http_cache devre disidir (cache isabetleri kayda
+gecmez, replay'i de golgelemez).
+"""
+import os
+import sys
+import gzip
+import json
+import base64
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.environ.get('HTTP_FIXTURES_DIR', os.path.join(BASE_DIR, 'fixtures', 'http'))
+MODE = os.environ.get('HTTP_FIXTURES', '')
+STUB_PORT = int(os.environ.get('HTTP_FIXTURES_PORT', '0'))
+
+# Saklanmayan header'lar (govde zaten cozulmus halde saklanir)
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+
+def recording():
+    return MODE == 'record'
+
+
+def replaying():
+    return MODE == 'replay'
+
+
+def active():
+    return MODE in ('record', 'replay')
+
+
+def fixture_key(method, url, body=None):
+    raw = f"{method.upper()} {url}"
+    if body:
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        raw += ' ' + hashlib.sha256(body).hexdigest()
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class FixtureStore:
+    def __init__(self, directory=FIXTURES_DIR):
+        self.directory = directory
+
+    def _path(self, key, host):
+        return os.path.join(self.directory, host or '_', key + '.json.gz')
+
+    def _find(self, key):
+        # Stub yalnizca anahtari bilir; host klasorleri taranir
+        try:
+            hosts = os.listdir(self.directory)
+        except OSError:
+            return None
+        for host in hosts:
+            path = os.path.join(self.directory, host, key + '.json.gz')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def save(self, method, url, status, headers, body, request_body=None):
+        key = fixture_key(method, url, request_body)
+        path = self._path(key, urlparse(url).hostname)
+        record = {
+            'method': method.upper(),
+            'url': url,
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+            'body': base64.b64encode(body or b'').decode('ascii'),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+        return key
+
+    def load(self, key):
+        path = self._find(key)
+        if path is None:
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            record = json.load(f)
+        record['body'] = base64.b64decode(record['body'])
+        return record
+
+
+_store = FixtureStore()
+
+
+def default_store():
+    return _store
+
+
+# ---------------------------------------------------------------------------
+# STUB SUNUCUSU
+# ---------------------------------------------------------------------------
+
+class _StubHandler(BaseHTTPRequestHandler):
+    store = _store
+
+    def _serve(self):
+        # /fixture/<anahtar>
+        key = self.path.rsplit('/', 1)[-1].split('?', 1)[0]
+        record = self.store.load(key)
+        if record is None:
+            self.send_response(599)
+            self.send_header('X-Fixture-Missing', key)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = record['body']
+        self.send_response(record['status'])
+        for name, value in record['headers'].items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = _serve
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def stub_base_url():
+    """Stub'i (gerekirse) baslatir ve taban URL'sini dondurur."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('127.0.0.1', STUB_PORT), _StubHandler)
+            threading.Thread(target=_server.serve_forever, name='fixture-stub', daemon=True).start()
+        host, port = _server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def stub_url(method, url, body=None):
+    return f"{stub_base_url()}/fixture/{fixture_key(method, url, body)}"
+
+
+# ---------------------------------------------------------------------------
+# requests ADAPTER'LARI (bkz. http_client.configure)
+# ---------------------------------------------------------------------------
+
+class RecordingAdapter(BaseAdapter):
+    """Tasima adapter'inin cevaplarini kaydeder."""
+
+    def __init__(self, inner, store=None):
+        super().__init__()
+        self.inner = inner
+        self.store = store or _store
+
+    def send(self, request, **kwargs):
+        response = self.inner.send(request, **kwargs)
+        self.store.save(request.method, request.url, response.status_code,
+                        response.headers, response.content, request.body)
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """Istegi stub sunucusuna yonlendirir; cevap orijinal URL ile doner."""
+
+    def __init__(self):
+        super().__init__()
+        self.inner = HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        original_url = request.url
+        replay = request.copy()
+        replay.url = stub_url(request.method, original_url, request.body)
+        response = self.inner.send(replay, **kwargs)
+        response.url = original_url
+        response.request = request
+        if response.status_code == 599:
+            print(f"[WARN] Fixture yok: {request.method} {original_url}")
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+def wrap_transport(transport):
+    """http_client icin: moda gore tasimayi kayit/replay adapter'iyla degistirir."""
+    if recording():
+        return RecordingAdapter(transport)
+    if replaying():
+        return ReplayAdapter()
+    return transport
+
+
+# ---------------------------------------------------------------------------
+# SAYFA GORUNTULERI (Selenium)
+# ---------------------------------------------------------------------------
+
+def page_url(name):
+    """Selenium sayfa goruntusunun sahte URL'si (kayit anahtari)."""
+    return f"fixture://page/{name}"
+
+
+def record_page(name, html):
+    _store.save('GET', page_url(name), 200, {'Content-Type': 'text/html; charset=utf-8'},
+                html.encode('utf-8'))
+
+
+def replay_page_url(name):
+    return stub_url('GET', page_url(name))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixture stub sunucusu")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), _StubHandler)
+    print(f"[OK] Fixture stub: http://127.0.0.1:{args.port}/fixture/<anahtar> ({FIXTURES_DIR})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
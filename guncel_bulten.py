@@ -3,22 +3,49 @@
 """
 MACKOLIK GUNCEL BULTEN - Tum mackolik oranlarini ceker (IY KG dahil)
 JSON + Excel cikti uretir. Merger pipeline icin kullanilir.
+
+Gun ici tekrar calismalarda iddaa Kod'u basina son parse edilen oranlar
+ve market bolumunun parmak izi saklanir (cache/bulten_state/<tarih>.json).
+Sadece yeni, baslamasina BULTEN_KICKOFF_WINDOW saniyeden az kalmis ya da
+BULTEN_STALE_TTL saniyeden eski maclar yeniden cekilir; market bolumu
+degismeyen sayfa yeniden parse edilmez. --full ile butun maclar cekilir.
 """
-import sys, io, os, json, re
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+import sys, io, os, json, math, time
 
-import pandas as pd
 import cloudscraper
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import pytz
 
-# Otomatik tarih (GMT+3)
+import excel_export
+import http_client
+import iddaa_parser
+import metrics
+import odds_history
+import odds_state
+import run_ledger
+from checkpoint import CheckpointJournal
+from mackolik_fetch import EMPTY_RETRIES, MackolikFetcher
+
+# Otomatik tarih (GMT+3); main() her cagrida tarihi yeniden hesaplar
 tz = pytz.timezone('Europe/Istanbul')
 TARIH = datetime.now(tz).strftime('%Y-%m-%d')
 
-scraper = cloudscraper.create_scraper()
+# Yarida kalan calismanin mac oranlari bu kadar saniye taze sayilir
+CHECKPOINT_TTL = int(os.environ.get('BULTEN_CHECKPOINT_TTL', '1800'))
+
+# Iddaa Kod'u basina son oranlar (gun ici artimli yenileme)
+BULTEN_STATE_DIR = os.environ.get(
+    'BULTEN_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'bulten_state'),
+)
+# Bu kadar saniyeden eski oranlar yeniden cekilir
+STALE_TTL = int(os.environ.get('BULTEN_STALE_TTL', '10800'))
+# Baslamasina bu kadar saniye kalmis (ya da baslamis) maclar her calismada cekilir
+KICKOFF_WINDOW = int(os.environ.get('BULTEN_KICKOFF_WINDOW', '5400'))
+
+# Mac listesi ve tekil oran yenileme (odds_refresh.py) icin; toplu cekimde
+# her worker'in kendi session'i vardir (bkz. mackolik_fetch.py)
+scraper = http_client.configure(cloudscraper.create_scraper())
 
 # Cekilecek marketler (4,5 Alt/Ust eklendi)
 ISTENEN_MARKETLER = [
@@ -53,24 +80,8 @@ SUTUN_SIRASI = [
     "IY KG Var", "IY KG Yok",
 ]
 
-# Mackolik market adi -> Excel sutun adi eslestirmesi
-MARKET_MAP = {
-    "Ma\u00e7 Sonucu": {"1": "MS 1", "X": "MS X", "2": "MS 2"},
-    "1. Yar\u0131 Sonucu": {"1": "IY 1", "X": "IY X", "2": "IY 2"},
-    "Kar\u015f\u0131l\u0131kl\u0131 Gol": {"Var": "KG Var", "Yok": "KG Yok"},
-    "\u00c7ifte \u015eans": {"1-X": "CS 1/X", "1-2": "CS 1/2", "X-2": "CS X/2"},
-    "1. Yar\u0131 1,5 Alt/\u00dcst": {"Alt": "IY 1,5 Alt", "\u00dcst": "IY 1,5 Ust"},
-    "1,5 Alt/\u00dcst": {"Alt": "AU 1,5 Alt", "\u00dcst": "AU 1,5 Ust"},
-    "2,5 Alt/\u00dcst": {"Alt": "AU 2,5 Alt", "\u00dcst": "AU 2,5 Ust"},
-    "3,5 Alt/\u00dcst": {"Alt": "AU 3,5 Alt", "\u00dcst": "AU 3,5 Ust"},
-    "4,5 Alt/\u00dcst": {"Alt": "AU 4,5 Alt", "\u00dcst": "AU 4,5 Ust"},
-    "5,5 Alt/\u00dcst": {"Alt": "AU 5,5 Alt", "\u00dcst": "AU 5,5 Ust"},
-    "Toplam Gol Aral\u0131\u011f\u0131": {
-        "0-1 Gol": "TG 0-1", "2-3 Gol": "TG 2-3",
-        "4-6 Gol": "TG 4-6", "7+ Gol": "TG 7+",
-    },
-    "1. Yar\u0131 Kar\u015f\u0131l\u0131kl\u0131 Gol": {"Var": "IY KG Var", "Yok": "IY KG Yok"},
-}
+# Mackolik market adi -> Excel sutun adi eslestirmesi (bkz. iddaa_parser.py)
+MARKET_MAP = iddaa_parser.MARKET_MAP
 
 
 def mac_listesi_cek(tarih):
@@ -96,8 +107,7 @@ def mac_listesi_cek(tarih):
         comp = competitions.get(comp_id, {})
         lig_kodu = comp.get("code", "")
 
-        t = pd.to_datetime(mdata["mstUtc"], unit="ms", utc=True)
-        t = t.tz_convert("Europe/Istanbul")
+        t = datetime.fromtimestamp(mdata["mstUtc"] / 1000, tz)
 
         rows.append({
             "ID": mid,
@@ -107,65 +117,43 @@ def mac_listesi_cek(tarih):
             "Kod": iddaa_code,
             "Ev Sahibi": ev,
             "Deplasman": dep,
+            "Baslangic": mdata["mstUtc"] / 1000,
         })
-    return pd.DataFrame(rows)
+    return rows
 
 
 def bahis_oranlarini_cek(match_id, slug):
     url = f"https://www.mackolik.com/mac/{slug}/iddaa/{match_id}"
     try:
         r = scraper.get(url, timeout=20).text
-    except Exception:
-        return {}
-
-    s = BeautifulSoup(r, "html.parser")
-    ul_main = s.find("ul", {"class": "widget-iddaa-markets__markets-list"})
-    if not ul_main:
+    except Exception as e:
+        metrics.note_exception('mackolik', e)
         return {}
 
-    h2_tags = ul_main.find_all("h2")
-    div_tags = ul_main.find_all("div", {
-        "class": "widget-base__content widget-iddaa-markets__market-content"
-    })
-
-    # MBS bilgisi
-    mbs = ""
-    if h2_tags:
-        mbs_span = h2_tags[0].find("span", {"class": "widget-iddaa-markets__mbc"})
-        if mbs_span:
-            mbs_text = mbs_span.text.strip()
-            m = re.search(r"\d+", mbs_text)
-            mbs = m.group() if m else ""
-
-    bahis_tipleri = [h2.find("span").text.strip() for h2 in h2_tags]
-    ul_tags = [div.find("ul") for div in div_tags]
+    # lxml + derlenmis XPath; BeautifulSoup yedek yol (bkz. iddaa_parser.py)
+    return iddaa_parser.parse_markets(r, MARKET_MAP)
 
-    sonuc = {"MBS": mbs}
 
-    for idx, bahis_tipi in enumerate(bahis_tipleri):
-        if bahis_tipi not in MARKET_MAP:
-            continue
-        if idx >= len(ul_tags) or ul_tags[idx] is None:
-            continue
-
-        mapping = MARKET_MAP[bahis_tipi]
-
-        for li in ul_tags[idx].find_all("li"):
-            spans = [sp.get_text(strip=True) for sp in li.find_all("span")]
-            for k in range(0, len(spans) - 1, 2):
-                label = spans[k]
-                val = spans[k + 1]
-                if label in mapping:
-                    sonuc[mapping[label]] = val
-
-    return sonuc
+def bulten_satiri(row, oranlar):
+    """Mac listesi satiri + oranlar -> bulten satiri."""
+    satir = {
+        "ID": row["ID"],
+        "Slug": row["Slug"],
+        "Saat": row["Saat"],
+        "Lig": row["Lig"],
+        "Kod": row["Kod"],
+        "Ev Sahibi": row["Ev Sahibi"],
+        "Deplasman": row["Deplasman"],
+    }
+    satir.update(oranlar)
+    return satir
 
 
 def safe_val(v):
     """Deger float'a cevir, bos/NaN ise 0 dondur."""
     if v is None or v == '':
         return 0.0
-    if isinstance(v, float) and pd.isna(v):
+    if isinstance(v, float) and math.isnan(v):
         return 0.0
     try:
         if isinstance(v, str):
@@ -175,86 +163,136 @@ def safe_val(v):
         return 0.0
 
 
-def main():
+# JSON alani -> bulten sutunu (oranlar float'a cevrilir)
+JSON_ORANLARI = [
+    ('ms_1', 'MS 1'), ('ms_x', 'MS X'), ('ms_2', 'MS 2'),
+    ('kg_var', 'KG Var'), ('kg_yok', 'KG Yok'),
+    ('ust_2_5', 'AU 2,5 Ust'), ('alt_2_5', 'AU 2,5 Alt'),
+    ('ust_3_5', 'AU 3,5 Ust'), ('alt_3_5', 'AU 3,5 Alt'),
+    ('ust_5_5', 'AU 5,5 Ust'),
+    ('iy_kg_var', 'IY KG Var'), ('iy_kg_yok', 'IY KG Yok'),
+]
+
+
+def yenilenmeli(kayit, row, now):
+    """Mac yeni, baslamasina az kalmis ya da kaydi eskiyse True."""
+    if not kayit or kayit.get("id") != str(row["ID"]):
+        return True
+    if row["Baslangic"] - now < KICKOFF_WINDOW:
+        return True
+    return now - kayit.get("at", 0) >= STALE_TTL
+
+
+def json_kaydi(satir):
+    """Bulten satiri -> merger JSON kaydi."""
+    match = {
+        'home_team': str(satir['Ev Sahibi']),
+        'away_team': str(satir['Deplasman']),
+        'saat': str(satir['Saat']),
+        'mackolik_id': str(satir['ID']),
+        'slug': str(satir['Slug']),
+    }
+    for alan, sutun in JSON_ORANLARI:
+        match[alan] = safe_val(satir.get(sutun))
+    return match
+
+
+def main(tarih=None, full=False):
+    """tarih (YYYY-MM-DD) verilmezse bugun; on cekim (--prefetch) ileri tarih verir.
+
+    full=True ise kayitli oranlar kullanilmaz, butun maclar cekilir.
+    """
+    tarih = tarih or datetime.now(tz).strftime('%Y-%m-%d')
     print(f"\n{'='*60}")
     print(f"  MACKOLIK GUNCEL BULTEN")
-    print(f"  Tarih: {TARIH}")
+    print(f"  Tarih: {tarih}")
     print(f"{'='*60}")
 
-    maclar = mac_listesi_cek(TARIH)
+    run_ledger.track_session(scraper)
+    metrics.track_session(scraper, 'mackolik')
+    maclar = mac_listesi_cek(tarih)
     print(f"  {len(maclar)} mac bulundu (iddaa kodlu).")
+    run_ledger.add_records(records_in=len(maclar))
 
-    if maclar.empty:
+    if not maclar:
         print("Mac bulunamadi!")
         return
 
     all_rows = []
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = {}
-        for i, row in maclar.iterrows():
-            f = executor.submit(bahis_oranlarini_cek, row["ID"], row["Slug"])
-            futures[f] = i
-
-        done_count = 0
-        total = len(futures)
-        for f in as_completed(futures):
-            idx = futures[f]
-            row = maclar.loc[idx]
-            oranlar = f.result()
-            satir = {
-                "Saat": row["Saat"],
-                "Lig": row["Lig"],
-                "Kod": row["Kod"],
-                "Ev Sahibi": row["Ev Sahibi"],
-                "Deplasman": row["Deplasman"],
+    # Yarida kalan calismanin taze mac oranlari journal'dan alinir
+    journal = CheckpointJournal(f"guncel_bulten_{tarih}", CHECKPOINT_TTL)
+    tamamlanan = journal.load()
+    for row in maclar:
+        oranlar = tamamlanan.get(str(row["ID"]))
+        if oranlar is not None:
+            all_rows.append(bulten_satiri(row, oranlar))
+    if all_rows:
+        print(f"  Checkpoint: {len(all_rows)} mac onceki calismadan alindi.")
+
+    # Iddaa Kod'u basina son oranlar: degismemesi beklenen maclar cekilmez
+    durum = {} if full else odds_state.load_state(tarih, BULTEN_STATE_DIR)
+    simdi = time.time()
+    satirlar = {}
+    bilinen = {}
+    korunan = 0
+    for row in maclar:
+        key = str(row["ID"])
+        if key in tamamlanan:
+            continue
+        kayit = durum.get(str(row["Kod"]))
+        if not yenilenmeli(kayit, row, simdi):
+            all_rows.append(bulten_satiri(row, kayit["oranlar"]))
+            korunan += 1
+            continue
+        satirlar[key] = row
+        if kayit and kayit.get("id") == key:
+            bilinen[key] = (kayit.get("fp"), kayit["oranlar"])
+    if korunan:
+        print(f"  Artimli: {korunan} mac son calismanin oranlariyla korundu "
+              f"(BULTEN_STALE_TTL={STALE_TTL} sn).")
+
+    # Worker basina ayri session + AIMD eszamanlilik (bkz. mackolik_fetch.py)
+    isler = [(key, row["ID"], row["Slug"]) for key, row in satirlar.items()]
+    # Bos market listesi sadece bugunun maclarinda tekrar denenir; ileri
+    # tarihte oranlar henuz acilmamis olabilir
+    bugun = datetime.now(tz).strftime('%Y-%m-%d')
+    fetcher = MackolikFetcher(empty_retries=EMPTY_RETRIES if tarih == bugun else 0)
+    done_count = 0
+
+    def sonuc_geldi(key, oranlar, timing):
+        nonlocal done_count
+        row = satirlar[key]
+        # Bos sonuc (istek hatasi) yazilmaz; sonraki calismada tekrar denenir
+        if oranlar:
+            journal.append(key, oranlar)
+        if timing.has_odds:
+            durum[str(row["Kod"])] = {
+                "id": key, "fp": timing.fingerprint, "oranlar": oranlar, "at": time.time(),
             }
-            satir.update(oranlar)
-            all_rows.append(satir)
-            done_count += 1
-            oran_sayisi = len([v for k, v in oranlar.items() if k != "MBS"])
-            print(f"  [{done_count}/{total}] {row['Ev Sahibi']} vs {row['Deplasman']} - {oran_sayisi} oran")
-
-    df = pd.DataFrame(all_rows)
+        all_rows.append(bulten_satiri(row, oranlar))
+        done_count += 1
+        oran_sayisi = len([v for k, v in oranlar.items() if k != "MBS"])
+        print(f"  [{done_count}/{len(isler)}] {row['Ev Sahibi']} vs {row['Deplasman']} - "
+              f"{oran_sayisi} oran ({timing})")
 
-    # Sutun sirasini ayarla
-    for col in SUTUN_SIRASI:
-        if col not in df.columns:
-            df[col] = None
-    df = df[SUTUN_SIRASI]
+    fetcher.fetch_all(isler, on_result=sonuc_geldi, known=bilinen)
+    fetcher.report()
+    odds_state.save_state(tarih, durum, BULTEN_STATE_DIR)
 
-    df.sort_values(by=["Saat", "Ev Sahibi"], inplace=True)
-    df.reset_index(drop=True, inplace=True)
+    # Eksik oranlar None kalir; ID/Slug Excel'e yazilmaz, JSON'da oran
+    # yenileme (odds_refresh.py) icin tutulur
+    all_rows.sort(key=lambda satir: (satir["Saat"], satir["Ev Sahibi"]))
 
     # --- EXCEL KAYDET ---
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    dosya = os.path.join(script_dir, f"guncel_bulten_{TARIH}.xlsx")
-    df.to_excel(dosya, index=False, engine="openpyxl")
-    print(f"\nExcel kaydedildi: {dosya} ({len(df)} mac)")
+    dosya = os.path.join(script_dir, f"guncel_bulten_{tarih}.xlsx")
+    excel_export.export(dosya, [excel_export.records_sheet("Sheet1", all_rows, SUTUN_SIRASI)])
 
     # --- JSON KAYDET (Merger pipeline icin) ---
-    json_matches = []
-    for _, row in df.iterrows():
-        match = {
-            'home_team': str(row.get('Ev Sahibi', '')),
-            'away_team': str(row.get('Deplasman', '')),
-            'saat': str(row.get('Saat', '')),
-            'ms_1': safe_val(row.get('MS 1')),
-            'ms_x': safe_val(row.get('MS X')),
-            'ms_2': safe_val(row.get('MS 2')),
-            'kg_var': safe_val(row.get('KG Var')),
-            'kg_yok': safe_val(row.get('KG Yok')),
-            'ust_2_5': safe_val(row.get('AU 2,5 Ust')),
-            'alt_2_5': safe_val(row.get('AU 2,5 Alt')),
-            'ust_3_5': safe_val(row.get('AU 3,5 Ust')),
-            'alt_3_5': safe_val(row.get('AU 3,5 Alt')),
-            'ust_5_5': safe_val(row.get('AU 5,5 Ust')),
-            'iy_kg_var': safe_val(row.get('IY KG Var')),
-            'iy_kg_yok': safe_val(row.get('IY KG Yok')),
-        }
-        json_matches.append(match)
-
-    date_tr = datetime.now(tz).strftime('%d.%m.%Y')
+    json_matches = [json_kaydi(satir) for satir in all_rows]
+
+    date_tr = datetime.strptime(tarih, '%Y-%m-%d').strftime('%d.%m.%Y')
     date_compact = date_tr.replace('.', '')
 
     json_data = {
@@ -269,10 +307,22 @@ def main():
 
     with open(json_file, 'w', encoding='utf-8') as f:
         json.dump(json_data, f, ensure_ascii=False, indent=2)
+    run_ledger.add_records(records_out=len(json_matches))
+    metrics.set_gauge('oddsy_output_records', len(json_matches), file=os.path.basename(json_file))
 
     print(f"JSON kaydedildi: {json_file} ({len(json_matches)} mac)")
+
+    # JSON her calismada uzerine yazilir; oran hareketi ayrica birikir
+    yeni = odds_history.record('mackolik', {
+        satir["Kod"]: {sutun: safe_val(satir.get(sutun)) for sutun in SUTUN_SIRASI[6:]}
+        for satir in all_rows
+    })
+    print(f"Oran gecmisine {yeni} yeni gozlem eklendi")
+    journal.clear()
     print(f"\nTAMAMLANDI!")
 
 
 if __name__ == "__main__":
-    main()
+    # Pipeline icinden import edildiginde stdout'a dokunma
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    main(full='--full' in sys.argv[1:])
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP CACHE - SofaScore cevaplari icin kalici disk cache'i
+
+Her GET cevabi URL'ye gore cache/http/ altinda saklanir. URL'nin tipine
+gore tazelik suresi (TTL) farklidir:
+
+  canli skorlar      : 10 sn
+  event detay/durum  : 30 sn
+  oranlar            : 2 dk
+  gunluk fikstur     : 5 dk
+  diger (takim, lig) : 1 gun
+
+TTL dolmamissa istek hic atilmaz. Dolmussa cevap ETag/Last-Modified ile
+If-None-Match / If-Modified-Since gonderilerek yeniden dogrulanir; 304
+gelirse saklanan govde kullanilir ve TTL yenilenir.
+
+Kullanim:
+    http_client.configure(session, cache=True)   # ya da http_cache.install(session)
+    entry = http_cache.default_cache().get(url)   # async istemciler icin
+
+Cache'ten donen requests cevaplarinda response.cache_status 'hit' ya da
+'revalidated' olur, agdan gelenlerde response.cache_miss True olur;
+run_ledger ve metrics hook'lari bunu kullanir.
+HTTP_CACHE_DISABLE=1 cache'i kapatir.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from datetime import timedelta
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import fixtures
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'http'))
+
+# Sadece API cevaplari saklanir (warm-up sayfasi cookie icin her seferinde istenir)
+CACHEABLE_RE = re.compile(r'/api/v1/')
+
+# (URL regex, TTL saniye) - ilk eslesen kullanilir
+TTL_TIERS = [
+    (re.compile(r'/events/live'), 10),
+    (re.compile(r'/odds/|/markets$'), 120),
+    (re.compile(r'/event/\d+$'), 30),
+    (re.compile(r'/scheduled-events/'), 300),
+]
+DEFAULT_TTL = 86400
+
+# Saklanan ve cevaba geri yazilan header'lar
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def cache_enabled():
+    # Fixture kayit/replay'inde cache isabetleri upstream'i golgelemesin
+    return os.environ.get('HTTP_CACHE_DISABLE', '0') != '1' and not fixtures.active()
+
+
+def is_cacheable(url):
+    return cache_enabled() and bool(CACHEABLE_RE.search(url))
+
+
+def ttl_for(url):
+    path = url.split('?', 1)[0]
+    for pattern, ttl in TTL_TIERS:
+        if pattern.search(path):
+            return ttl
+    return DEFAULT_TTL
+
+
+class CacheEntry:
+    def __init__(self, url, stored_at, ttl, headers, body):
+        self.url = url
+        self.stored_at = stored_at
+        self.ttl = ttl
+        self.headers = headers
+        self.body = body
+
+    @property
+    def fresh(self):
+        return time.time() - self.stored_at < self.ttl
+
+    def conditional_headers(self):
+        headers = {}
+        if self.headers.get('ETag'):
+            headers['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            headers['If-Modified-Since'] = self.headers['Last-Modified']
+        return headers
+
+    def json(self):
+        return json.loads(self.body)
+
+    def to_response(self, request, cache_status, elapsed=0.0):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.request = request
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or 'utf-8'
+        response.elapsed = timedelta(seconds=elapsed)
+        response.cache_status = cache_status
+        return response
+
+
+class HttpCache:
+    """URL -> (meta .json, govde .body) dosya cifti; yazimlar atomik."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        return CacheEntry(url, meta['stored_at'], ttl_for(url), meta.get('headers', {}), body)
+
+    def store(self, url, headers, body):
+        kept = {name: headers[name] for name in KEPT_HEADERS if headers.get(name)}
+        meta_path, body_path = self._paths(url)
+        meta = {'url': url, 'stored_at': time.time(), 'headers': kept}
+        try:
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            with self._lock:
+                self._write(body_path, body)
+                self._write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            print(f"[WARN] HTTP cache yazilamadi: {e}")
+        return CacheEntry(url, meta['stored_at'], ttl_for(url), kept, body)
+
+    def touch(self, url, entry):
+        """304 sonrasi: govde ayni, TTL bastan baslar."""
+        return self.store(url, entry.headers, entry.body)
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
+
+
+class CachingAdapter(BaseAdapter):
+    """GET isteklerini HttpCache uzerinden gecirip gerisini `inner`'a birakir."""
+
+    def __init__(self, inner=None, cache=None):
+        super().__init__()
+        self.inner = inner or HTTPAdapter()
+        self.cache = cache or default_cache()
+
+    def close(self):
+        self.inner.close()
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET' or not is_cacheable(request.url):
+            return self.inner.send(request, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry is not None and entry.fresh:
+            return entry.to_response(request, 'hit')
+        if entry is not None:
+            request.headers.update(entry.conditional_headers())
+
+        response = self.inner.send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            entry = self.cache.touch(request.url, entry)
+            return entry.to_response(request, 'revalidated', response.elapsed.total_seconds())
+        if response.status_code == 200:
+            self.cache.store(request.url, response.headers, response.content)
+        response.cache_miss = True
+        return response
+
+
+def install(session, cache=None):
+    """Session'in http/https adapter'larini cache katmaniyla sarar."""
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, CachingAdapter(session.get_adapter(prefix), cache))
+    return session
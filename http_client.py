@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP CLIENT - Butun scraper'larin ortak HTTP katmani
+
+configure(session) bir requests/cloudscraper session'inin adapter'larini
+su zincirle degistirir:
+
+    [http_cache]  ->  ResilientAdapter  ->  tasima (havuzlu HTTPAdapter,
+                                            HTTP/2 icin httpx, ya da
+                                            cloudscraper'in kendi adapter'i)
+
+  - Havuz     : host basina HTTP_POOL_SIZE (varsayilan 16) baglanti
+  - HTTP/2    : HTTP2=1 ve httpx + h2 kuruluysa httpx uzerinden
+  - Retry     : 429/5xx ve baglanti hatalari HTTP_MAX_RETRIES kez,
+                ustel backoff + full jitter ile tekrar denenir
+  - Breaker   : bir host art arda HTTP_BREAKER_THRESHOLD kez 403/429
+                donerse HTTP_BREAKER_COOLDOWN saniye o hosta istek
+                atilmaz (CircuitOpenError); sure dolunca tek deneme
+  - Timing    : her deneme icin timing_hooks(request, response, saniye)
+
+run_ledger / metrics hook'lari session'a ayrica track_session() ile baglanir.
+HTTP_FIXTURES=record|replay ile tasima fixtures.py'nin kayit/replay
+adapter'iyla sarilir (cache o sirada devre disidir).
+"""
+import os
+import time
+import random
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import fixtures
+import metrics
+import run_ledger
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx http2=True icin gerekli)
+except ImportError:
+    httpx = None
+
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    # brotli yoksa 'br' cevabi cozulemez, istemeyelim
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '16'))
+HTTP2_ENABLED = os.environ.get('HTTP2', '0') == '1'
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.environ.get('HTTP_BACKOFF_BASE', '0.5'))
+BACKOFF_MAX = float(os.environ.get('HTTP_BACKOFF_MAX', '10'))
+BREAKER_THRESHOLD = int(os.environ.get('HTTP_BREAKER_THRESHOLD', '5'))
+BREAKER_COOLDOWN = float(os.environ.get('HTTP_BREAKER_COOLDOWN', '60'))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BREAKER_STATUSES = (403, 429)
+
+SOFASCORE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Origin': 'https://www.sofascore.com',
+    'Referer': 'https://www.sofascore.com/',
+    'Sec-Fetch-Dest': 'empty',
+    'Sec-Fetch-Mode': 'cors',
+    'Sec-Fetch-Site': 'same-site',
+    'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"',
+    'Connection': 'keep-alive',
+}
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Host'un devre kesicisi acik; istek hic atilmadi."""
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """attempt. tekrar icin bekleme: [0, min(cap, base * 2^attempt)] (full jitter)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# ---------------------------------------------------------------------------
+# DEVRE KESICI
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    def __init__(self, host, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial_running:
+                raise CircuitOpenError(f"{self.host}: devre acik ({self.failures} art arda 403/429)")
+            # Yari acik: tek bir deneme istegi gecsin
+            self.trial_running = True
+
+    def record(self, status_code):
+        with self._lock:
+            self.trial_running = False
+            if status_code in BREAKER_STATUSES:
+                self.failures += 1
+                if self.failures >= self.threshold:
+                    if self.opened_at is None:
+                        print(f"[WARN] {self.host} devre kesici acildi ({self.cooldown:.0f} sn)")
+                    self.opened_at = time.monotonic()
+            elif status_code < 400:
+                self.failures = 0
+                self.opened_at = None
+
+    def release_trial(self):
+        with self._lock:
+            self.trial_running = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(host):
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+# ---------------------------------------------------------------------------
+# ADAPTER'LAR
+# ---------------------------------------------------------------------------
+
+class ResilientAdapter(BaseAdapter):
+    """Devre kesici + backoff'lu retry; asil istegi `inner` adapter'a birakir."""
+
+    def __init__(self, inner, session=None, max_retries=MAX_RETRIES, timing_hooks=()):
+        super().__init__()
+        self.inner = inner
+        self.session = session
+        self.max_retries = max_retries
+        self.timing_hooks = list(timing_hooks)
+
+    def _note_retry(self, host):
+        run_ledger.note_retry(self.session)
+        metrics.note_retry(getattr(self.session, '_metrics_source', None) or host)
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).hostname or ''
+        breaker = breaker_for(host)
+        for attempt in range(self.max_retries + 1):
+            breaker.before_request()
+            started = time.perf_counter()
+            try:
+                response = self.inner.send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.release_trial()
+                self._call_hooks(request, None, time.perf_counter() - started)
+                if attempt >= self.max_retries:
+                    raise
+                metrics.note_exception(getattr(self.session, '_metrics_source', None) or host, e)
+                self._note_retry(host)
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            self._call_hooks(request, response, time.perf_counter() - started)
+            breaker.record(response.status_code)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = response.headers.get('Retry-After', '')
+                response.close()
+                self._note_retry(host)
+                delay = float(retry_after) if retry_after.isdigit() else backoff_delay(attempt)
+                time.sleep(min(delay, BACKOFF_MAX))
+                continue
+            return response
+
+    def _call_hooks(self, request, response, seconds):
+        for hook in self.timing_hooks:
+            try:
+                hook(request, response, seconds)
+            except Exception as e:
+                print(f"[WARN] Timing hook hatasi: {e}")
+
+    def close(self):
+        self.inner.close()
+
+
+class Http2Adapter(BaseAdapter):
+    """requests istegini httpx (http2=True) ile gonderen tasima adapter'i."""
+
+    def __init__(self, pool_size=POOL_SIZE, cookies=None):
+        super().__init__()
+        self.cookies = cookies
+        self.client = httpx.Client(
+            http2=True, follow_redirects=False,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        try:
+            r = self.client.request(request.method, request.url, headers=dict(request.headers),
+                                    content=request.body, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = r.status_code
+        response.headers = CaseInsensitiveDict(r.headers)
+        response._content = r.content
+        response.url = str(r.url)
+        response.reason = r.reason_phrase
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        # Set-Cookie'ler raw cevap olmadigi icin session'a burada yazilir
+        if self.cookies is not None:
+            for cookie in r.cookies.jar:
+                self.cookies.set_cookie(cookie)
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+def configure(session, cache=False, http2=HTTP2_ENABLED, pool_size=POOL_SIZE,
+              max_retries=MAX_RETRIES, timing_hooks=()):
+    """Session'a havuz + retry + devre kesici (+ istege bagli cache) zincirini takar.
+
+    cloudscraper gibi kendi https adapter'ini getiren session'larda o adapter
+    tasima olarak korunur.
+    """
+    import http_cache
+
+    custom_transport = type(session.get_adapter('https://')) is not HTTPAdapter
+    for prefix in ('https://', 'http://'):
+        current = session.get_adapter(prefix)
+        if custom_transport and prefix == 'https://':
+            transport = current
+        elif http2 and httpx is not None:
+            transport = Http2Adapter(pool_size, session.cookies)
+        else:
+            transport = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        transport = fixtures.wrap_transport(transport)
+        adapter = ResilientAdapter(transport, session, max_retries, timing_hooks)
+        if cache:
+            adapter = http_cache.CachingAdapter(adapter)
+        session.mount(prefix, adapter)
+    return session
+
+
+def create_session(headers=None, **kwargs):
+    """Ortak ayarlarla yeni bir requests session'i."""
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    return configure(session, **kwargs)
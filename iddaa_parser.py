@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IDDAA PARSER - Mackolik mac iddaa sayfasindan market oranlarini cikarir
+
+Hizli yol (lxml):
+  - Sayfada market listesi sinifi hic gecmiyorsa parse edilmez ({})
+  - Gecliyorsa sadece o <ul>'den sonraki kisim lxml (C) ile parse edilir;
+    sayfanin head/script kismi agaca hic girmez
+  - Secimler modul yuklenirken derlenmis XPath'lerle yapilir
+
+Yedek yol (BeautifulSoup, html.parser): lxml yoksa, hata verirse ya da
+market listesini bulamazsa eski kod aynen calisir.
+
+  parse_markets(html)        -> {"MBS": "4", "MS 1": "1,85", ...}
+  markets_fingerprint(html)  -> market bolumunun ozeti (degismediyse
+                                parse atlanabilir; bkz. guncel_bulten)
+
+Benchmark (kaydedilmis sayfa, fixture ya da sentetik sayfa):
+
+  python iddaa_parser.py                                  # varsayilanlar
+  python iddaa_parser.py sayfa.html fixtures/http/www.mackolik.com/<anahtar>.json.gz -n 500
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import time
+import base64
+import argparse
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEBUG_HTML = os.path.join(BASE_DIR, 'mackolik-excel-json', 'mackolik_debug.html')
+
+MARKETS_LIST_CLASS = 'widget-iddaa-markets__markets-list'
+MARKET_CONTENT_CLASS = 'widget-base__content widget-iddaa-markets__market-content'
+MBS_CLASS = 'widget-iddaa-markets__mbc'
+
+# Mackolik market adi -> Excel sutun adi eslestirmesi
+MARKET_MAP = {
+    "Ma\u00e7 Sonucu": {"1": "MS 1", "X": "MS X", "2": "MS 2"},
+    "1. Yar\u0131 Sonucu": {"1": "IY 1", "X": "IY X", "2": "IY 2"},
+    "Kar\u015f\u0131l\u0131kl\u0131 Gol": {"Var": "KG Var", "Yok": "KG Yok"},
+    "\u00c7ifte \u015eans": {"1-X": "CS 1/X", "1-2": "CS 1/2", "X-2": "CS X/2"},
+    "1. Yar\u0131 1,5 Alt/\u00dcst": {"Alt": "IY 1,5 Alt", "\u00dcst": "IY 1,5 Ust"},
+    "1,5 Alt/\u00dcst": {"Alt": "AU 1,5 Alt", "\u00dcst": "AU 1,5 Ust"},
+    "2,5 Alt/\u00dcst": {"Alt": "AU 2,5 Alt", "\u00dcst": "AU 2,5 Ust"},
+    "3,5 Alt/\u00dcst": {"Alt": "AU 3,5 Alt", "\u00dcst": "AU 3,5 Ust"},
+    "4,5 Alt/\u00dcst": {"Alt": "AU 4,5 Alt", "\u00dcst": "AU 4,5 Ust"},
+    "5,5 Alt/\u00dcst": {"Alt": "AU 5,5 Alt", "\u00dcst": "AU 5,5 Ust"},
+    "Toplam Gol Aral\u0131\u011f\u0131": {
+        "0-1 Gol": "TG 0-1", "2-3 Gol": "TG 2-3",
+        "4-6 Gol": "TG 4-6", "7+ Gol": "TG 7+",
+    },
+    "1. Yar\u0131 Kar\u015f\u0131l\u0131kl\u0131 Gol": {"Var": "IY KG Var", "Yok": "IY KG Yok"},
+}
+
+MBS_RE = re.compile(r"\d+")
+UL_START_RE = re.compile(r"<ul[\s>]", re.IGNORECASE)
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if etree is not None:
+    HTML_PARSER = etree.HTMLParser(remove_comments=True, remove_pis=True)
+    X_MARKETS_LIST = etree.XPath(f"(//ul[{_has_class(MARKETS_LIST_CLASS)}])[1]")
+    X_H2 = etree.XPath(".//h2")
+    X_MARKET_CONTENT = etree.XPath(f".//div[@class='{MARKET_CONTENT_CLASS}']")
+    X_FIRST_SPAN = etree.XPath("(.//span)[1]")
+    X_MBS_SPAN = etree.XPath(f"(.//span[{_has_class(MBS_CLASS)}])[1]")
+    X_FIRST_UL = etree.XPath("(.//ul)[1]")
+    X_LI = etree.XPath(".//li")
+    X_SPAN = etree.XPath(".//span")
+
+
+def _text(element, strip_parts=False):
+    # bs4: .text (strip_parts=False) / get_text(strip=True) (strip_parts=True)
+    if strip_parts:
+        return ''.join(part.strip() for part in element.itertext())
+    return ''.join(element.itertext())
+
+
+def _markets_list(html):
+    """Market listesi <ul>'i; sadece o noktadan sonrasi parse edilir."""
+    position = html.find(MARKETS_LIST_CLASS)
+    if position < 0:
+        return None
+    starts = [m.start() for m in UL_START_RE.finditer(html, 0, position)]
+    if starts:
+        found = X_MARKETS_LIST(etree.fromstring(html[starts[-1]:], HTML_PARSER))
+        if found:
+            return found[0]
+    # Sinif adi <ul> disinda gecti (script vb.): butun sayfa
+    found = X_MARKETS_LIST(etree.fromstring(html, HTML_PARSER))
+    return found[0] if found else None
+
+
+def markets_fingerprint(html):
+    """Market listesinden sayfa sonuna kadarki govdenin ozeti (liste yoksa None).
+
+    Sayfanin head kismi (istek basina degisen token'lar) ozete girmez.
+    Ozet ayniysa oranlar da aynidir; farkliysa sayfa normal parse edilir.
+    """
+    position = html.find(MARKETS_LIST_CLASS)
+    if position < 0:
+        return None
+    starts = [m.start() for m in UL_START_RE.finditer(html, 0, position)]
+    section = html[starts[-1] if starts else position:]
+    return hashlib.sha256(section.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_markets_lxml(html, market_map=MARKET_MAP):
+    """lxml yolu; market listesi yoksa None (yedek yola birakilir)."""
+    ul_main = _markets_list(html)
+    if ul_main is None:
+        return None
+
+    h2_tags = X_H2(ul_main)
+    ul_tags = []
+    for div in X_MARKET_CONTENT(ul_main):
+        first_ul = X_FIRST_UL(div)
+        ul_tags.append(first_ul[0] if first_ul else None)
+
+    # MBS bilgisi
+    mbs = ""
+    if h2_tags:
+        mbs_span = X_MBS_SPAN(h2_tags[0])
+        if mbs_span:
+            m = MBS_RE.search(_text(mbs_span[0]).strip())
+            mbs = m.group() if m else ""
+
+    sonuc = {"MBS": mbs}
+
+    for idx, h2 in enumerate(h2_tags):
+        first_span = X_FIRST_SPAN(h2)
+        bahis_tipi = _text(first_span[0]).strip() if first_span else ""
+        mapping = market_map.get(bahis_tipi)
+        if mapping is None:
+            continue
+        if idx >= len(ul_tags) or ul_tags[idx] is None:
+            continue
+
+        for li in X_LI(ul_tags[idx]):
+            spans = [_text(sp, strip_parts=True) for sp in X_SPAN(li)]
+            for k in range(0, len(spans) - 1, 2):
+                label = spans[k]
+                if label in mapping:
+                    sonuc[mapping[label]] = spans[k + 1]
+
+    return sonuc
+
+
+def parse_markets_bs4(html, market_map=MARKET_MAP):
+    """Eski BeautifulSoup (html.parser) yolu."""
+    s = BeautifulSoup(html, "html.parser")
+    ul_main = s.find("ul", {"class": MARKETS_LIST_CLASS})
+    if not ul_main:
+        return {}
+
+    h2_tags = ul_main.find_all("h2")
+    div_tags = ul_main.find_all("div", {"class": MARKET_CONTENT_CLASS})
+
+    # MBS bilgisi
+    mbs = ""
+    if h2_tags:
+        mbs_span = h2_tags[0].find("span", {"class": MBS_CLASS})
+        if mbs_span:
+            mbs_text = mbs_span.text.strip()
+            m = MBS_RE.search(mbs_text)
+            mbs = m.group() if m else ""
+
+    bahis_tipleri = [h2.find("span").text.strip() for h2 in h2_tags]
+    ul_tags = [div.find("ul") for div in div_tags]
+
+    sonuc = {"MBS": mbs}
+
+    for idx, bahis_tipi in enumerate(bahis_tipleri):
+        if bahis_tipi not in market_map:
+            continue
+        if idx >= len(ul_tags) or ul_tags[idx] is None:
+            continue
+
+        mapping = market_map[bahis_tipi]
+
+        for li in ul_tags[idx].find_all("li"):
+            spans = [sp.get_text(strip=True) for sp in li.find_all("span")]
+            for k in range(0, len(spans) - 1, 2):
+                label = spans[k]
+                val = spans[k + 1]
+                if label in mapping:
+                    sonuc[mapping[label]] = val
+
+    return sonuc
+
+
+def parse_markets(html, market_map=MARKET_MAP):
+    """Once lxml; lxml yoksa, hata verirse ya da liste bulamazsa BeautifulSoup."""
+    if etree is not None:
+        if MARKETS_LIST_CLASS not in html:
+            return {}
+        try:
+            sonuc = parse_markets_lxml(html, market_map)
+            if sonuc is not None:
+                return sonuc
+        except Exception as e:
+            print(f"[WARN] lxml iddaa parse hatasi, BeautifulSoup'a geciliyor: {e}")
+    return parse_markets_bs4(html, market_map)
+
+
+# ---------------------------------------------------------------------------
+# BENCHMARK
+# ---------------------------------------------------------------------------
+
+def synthetic_page(filler_kb=200):
+    """Butun MARKET_MAP marketlerini iceren, gercek sayfa boyutunda ornek sayfa."""
+    markets = []
+    for i, (name, mapping) in enumerate(MARKET_MAP.items()):
+        mbs = '<span class="widget-iddaa-markets__mbc">MBS 4</span>' if i == 0 else ''
+        items = ''.join(
+            f'<li class="widget-iddaa-markets__option"><span class="label"> {label} </span>'
+            f'<span class="value">{f"{1.5 + j / 10:.2f}".replace(".", ",")}</span></li>'
+            for j, label in enumerate(mapping)
+        )
+        markets.append(
+            f'<li class="widget-iddaa-markets__market"><h2 class="widget-base__title">'
+            f'<span>{name}</span>{mbs}</h2>'
+            f'<div class="{MARKET_CONTENT_CLASS}"><ul class="odds">{items}</ul></div></li>'
+        )
+    filler = '<div class="nav"><a href="/x">link</a><span>metin</span></div>' * (filler_kb * 1024 // 60)
+    script = '<script>window.__DATA__ = {"x": "' + 'a' * 20000 + '"};</script>'
+    return (f'<!DOCTYPE html><html><head><title>iddaa</title>{script}</head><body>{filler}'
+            f'<ul class="{MARKETS_LIST_CLASS}">{"".join(markets)}</ul>{filler}</body></html>')
+
+
+def load_page(path):
+    """.html dosyasi ya da fixtures.py kaydi (.json.gz)."""
+    if path.endswith('.json.gz'):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return base64.b64decode(json.load(f)['body']).decode('utf-8', errors='replace')
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _time_per_call(func, html, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(html)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def benchmark(pages, repeat):
+    print(f"{'sayfa':<40} {'boyut':>8} {'bs4 ms':>9} {'lxml ms':>9} {'hiz':>7}  sonuc")
+    for name, html in pages:
+        expected = parse_markets_bs4(html)
+        actual = parse_markets(html)
+        bs4_ms = _time_per_call(parse_markets_bs4, html, repeat)
+        fast_ms = _time_per_call(parse_markets, html, repeat)
+        same = "ayni" if actual == expected else "FARKLI"
+        print(f"{name[-40:]:<40} {len(html) // 1024:>6}KB {bs4_ms:>9.3f} {fast_ms:>9.3f} "
+              f"{bs4_ms / max(fast_ms, 1e-9):>6.1f}x  {same} ({len(actual)} alan)")
+        if actual != expected:
+            print(f"  bs4 : {expected}\n  lxml: {actual}")
+        if not expected:
+            print("  [INFO] Sayfada market listesi yok (orn. 404 sayfasi)")
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    parser = argparse.ArgumentParser(description="Mackolik iddaa parser benchmark")
+    parser.add_argument('pages', nargs='*', help=".html ya da fixture .json.gz dosyalari")
+    parser.add_argument('-n', '--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    if etree is None:
+        print("[ERROR] lxml kurulu degil")
+        sys.exit(1)
+
+    pages = [(path, load_page(path)) for path in (args.pages or [DEBUG_HTML])]
+    if not args.pages:
+        pages.append(('sentetik (12 market, ~400KB)', synthetic_page()))
+    benchmark(pages, args.repeat)
@@ -7,10 +7,15 @@ Kullanım:
 """
 
 import os
+import sys
 import json
 import argparse
 from pathlib import Path
 
+# Repo kokundeki artifact_cache modulu icin
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from artifact_cache import StageCache
+
 try:
     import pandas as pd
 except ImportError:
@@ -119,15 +124,43 @@ def convert_folder(folder_path: Path, data_type: str) -> dict:
     
     return all_data
 
+def build_stage_cache(tip: str) -> StageCache:
+    """Secilen tip icin girdi Excel'leri ve cikti JSON'lari uzerinden manifest"""
+    inputs, outputs = [], []
+    if tip in ["korner", "hepsi"]:
+        inputs += sorted(KORNER_DIR.glob("*.xlsx"))
+        outputs.append(OUTPUT_DIR / "korner.json")
+    if tip in ["kart", "hepsi"]:
+        inputs += sorted(KART_DIR.glob("*.xlsx"))
+        outputs.append(OUTPUT_DIR / "kart.json")
+    if tip == "hepsi":
+        outputs.append(OUTPUT_DIR / "tum_veriler.json")
+    
+    return StageCache(
+        f"excel_to_json_{tip}",
+        inputs=[str(p) for p in inputs],
+        code=[os.path.abspath(__file__)],
+        outputs=[str(p) for p in outputs],
+        extra={"tip": tip},
+    )
+
 def main():
     parser = argparse.ArgumentParser(description="Excel to JSON Converter")
     parser.add_argument("--tip", choices=["korner", "kart", "hepsi"], required=True,
                         help="Dönüştürülecek veri tipi")
+    parser.add_argument("--force", action="store_true",
+                        help="Girdiler degismemis olsa bile yeniden donustur")
     args = parser.parse_args()
     
     # Output klasörünü oluştur
     OUTPUT_DIR.mkdir(exist_ok=True)
     
+    # Excel'ler ve bu script degismediyse onceki JSON'lari kullan
+    cache = build_stage_cache(args.tip)
+    if not args.force and cache.is_fresh():
+        print(f"[CACHE] Excel dosyalari degismedi, onceki JSON'lar kullaniliyor ({cache.manifest_path})")
+        return
+    
     result = {}
     
     if args.tip in ["korner", "hepsi"]:
@@ -154,6 +187,7 @@ def main():
             json.dump(result, f, ensure_ascii=False, indent=2)
         print(f"✅ Tüm veriler kaydedildi: {OUTPUT_DIR / 'tum_veriler.json'}")
     
+    cache.record()
     print("\n🎉 Dönüşüm tamamlandı!")
 
 if __name__ == "__main__":
@@ -3,12 +3,16 @@ ANA KONTROL SCRIPTI - Tüm İşlemleri Sırayla Çalıştırır
 Kullanım: python main.py
 """
 
+import json
 import subprocess
 import sys
 import time
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from publish import StagedPublisher
+
 def print_header(text):
     """Başlık yazdır"""
     print("\n" + "=" * 70)
@@ -109,14 +113,19 @@ def main():
         results['copy'] = False
     else:
         try:
-            import shutil
+            # Staging + atomik rename: sadece icerigi degisen dosyalar guncellenir
+            publisher = StagedPublisher(oddsy_data_dir)
             output_dir = Path("output")
-            if (output_dir / "kart.json").exists():
-                shutil.copy2(output_dir / "kart.json", oddsy_data_dir / "kart.json")
-                print("✅ kart.json başarıyla kopyalandı!")
-            if (output_dir / "korner.json").exists():
-                shutil.copy2(output_dir / "korner.json", oddsy_data_dir / "korner.json")
-                print("✅ korner.json başarıyla kopyalandı!")
+            for filename in ("kart.json", "korner.json"):
+                if (output_dir / filename).exists():
+                    # Kanonik yaz (uretici sirasi korunur, bicim sabit) ki ayni veri byte byte ayni dosyayi uretsin
+                    with open(output_dir / filename, 'r', encoding='utf-8') as f:
+                        publisher.stage_json(filename, json.load(f))
+            changed = [name for name, _ in publisher.commit()]
+            for filename in changed:
+                print(f"✅ {filename} güncellendi!")
+            if not changed:
+                print("⏸️ kart.json / korner.json değişmedi, dokunulmadı")
             results['copy'] = True
         except Exception as e:
             print(f"❌ Kopyalama hatası: {e}")
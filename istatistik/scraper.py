@@ -9,6 +9,98 @@ import pandas as pd
 import time
 from datetime import datetime
 import re
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import excel_export
+import fixtures
+from checkpoint import CheckpointJournal
+
+# Yarıda kalan çalışmada tamamlanan ligler bu kadar saniye taze sayılır
+CHECKPOINT_TTL = int(os.environ.get('CARDS_CHECKPOINT_TTL', '21600'))
+
+
+def select_league(driver, wait, country, league_name, attempt_label, is_turkey=False):
+    """Ülke ve lig seçimlerini yapar, tablonun yüklenmesini bekler"""
+    # Ülke seç
+    print(f"🌍 Ülke seçiliyor: {country} ({attempt_label})")
+    time.sleep(3)
+    
+    country_select = Select(wait.until(EC.presence_of_element_located((By.ID, 'country'))))
+    
+    if is_turkey:
+        print("   🇹🇷 Türkiye özel işlemi başlatılıyor...")
+        # Türkiye için tüm seçenekleri yazdır
+        print("   Mevcut ülkeler:")
+        for opt in country_select.options:
+            if 'turkey' in opt.text.lower():
+                print(f"      ✓ BULUNDU: '{opt.text}'")
+    
+    # Ülke seç
+    country_found = False
+    for option in country_select.options:
+        option_text = option.text.strip()
+        if country.lower() == option_text.lower() or country.lower() in option_text.lower():
+            print(f"   ✓ Ülke bulundu: '{option_text}'")
+            country_select.select_by_visible_text(option_text)
+            country_found = True
+            break
+    
+    if not country_found:
+        print(f"   ⚠️ '{country}' tam eşleşmedi, direkt seçiliyor...")
+        country_select.select_by_visible_text(country)
+    
+    wait_time = 5 if is_turkey else 3
+    print(f"   ⏳ {wait_time} saniye bekleniyor...")
+    time.sleep(wait_time)
+    
+    # Lig seç
+    print(f"⚽ Lig seçiliyor: {league_name}")
+    league_select = Select(wait.until(EC.presence_of_element_located((By.ID, 'league'))))
+    
+    if is_turkey:
+        # Türkiye için tüm ligleri yazdır
+        print("   Mevcut ligler:")
+        for opt in league_select.options:
+            opt_text = opt.text.strip()
+            if opt_text:
+                print(f"      - '{opt_text}'")
+                if 'turkish' in opt_text.lower() or 'super' in opt_text.lower() or 'lig' in opt_text.lower():
+                    print(f"      ✓ EŞLEŞME: '{opt_text}'")
+    
+    # Lig ismini esnek şekilde bul
+    league_found = False
+    for option in league_select.options:
+        option_text = option.text.strip()
+        if not option_text:
+            continue
+        
+        # Türkiye için özel kontrol
+        if is_turkey:
+            if ('turkish' in option_text.lower() and 'super' in option_text.lower()) or \
+               ('turkish' in option_text.lower() and 'lig' in option_text.lower()) or \
+               'süper lig' in option_text.lower():
+                print(f"   ✓✓✓ TÜRKİYE LİGİ BULUNDU: '{option_text}'")
+                league_select.select_by_visible_text(option_text)
+                league_found = True
+                break
+        else:
+            # Diğer ligler için
+            if league_name.lower() in option_text.lower():
+                print(f"   ✓ Eşleşen lig bulundu: '{option_text}'")
+                league_select.select_by_visible_text(option_text)
+                league_found = True
+                break
+    
+    if not league_found:
+        print(f"   ⚠️ Lig bulunamadı, tam isimle deneniyor: '{league_name}'")
+        league_select.select_by_visible_text(league_name)
+    
+    wait_time = 8 if is_turkey else 6
+    print(f"⏳ Veriler yükleniyor ({wait_time} saniye)...")
+    time.sleep(wait_time)
+
 
 def scrape_league_cards(driver, wait, country, league_name, is_turkey=False):
     """Belirli bir lig için kart verilerini çeker"""
@@ -22,89 +114,19 @@ def scrape_league_cards(driver, wait, country, league_name, is_turkey=False):
     while retry_count < max_retries:
         try:
             # Ana sayfaya dön
-            if retry_count > 0:
+            if retry_count > 0 and not fixtures.replaying():
                 print("🔄 Ana sayfaya dönülüyor...")
                 driver.get('https://www.adamchoi.co.uk/cards/detailed')
                 time.sleep(4)
             
-            # Ülke seç
-            print(f"🌍 Ülke seçiliyor: {country} (Deneme {retry_count + 1}/{max_retries})")
-            time.sleep(3)
-            
-            country_select = Select(wait.until(EC.presence_of_element_located((By.ID, 'country'))))
-            
-            if is_turkey:
-                print("   🇹🇷 Türkiye özel işlemi başlatılıyor...")
-                # Türkiye için tüm seçenekleri yazdır
-                print("   Mevcut ülkeler:")
-                for opt in country_select.options:
-                    if 'turkey' in opt.text.lower():
-                        print(f"      ✓ BULUNDU: '{opt.text}'")
-            
-            # Ülke seç
-            country_found = False
-            for option in country_select.options:
-                option_text = option.text.strip()
-                if country.lower() == option_text.lower() or country.lower() in option_text.lower():
-                    print(f"   ✓ Ülke bulundu: '{option_text}'")
-                    country_select.select_by_visible_text(option_text)
-                    country_found = True
-                    break
-            
-            if not country_found:
-                print(f"   ⚠️ '{country}' tam eşleşmedi, direkt seçiliyor...")
-                country_select.select_by_visible_text(country)
-            
-            wait_time = 5 if is_turkey else 3
-            print(f"   ⏳ {wait_time} saniye bekleniyor...")
-            time.sleep(wait_time)
-            
-            # Lig seç
-            print(f"⚽ Lig seçiliyor: {league_name}")
-            league_select = Select(wait.until(EC.presence_of_element_located((By.ID, 'league'))))
-            
-            if is_turkey:
-                # Türkiye için tüm ligleri yazdır
-                print("   Mevcut ligler:")
-                for opt in league_select.options:
-                    opt_text = opt.text.strip()
-                    if opt_text:
-                        print(f"      - '{opt_text}'")
-                        if 'turkish' in opt_text.lower() or 'super' in opt_text.lower() or 'lig' in opt_text.lower():
-                            print(f"      ✓ EŞLEŞME: '{opt_text}'")
-            
-            # Lig ismini esnek şekilde bul
-            league_found = False
-            for option in league_select.options:
-                option_text = option.text.strip()
-                if not option_text:
-                    continue
-                
-                # Türkiye için özel kontrol
-                if is_turkey:
-                    if ('turkish' in option_text.lower() and 'super' in option_text.lower()) or \
-                       ('turkish' in option_text.lower() and 'lig' in option_text.lower()) or \
-                       'süper lig' in option_text.lower():
-                        print(f"   ✓✓✓ TÜRKİYE LİGİ BULUNDU: '{option_text}'")
-                        league_select.select_by_visible_text(option_text)
-                        league_found = True
-                        break
-                else:
-                    # Diğer ligler için
-                    if league_name.lower() in option_text.lower():
-                        print(f"   ✓ Eşleşen lig bulundu: '{option_text}'")
-                        league_select.select_by_visible_text(option_text)
-                        league_found = True
-                        break
-            
-            if not league_found:
-                print(f"   ⚠️ Lig bulunamadı, tam isimle deneniyor: '{league_name}'")
-                league_select.select_by_visible_text(league_name)
-            
-            wait_time = 8 if is_turkey else 6
-            print(f"⏳ Veriler yükleniyor ({wait_time} saniye)...")
-            time.sleep(wait_time)
-            
+            page_name = f"adamchoi-cards-{country}-{league_name}".lower().replace(' ', '-')
+            if fixtures.replaying():
+                # Kayıtlı sayfa görüntüsü stub sunucusundan yüklenir
+                driver.get(fixtures.replay_page_url(page_name))
+            else:
+                select_league(driver, wait, country, league_name,
+                              f"Deneme {retry_count + 1}/{max_retries}", is_turkey)
+
             # Tabloyu kontrol et
             rows = driver.find_elements(By.CSS_SELECTOR, "table tbody tr")
             print(f"📊 {len(rows)} satır bulundu.")
@@ -114,6 +136,9 @@ def scrape_league_cards(driver, wait, country, league_name, is_turkey=False):
                 retry_count += 1
                 continue
 
+            if fixtures.recording():
+                fixtures.record_page(page_name, driver.page_source)
+
             raw_data = []
             seen_matches = set()
             
@@ -205,52 +230,54 @@ def create_card_excel(df, country, league_name):
     print(f"\n💾 Excel dosyası oluşturuluyor: {file_name}")
     print(f"📋 {len(all_teams)} takım bulundu")
     
-    with pd.ExcelWriter(file_name, engine='openpyxl') as writer:
-        # Tüm maçlar sayfası
-        df_all = df.copy()
-        df_all['Kart'] = df_all['Ev Kart'] + ' - ' + df_all['Dep Kart']
-        df_all_sorted = df_all.sort_values('Tarih', ascending=False)
-        df_all_sorted[['Tarih', 'Ev Sahibi', 'Kart', 'Deplasman']].to_excel(
-            writer, sheet_name='Tüm Maçlar', index=False
-        )
-        
-        # Her takım için ayrı sayfa
-        for team in all_teams:
-            if not team or len(team.strip()) == 0:
-                continue
-            
-            team_matches = []
-            
-            # İç saha maçları
-            home = df[df['Ev Sahibi'] == team].copy()
-            for _, match in home.iterrows():
-                team_matches.append({
-                    'Tarih': match['Tarih'],
-                    'Rakip': match['Deplasman'],
-                    'Kart': f"{match['Ev Kart']} - {match['Dep Kart']}"
-                })
-            
-            # Dış saha maçları
-            away = df[df['Deplasman'] == team].copy()
-            for _, match in away.iterrows():
-                team_matches.append({
-                    'Tarih': match['Tarih'],
-                    'Rakip': match['Ev Sahibi'],
-                    'Kart': f"{match['Dep Kart']} - {match['Ev Kart']}"
-                })
-            
-            # Tarihe göre sırala
-            team_df = pd.DataFrame(team_matches)
-            team_df = team_df.sort_values('Tarih', ascending=False).reset_index(drop=True)
-            
-            # Excel sekme ismi temizleme
-            clean_name = re.sub(r'[\\/*?:\[\]]', '', team)[:30].strip()
-            if not clean_name:
-                clean_name = "Team_Data"
+    sheets = []
+
+    # Tüm maçlar sayfası
+    df_all = df.copy()
+    df_all['Kart'] = df_all['Ev Kart'] + ' - ' + df_all['Dep Kart']
+    df_all_sorted = df_all.sort_values('Tarih', ascending=False)
+    columns = ['Tarih', 'Ev Sahibi', 'Kart', 'Deplasman']
+    sheets.append(('Tüm Maçlar', columns, df_all_sorted[columns].values.tolist()))
 
-            team_df.to_excel(writer, sheet_name=clean_name, index=False)
+    # Her takım için ayrı sayfa
+    for team in all_teams:
+        if not team or len(team.strip()) == 0:
+            continue
+        
+        team_matches = []
+        
+        # İç saha maçları
+        home = df[df['Ev Sahibi'] == team].copy()
+        for _, match in home.iterrows():
+            team_matches.append({
+                'Tarih': match['Tarih'],
+                'Rakip': match['Deplasman'],
+                'Kart': f"{match['Ev Kart']} - {match['Dep Kart']}"
+            })
         
-        print(f"  ✓ {len(all_teams)} takım için veriler kaydedildi")
+        # Dış saha maçları
+        away = df[df['Deplasman'] == team].copy()
+        for _, match in away.iterrows():
+            team_matches.append({
+                'Tarih': match['Tarih'],
+                'Rakip': match['Ev Sahibi'],
+                'Kart': f"{match['Dep Kart']} - {match['Ev Kart']}"
+            })
+        
+        # Tarihe göre sırala
+        team_df = pd.DataFrame(team_matches)
+        team_df = team_df.sort_values('Tarih', ascending=False).reset_index(drop=True)
+        
+        # Excel sekme ismi temizleme
+        clean_name = re.sub(r'[\\/*?:\[\]]', '', team)[:30].strip()
+        if not clean_name:
+            clean_name = "Team_Data"
+
+        sheets.append((clean_name, list(team_df.columns), team_df.values.tolist()))
+
+    # excel_to_json.py bu dosyayı okur: her zaman ve senkron yazılır (akan workbook)
+    excel_export.export(file_name, sheets, required=True)
+    print(f"  ✓ {len(all_teams)} takım için veriler kaydedildi")
     
     print(f"✨ {country} - {league_name} tamamlandı: {file_name}")
     return file_name
@@ -271,6 +298,24 @@ def scrape_all_cards():
         ('Portugal', 'Portugese Liga NOS', False)
     ]
     
+    # Önceki çalışmada Excel'i oluşturulmuş ligler atlanır
+    journal = CheckpointJournal(f"adamchoi_cards_{datetime.now().strftime('%Y-%m-%d')}", CHECKPOINT_TTL)
+    done = journal.load()
+    created_files = []
+    pending = []
+    for country, league, is_turkey in leagues:
+        file_name = done.get(f"{country} - {league}")
+        if file_name and os.path.exists(file_name):
+            print(f"⏭️ {country} - {league} önceki çalışmadan alındı: {file_name}")
+            created_files.append(file_name)
+        else:
+            pending.append((country, league, is_turkey))
+
+    if not pending:
+        print("✅ Tüm ligler checkpoint'ten alındı, tarayıcı açılmadı.")
+        journal.clear()
+        return
+
     chrome_options = Options()
     chrome_options.add_argument('--start-maximized')
     # Cloud/Server settings
@@ -282,20 +327,21 @@ def scrape_all_cards():
     driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
     wait = WebDriverWait(driver, 25)
     
-    created_files = []
     failed_leagues = []
     
     try:
-        print("🌐 KART VERİSİ SAYFASINA GİDİLİYOR...")
-        driver.get('https://www.adamchoi.co.uk/cards/detailed')
-        time.sleep(4)
+        if not fixtures.replaying():
+            print("🌐 KART VERİSİ SAYFASINA GİDİLİYOR...")
+            driver.get('https://www.adamchoi.co.uk/cards/detailed')
+            time.sleep(4)
         
-        for country, league, is_turkey in leagues:
+        for country, league, is_turkey in pending:
             df = scrape_league_cards(driver, wait, country, league, is_turkey)
             
             if df is not None and len(df) > 0:
                 file_name = create_card_excel(df, country, league)
                 created_files.append(file_name)
+                journal.append(f"{country} - {league}", file_name)
                 
                 if is_turkey:
                     print("\n" + "🇹🇷"*20)
@@ -305,7 +351,8 @@ def scrape_all_cards():
                 print(f"⚠️ {country} - {league} atlandı (veri yok)")
                 failed_leagues.append(f"{country} - {league}")
             
-            time.sleep(4)  # Ligler arası daha uzun bekleme
+            if not fixtures.replaying():
+                time.sleep(4)  # Ligler arası daha uzun bekleme
         
         print(f"\n{'='*60}")
         print("🎉 TÜM LİGLER KART VERİSİ TAMAMLANDI!")
@@ -321,6 +368,7 @@ def scrape_all_cards():
                 print(f"  {i}. {league}")
         else:
             print(f"\n✨✨✨ TAMAMI BAŞARILI - HİÇ HATA YOK! ✨✨✨")
+            journal.clear()
         
     except Exception as e:
         print(f"\n❌ GENEL HATA: {e}")
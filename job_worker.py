@@ -0,0 +1,47 @@
+"""
+Entry point of warm job workers (see jobs.WarmWorkers).
+
+The forkserver preloads this module, so it must stay import-free apart
+from the standard library: anything imported here (pipeline, metrics,
+run_ledger, filter_bot...) would have its import-time state - env-driven
+flags, ODDSY_DATA_DIR, metric registries - frozen into every forked job.
+
+multiprocessing also re-imports the parent's main script in every child
+before the target runs, i.e. before the job's env is applied. Under
+`python -m uvicorn server:app` that is skipped; if the server is started
+some other way with server.py as __main__, jobs -> pipeline -> metrics ...
+come along (and cost ~0.6 s per job start). worker_main therefore drops
+every module loaded from the repo before running the script, so the script
+imports them again with the job's env and a clean state.
+"""
+import os
+import sys
+import runpy
+
+
+def _drop_repo_modules(repo_dir):
+    prefix = os.path.join(os.path.abspath(repo_dir), "")
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None) or ""
+        if name == __name__ or "site-packages" in path:
+            continue
+        if os.path.abspath(path).startswith(prefix):
+            del sys.modules[name]
+
+
+def worker_main(script, args, cwd, env, out_fd):
+    """Run `script` as __main__ in `cwd`, with stdout/stderr on `out_fd`."""
+    out_fd = out_fd.detach()
+    os.dup2(out_fd, 1)
+    os.dup2(out_fd, 2)
+    os.close(out_fd)
+    sys.stdout = open(1, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", errors="replace", buffering=1, closefd=False)
+
+    os.environ.update(env)
+    os.chdir(cwd)
+    script_path = os.path.abspath(script)
+    _drop_repo_modules(os.path.dirname(script_path))
+    sys.path.insert(0, os.path.dirname(script_path))
+    sys.argv = [script_path] + list(args)
+    runpy.run_path(script_path, run_name="__main__")
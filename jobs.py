@@ -0,0 +1,309 @@
+"""
+Job manager for server.py triggers.
+
+Every POST to /run-main or /run-stats becomes a Job with its own ID.
+Jobs run one at a time on a single worker thread so two pipelines never
+scrape the same endpoints or write the same output files concurrently.
+A trigger for a kind that is already queued or running is coalesced into
+that job instead of starting a second run.
+
+Step progress comes from the "##STEP {...}" lines that pipeline.py prints
+at the start and end of every step (see pipeline.emit_step_event).
+
+The job's output is read line by line while the script runs and kept in a
+bounded ring buffer per job, so /jobs/{id}/stream can follow a run live and
+late subscribers can catch up on the most recent lines.
+
+Jobs run in workers forked from a warm forkserver that has pandas,
+openpyxl, cloudscraper, bs4 etc. already imported, so a trigger does not
+pay the interpreter start-up and import cost again. Every job still gets a
+freshly forked process: the pipeline scripts keep per-run module state
+(e.g. guncel_bulten.TARIH) that must not leak from one day's run into the
+next. The forkserver preloads only libraries and job_worker (the worker
+entry point), never pipeline modules. Where forkserver is unavailable
+(Windows) or JOB_WORKER_MODE is set to "subprocess", jobs fall back to a
+plain `python script` subprocess.
+
+The server must run as `python -m uvicorn server:app` (Dockerfile; `python
+server.py` re-execs into it). multiprocessing re-imports a file-based
+__main__ in every child before the target runs; with server.py as __main__
+that pulls fastapi, apscheduler, jobs and pipeline into each job and a warm
+start took ~0.6 s instead of ~25 ms. A package __main__ (uvicorn.__main__)
+is not re-imported. See job_worker.py for the fallback when it still is.
+"""
+import os
+import sys
+import json
+import uuid
+import threading
+import subprocess
+import multiprocessing
+import multiprocessing.reduction
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from job_worker import worker_main
+from pipeline import STEP_EVENT_PREFIX
+
+ACTIVE_STATES = ("queued", "running")
+
+# kind -> kinds whose active job absorbs a new trigger (default: same kind)
+COALESCE_INTO = {
+    "refresh": ("refresh", "main"),
+}
+
+# Lines of output kept per job for late stream subscribers
+LOG_BUFFER_LINES = int(os.environ.get("JOB_LOG_LINES", "2000"))
+
+WORKER_MODE = os.environ.get("JOB_WORKER_MODE", "forkserver")
+
+# Imported once in the forkserver; every worker forked from it starts warm.
+# Only libraries here: pipeline modules with import-time state stay fresh.
+# job_worker (the worker entry point) imports nothing from the pipeline.
+PRELOAD_MODULES = [
+    "pandas", "openpyxl", "cloudscraper", "bs4", "lxml", "pytz", "requests",
+    "job_worker",
+]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many distinct jobs are already waiting."""
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class WarmWorkers:
+    """Forkserver with the heavy modules preloaded."""
+
+    def __init__(self, preload=PRELOAD_MODULES):
+        self.ctx = multiprocessing.get_context("forkserver")
+        self.ctx.set_forkserver_preload(list(preload))
+
+    @staticmethod
+    def available():
+        return "forkserver" in multiprocessing.get_all_start_methods()
+
+    def start(self):
+        """Starts the forkserver now so the first trigger is already warm."""
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+
+    def spawn(self, script, args, cwd, env):
+        """Forks a worker for `script`; returns (process, line reader)."""
+        read_fd, write_fd = os.pipe()
+        proc = self.ctx.Process(
+            target=worker_main,
+            args=(script, args, cwd, env, multiprocessing.reduction.DupFd(write_fd)),
+            daemon=False,
+        )
+        try:
+            proc.start()
+        finally:
+            os.close(write_fd)
+        reader = open(read_fd, "r", encoding="utf-8", errors="replace")
+        return proc, reader
+
+
+class Job:
+    def __init__(self, kind, script, cwd, args=()):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.script = script
+        self.args = list(args)
+        self.cwd = cwd
+        self.state = "queued"
+        self.triggers = 1
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.returncode = None
+        self.error = None
+        self.steps = OrderedDict()
+        self.log = deque(maxlen=LOG_BUFFER_LINES)
+        self.log_seq = 0
+        self._log_lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state not in ACTIVE_STATES
+
+    def append_log(self, text, kind="log"):
+        """Adds one output line to the ring buffer as (seq, kind, text)."""
+        with self._log_lock:
+            self.log_seq += 1
+            self.log.append((self.log_seq, kind, text))
+
+    def log_since(self, seq):
+        """Buffered lines with a sequence number above seq.
+
+        If the subscriber fell behind the ring buffer the oldest lines are
+        simply gone; it continues from the oldest line still buffered.
+        """
+        with self._log_lock:
+            return [entry for entry in self.log if entry[0] > seq]
+
+    def handle_step_event(self, event):
+        name = event.get("step")
+        if not name:
+            return
+        step = self.steps.setdefault(name, {"state": "pending"})
+        if event.get("event") == "start":
+            step["state"] = "running"
+            step["started_at"] = _now()
+        elif event.get("event") == "end":
+            step["state"] = event.get("status", "ok")
+            step["finished_at"] = _now()
+            if "wall_s" in event:
+                step["wall_s"] = event["wall_s"]
+
+    def to_dict(self, include_steps=True):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "state": self.state,
+            "triggers": self.triggers,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "returncode": self.returncode,
+            "error": self.error,
+            "log_lines": self.log_seq,
+        }
+        if include_steps:
+            data["steps"] = [dict(step, name=name) for name, step in self.steps.items()]
+        return data
+
+
+class JobManager:
+    """Bounded FIFO of pipeline jobs with per-kind coalescing.
+
+    max_pending caps how many distinct jobs may wait at once; history caps
+    how many finished jobs are kept for GET /jobs.
+    """
+
+    def __init__(self, max_pending=4, history=50, worker_mode=WORKER_MODE):
+        self.max_pending = max_pending
+        self.history = history
+        self.workers = None
+        if worker_mode == "forkserver" and WarmWorkers.available():
+            self.workers = WarmWorkers()
+        self._jobs = OrderedDict()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def start_workers(self):
+        """Warms the worker forkserver (call once at server start-up)."""
+        if self.workers is not None:
+            self.workers.start()
+
+    def submit(self, kind, script, cwd, args=()):
+        """Queue a job, or return the active job it coalesces with.
+
+        A job coalesces with an active job of the same kind, or of a kind
+        listed in COALESCE_INTO (an odds refresh is redundant while a full
+        pipeline is queued or running). Returns (job, coalesced).
+        """
+        targets = COALESCE_INTO.get(kind, (kind,))
+        with self._cond:
+            for job in self._jobs.values():
+                if job.kind in targets and job.state in ACTIVE_STATES:
+                    job.triggers += 1
+                    return job, True
+
+            if len(self._queue) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._queue)} jobs already queued")
+
+            job = Job(kind, script, cwd, args)
+            self._jobs[job.id] = job
+            self._queue.append(job)
+            self._prune()
+            self._ensure_worker()
+            self._cond.notify()
+            return job, False
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._cond:
+            return list(reversed(self._jobs.values()))
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.state not in ACTIVE_STATES]
+        for job in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job.id]
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._work, name="job-worker", daemon=True)
+            self._worker.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job = self._queue.popleft()
+                job.state = "running"
+                job.started_at = _now()
+            try:
+                returncode, error = self._run(job), None
+            except Exception as e:
+                returncode, error = None, str(e)
+            with self._cond:
+                job.returncode = returncode
+                job.error = error
+                job.state = "succeeded" if returncode == 0 else "failed"
+                job.finished_at = _now()
+                self._prune()
+
+    def _run(self, job):
+        """Runs the job's script and consumes its output line by line."""
+        print(f"[JOB {job.id}] Starting {job.script} in {job.cwd}...")
+        env = {
+            "PYTHONIOENCODING": "utf-8",
+            "PYTHONUNBUFFERED": "1",
+            "PIPELINE_RUN_ID": f"job-{job.id}",
+        }
+        if self.workers is not None:
+            proc, reader = self.workers.spawn(job.script, job.args, job.cwd, env)
+            with reader:
+                for line in reader:
+                    self._handle_line(job, line.rstrip("\n"))
+            proc.join()
+            returncode = proc.exitcode
+        else:
+            returncode = self._run_subprocess(job, dict(os.environ, **env))
+        print(f"[JOB {job.id}] {job.script} exited with {returncode}")
+        return returncode
+
+    def _run_subprocess(self, job, env):
+        proc = subprocess.Popen(
+            [sys.executable, job.script] + job.args,
+            cwd=job.cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        for line in proc.stdout:
+            self._handle_line(job, line.rstrip("\n"))
+        return proc.wait()
+
+    def _handle_line(self, job, line):
+        if line.startswith(STEP_EVENT_PREFIX):
+            payload = line[len(STEP_EVENT_PREFIX):]
+            try:
+                job.handle_step_event(json.loads(payload))
+            except ValueError:
+                return
+            job.append_log(payload, kind="step")
+            return
+        job.append_log(line)
+        print(f"[JOB {job.id}] {line}")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MACKOLIK FETCHER - iddaa sayfalarini uyarlanir eszamanlilikla ceker
+
+guncel_bulten eskiden sabit 10 thread'le, hepsi tek bir cloudscraper
+session'ini paylasarak ceker; her hatayi yutup {} dondururdu, yani
+throttle sessizce eksik oran olarak gorunurdu. Burada:
+
+  - Her worker thread'inin kendi cloudscraper session'i vardir (kendi
+    cookie'leri ve baglanti havuzu; zincir yine http_client.configure)
+  - Ayni anda kac sayfa cekilecegi AIMD ile ayarlanir: basarili ve hizli
+    cevaplarda limit yavasca artar (+1/limit), hata / 403 / 429 ya da
+    gecikme MACKOLIK_LATENCY_TARGET'i asinca carpimsal duser. Market
+    listesi bos 200 cevabi basarili sayilir (ileri tarihli maclarda oran
+    henuz acilmamis olabilir; throttle degildir)
+  - Market listesi bos gelen sayfa MACKOLIK_EMPTY_RETRIES kez backoff ile
+    yeniden denenir; cagiran bunu sadece bugunun maclari icin acar
+  - Her mac icin fetch ve parse sureleri olculur; sonda ozet basilir
+  - Onceki calismadan bilinen (parmak izi, oranlar) verilirse market
+    bolumu degismeyen sayfa yeniden parse edilmez
+
+Ayarlar:
+  - MACKOLIK_CONCURRENCY      : baslangic limiti (varsayilan 4)
+  - MACKOLIK_MAX_CONCURRENCY  : worker sayisi = limitin ust siniri (16)
+  - MACKOLIK_LATENCY_TARGET   : saniye; ortalama gecikme bunu asarsa
+                                limit duser (varsayilan 3)
+  - MACKOLIK_EMPTY_RETRIES    : bos sayfa tekrar sayisi (varsayilan 2;
+                                empty_retries=0 ile kapatilir)
+
+cloudscraper senkron oldugu icin (Cloudflare cozumu requests uzerinde)
+asyncio yerine thread havuzu + uyarlanir limit kullanilir.
+"""
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cloudscraper
+
+import http_client
+import iddaa_parser
+import metrics
+import run_ledger
+
+INITIAL_CONCURRENCY = int(os.environ.get('MACKOLIK_CONCURRENCY', '4'))
+MAX_CONCURRENCY = int(os.environ.get('MACKOLIK_MAX_CONCURRENCY', '16'))
+LATENCY_TARGET = float(os.environ.get('MACKOLIK_LATENCY_TARGET', '3'))
+EMPTY_RETRIES = int(os.environ.get('MACKOLIK_EMPTY_RETRIES', '2'))
+
+# Hata ve yavas cevapta limit bu katsayilarla carpilir
+ERROR_BACKOFF = 0.5
+SLOW_BACKOFF = 0.8
+# Gecikme ortalamasi (EWMA) agirligi
+EWMA_ALPHA = 0.3
+
+IDDAA_URL = "https://www.mackolik.com/mac/{slug}/iddaa/{match_id}"
+
+
+def has_odds(oranlar):
+    """MBS disinda en az bir oran varsa True."""
+    return any(key != "MBS" for key in oranlar)
+
+
+class AimdLimit:
+    """Thread'ler arasi uyarlanir eszamanlilik limiti (AIMD).
+
+    acquire() aktif istek sayisi int(limit)'e ulasinca bekler. release()
+    cevabin sonucuna gore limiti gunceller. Ust uste gelen hatalar limiti
+    bir kerede sifira indirmesin diye dusurme en fazla LATENCY_TARGET
+    saniyede bir yapilir.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=1, maximum=MAX_CONCURRENCY,
+                 latency_target=LATENCY_TARGET):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.latency_target = latency_target
+        self.latency = None
+        self.peak = self.limit
+        self.decreases = 0
+        self.active = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+
+    def release(self, ok, seconds):
+        with self._cond:
+            self.active -= 1
+            if seconds is not None:
+                self.latency = seconds if self.latency is None else (
+                    EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.latency)
+            if not ok:
+                self._decrease(ERROR_BACKOFF)
+            elif self.latency is not None and self.latency > self.latency_target:
+                self._decrease(SLOW_BACKOFF)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.peak = max(self.peak, self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, factor):
+        now = time.monotonic()
+        if now - self._last_decrease < self.latency_target:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * factor)
+        self.decreases += 1
+
+
+class MatchTiming:
+    """Tek macin olcumleri: toplam fetch/parse suresi, deneme sayisi ve
+    market bolumunun parmak izi (parse atlandiysa reused=True)."""
+
+    def __init__(self):
+        self.fetch_s = 0.0
+        self.parse_s = 0.0
+        self.attempts = 0
+        self.status = None
+        self.has_odds = False
+        self.fingerprint = None
+        self.reused = False
+
+    def __str__(self):
+        text = f"fetch {self.fetch_s:.2f}s, parse {self.parse_s * 1000:.0f}ms"
+        if self.reused:
+            text = f"fetch {self.fetch_s:.2f}s, degismedi"
+        if self.attempts > 1:
+            text += f", {self.attempts} deneme"
+        return text
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class MackolikFetcher:
+    """iddaa sayfalarini worker basina ayri session ve AIMD limitiyle ceker."""
+
+    def __init__(self, max_workers=MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY,
+                 empty_retries=EMPTY_RETRIES, source='mackolik'):
+        self.max_workers = max(1, max_workers)
+        self.limit = AimdLimit(initial, maximum=self.max_workers)
+        self.empty_retries = empty_retries
+        self.source = source
+        self.stats = None
+        self.timings = []
+        self.empty_retried = 0
+        self._local = threading.local()
+        self._timings_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = http_client.configure(cloudscraper.create_scraper())
+            run_ledger.track_session(session)
+            # Worker thread'inin kendi adimi yok; cevaplar cagiran adima sayilir
+            session._ledger_stats = self.stats
+            metrics.track_session(session, self.source)
+            self._local.session = session
+        return session
+
+    def _note_retry(self):
+        if self.stats is not None:
+            self.stats.add_retry()
+        metrics.note_retry(self.source)
+
+    def fetch_one(self, match_id, slug, known=None):
+        """(oranlar, MatchTiming); oranlar cekilemezse {}.
+
+        known: onceki calismanin (parmak izi, oranlar) ikilisi.
+        """
+        url = IDDAA_URL.format(slug=slug, match_id=match_id)
+        timing = MatchTiming()
+        oranlar = {}
+        for attempt in range(self.empty_retries + 1):
+            timing.attempts += 1
+            html = None
+            self.limit.acquire()
+            started = time.perf_counter()
+            try:
+                response = self._session().get(url, timeout=20)
+                timing.status = response.status_code
+                if response.status_code == 200:
+                    html = response.text
+            except http_client.CircuitOpenError:
+                self.limit.release(False, None)
+                break
+            except Exception as e:
+                metrics.note_exception(self.source, e)
+                timing.status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            timing.fetch_s += elapsed
+
+            if html is not None:
+                timing.fingerprint = iddaa_parser.markets_fingerprint(html)
+                if known and timing.fingerprint is not None and known[0] == timing.fingerprint:
+                    oranlar = known[1]
+                    timing.reused = True
+                else:
+                    started = time.perf_counter()
+                    oranlar = iddaa_parser.parse_markets(html, iddaa_parser.MARKET_MAP)
+                    parse_s = time.perf_counter() - started
+                    timing.parse_s += parse_s
+                    timing.reused = False
+                    metrics.observe('oddsy_parse_seconds', parse_s, source=self.source)
+
+            # Bos da olsa 200 cevabi limiti dusurmez; sadece hata/403/429
+            self.limit.release(html is not None, elapsed)
+            if html is not None and has_odds(oranlar):
+                break
+            # 404 gibi kalici cevaplarda tekrar denemenin anlami yok
+            if html is None and timing.status in (403, 404, 410):
+                break
+            if attempt < self.empty_retries:
+                if html is not None:
+                    self.empty_retried += 1
+                self._note_retry()
+                time.sleep(http_client.backoff_delay(attempt))
+
+        timing.has_odds = has_odds(oranlar)
+        with self._timings_lock:
+            self.timings.append(timing)
+        return oranlar, timing
+
+    def fetch_all(self, jobs, on_result=None, known=None):
+        """jobs: [(anahtar, match_id, slug)] -> {anahtar: oranlar}.
+
+        on_result(anahtar, oranlar, timing) her mac bitince cagiran thread'de
+        cagrilir (ilerleme satiri, checkpoint journal'i). known:
+        {anahtar: (parmak izi, oranlar)}.
+        """
+        known = known or {}
+        self.stats = run_ledger.current_stats()
+        results = {}
+        workers = min(self.max_workers, len(jobs)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mackolik') as executor:
+            futures = {executor.submit(self.fetch_one, match_id, slug, known.get(key)): key
+                       for key, match_id, slug in jobs}
+            for future in as_completed(futures):
+                key = futures[future]
+                oranlar, timing = future.result()
+                results[key] = oranlar
+                if on_result is not None:
+                    on_result(key, oranlar, timing)
+        return results
+
+    def report(self):
+        """Calismanin fetch/parse sure ozeti ve son eszamanlilik limiti."""
+        if not self.timings:
+            return
+        fetch = [t.fetch_s for t in self.timings]
+        parse = [t.parse_s * 1000 for t in self.timings]
+        empty = sum(1 for t in self.timings if t.status == 200 and not t.has_odds)
+        reused = sum(1 for t in self.timings if t.reused)
+        print(f"[INFO] Mackolik: {len(self.timings)} mac | "
+              f"fetch p50 {_percentile(fetch, 0.5):.2f}s p95 {_percentile(fetch, 0.95):.2f}s | "
+              f"parse p50 {_percentile(parse, 0.5):.0f}ms p95 {_percentile(parse, 0.95):.0f}ms"
+              + (f" | {reused} sayfa degismedi (parse atlandi)" if reused else ""))
+        print(f"[INFO] Eszamanlilik: son {self.limit.limit:.1f}, en yuksek {self.limit.peak:.1f}, "
+              f"{self.limit.decreases} dusurme | bos sayfa tekrari {self.empty_retried}"
+              + (f", {empty} mac denemelerden sonra da bos" if empty else ""))
@@ -13,81 +13,70 @@ Adimlar:
   7. Kart & Korner Istatistik (istatistik/main.py)
   8. Git Push (oddsy-data reposuna)
 
+1, 2, 3 ve 7 birbirinden bagimsizdir ve ayni anda calisir; 4 ve 6 girdileri
+hazir olur olmaz baslar (bkz. pipeline.py).
+
+  python main.py            -> tam pipeline (gunde bir kez)
+  python main.py --refresh  -> gun ici: sadece baslamamis maclarin oranlari
+                               yenilenir, filtre + git push tekrar calisir
+  python main.py --prefetch -> yogun olmayan saatte yarinin (--days N: N
+                               gunun) fikstur + oranlarini ceker ve birlestirir;
+                               o gunun sabahi tam pipeline fikstur kesfini
+                               atlayip sadece degisen oranlari yeniler
+                               (--full ile her zaman tam kesif)
+
 NOT: Firebase KULLANILMAZ. Veriler JSON olarak oddsy-data reposuna push edilir.
      Frontend bu JSON'lari GitHub raw URL'lerinden ceker.
 """
+import argparse
 import subprocess
 import sys
 import os
 from datetime import datetime
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# oddsy-data: CI'da ./oddsy-data, lokalde ../oddsy-data
-_ci_path = os.path.join(BASE_DIR, 'oddsy-data')
-_local_path = os.path.abspath(os.path.join(BASE_DIR, '..', 'oddsy-data'))
-ODDSY_DATA_DIR = _ci_path if os.path.exists(_ci_path) else _local_path
-
-
-def print_header(text):
-    print(f"\n{'='*70}")
-    print(f"  {text}")
-    print(f"{'='*70}")
-
+import excel_export
+import metrics
+import run_ledger
+from publish import apply_retention, changed_paths, publish_lock
+from pipeline import (
+    BASE_DIR, ODDSY_DATA_DIR, PREFETCH_DAYS, build_prefetch_steps, build_refresh_steps,
+    build_steps, emit_step_event, mark_prefetched, prefetch_days, print_header, run_pipeline
+)
 
-def run_step(step_name, script_name, work_dir=None):
-    """Bir pipeline adimini calistirir."""
-    print_header(step_name)
-    cwd = work_dir or BASE_DIR
-    script_path = os.path.join(cwd, script_name)
-
-    if not os.path.exists(script_path):
-        print(f"[ERROR] Script bulunamadi: {script_path}")
-        return False
-
-    try:
-        env = os.environ.copy()
-        env['PYTHONIOENCODING'] = 'utf-8'
-        result = subprocess.run(
-            [sys.executable, script_path],
-            cwd=cwd,
-            check=True,
-            env=env
-        )
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"[ERROR] {script_name} basarisiz (exit code: {e.returncode})")
-        return False
-    except Exception as e:
-        print(f"[ERROR] {script_name} hatasi: {e}")
-        return False
 
+def main(refresh=False, prefetch=False, days=PREFETCH_DAYS, full=False):
+    """Butun adimlar (ve git push) basariliysa True.
 
-def main():
-    print_header("FUTBOL BOT PIPELINE BASLANIYOR")
+    Sonuc surecin cikis kodu olur; server.py job'u buna gore
+    succeeded/failed isaretler.
+    """
+    if prefetch:
+        title = f"ON CEKIM BASLANIYOR ({days} gun)"
+    else:
+        title = "ORAN YENILEME BASLANIYOR" if refresh else "FUTBOL BOT PIPELINE BASLANIYOR"
+    print_header(title)
     print(f"[START] {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
     print(f"[DIR]   {BASE_DIR}\n")
 
+    # server.py job manager'i kendi run_id'sini verir ki ledger kayitlari eslessin
+    run_id = os.environ.get('PIPELINE_RUN_ID') or run_ledger.new_run_id()
+
     # Gerekli klasorleri olustur
     os.makedirs(os.path.join(BASE_DIR, "filtered"), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, "merged", "merged_json"), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, "mackolik-excel-json", "json_output"), exist_ok=True)
     os.makedirs(os.path.join(ODDSY_DATA_DIR, "data"), exist_ok=True)
 
-    # Pipeline adimlari: (isim, script, calisma_dizini)
-    steps = [
-        ("1/7: ORAN DUSEN MACLAR",      "dropping_odds_bot.py", BASE_DIR),
-        ("2/7: SOFASCORE VERILERI",      "bet365data.py",        os.path.join(BASE_DIR, "sofa")),
-        ("3/7: MACKOLIK VERILERI",       "guncel_bulten.py",     BASE_DIR),
-        ("4/7: VERILERI BIRLESTIR",      "match_merger_bot.py",  os.path.join(BASE_DIR, "merged")),
-        ("5/7: ESKI VERILERI TEMİZLE",   "clean.py",             BASE_DIR),
-        ("6/7: FILTRELE + JSON KAYDET",  "filter_bot.py",        BASE_DIR),
-        ("7/7: KART & KORNER VERILERI",  "main.py",              os.path.join(BASE_DIR, "istatistik")),
-    ]
-
-    results = []
-    for step_name, script, cwd in steps:
-        success = run_step(step_name, script, cwd)
-        results.append((step_name, success))
+    # Pipeline adimlari: bagimsiz olanlar paralel, digerleri girdileri hazir olunca
+    # --refresh: sadece baslamamis maclarin oranlari + filtre (bkz. odds_refresh.py)
+    # --prefetch: ileri tarihlerin fikstur + oranlari, yayin yapilmaz
+    if prefetch:
+        steps = build_prefetch_steps(days=days)
+    elif refresh:
+        steps = build_refresh_steps()
+    else:
+        steps = build_steps(full=full)
+    results = run_pipeline(steps, run_id=run_id)
 
     # --- OZET ---
     print_header("ISLEM OZETI")
@@ -101,46 +90,133 @@ def main():
 
     print(f"\n[RESULT] {success_count}/{len(results)} adim basarili")
 
-    if success_count == len(results):
+    ok = success_count == len(results)
+    if ok:
         print("\n[SUCCESS] TUM ISLEMLER TAMAMLANDI!")
     else:
         print("\n[WARN] Bazi adimlar basarisiz oldu.")
 
-    # --- GIT PUSH (oddsy-data reposuna) ---
-    print_header("8/8: GIT PUSH (oddsy-data reposuna)")
-
-    if os.path.exists(ODDSY_DATA_DIR):
-        try:
-            today_str = datetime.now().strftime('%d.%m.%Y')
-            # Once pull al, conflict onle
-            subprocess.run(['git', 'pull', 'origin', 'main', '--rebase'], cwd=ODDSY_DATA_DIR, check=False)
-            subprocess.run(['git', 'add', 'data/'], cwd=ODDSY_DATA_DIR, check=True)
-            # Degisiklik var mi kontrol et
-            diff = subprocess.run(['git', 'diff', '--staged', '--quiet'], cwd=ODDSY_DATA_DIR)
-            if diff.returncode != 0:
-                subprocess.run(
-                    ['git', 'commit', '-m', f'chore: update daily predictions {today_str}'],
-                    cwd=ODDSY_DATA_DIR, check=True
-                )
-                subprocess.run(['git', 'push', 'origin', 'main'], cwd=ODDSY_DATA_DIR, check=True)
-                print("[OK] oddsy-data git push basarili! Frontend otomatik guncellenecek.")
-            else:
-                print("[INFO] Veri degismedi, push gerekmiyor.")
-        except Exception as e:
-            print(f"[ERROR] Git push hatasi: {e}")
+    if prefetch:
+        marked = mark_prefetched(prefetch_days(days=days))
+        print(f"[INFO] On cekilmis gunler: {', '.join(sorted(marked)) or '-'}")
     else:
-        print(f"[ERROR] oddsy-data klasoru bulunamadi: {ODDSY_DATA_DIR}")
+        # --- GIT PUSH (oddsy-data reposuna) ---
+        print_header("8/8: GIT PUSH (oddsy-data reposuna)")
+
+        emit_step_event("8/8: GIT PUSH", 'start')
+        with run_ledger.measure("8/8: GIT PUSH", run_id) as stats:
+            push_to_oddsy_data(stats)
+        emit_step_event("8/8: GIT PUSH", 'end', status=stats.status)
+        ok = ok and stats.status == 'ok'
+
+    # Arka plandaki Excel yedekleri bitmeden surec kapanmasin (bkz. excel_export.py)
+    excel_export.wait()
+
+    # Bu surecte toplanan metrikleri server'in /metrics endpoint'i icin kaydet
+    metrics.flush()
 
+    print(f"\n[RUN]   Adim olcumleri: {run_ledger.LEDGER_PATH} (run_id={run_id})")
     print(f"\n[END] {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
     print("=" * 70)
+    return ok
+
+
+def _git(args, check=True):
+    return subprocess.run(['git'] + args, cwd=ODDSY_DATA_DIR, check=check)
+
+
+def _unpushed_commits():
+    """origin/main'de olmayan yerel commit sayisi (onceki calismanin push'u basarisizsa > 0)."""
+    result = subprocess.run(['git', 'rev-list', '--count', 'origin/main..HEAD'],
+                            cwd=ODDSY_DATA_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[WARN] Push edilmemis commit sayisi okunamadi: {result.stderr.strip()}")
+        return 0
+    return int(result.stdout.strip() or 0)
+
+
+def _abort_stale_rebase():
+    """Onceki calismadan yarim kalmis rebase varsa geri alir (yoksa git add/commit patlar)."""
+    git_dir = os.path.join(ODDSY_DATA_DIR, '.git')
+    if any(os.path.isdir(os.path.join(git_dir, name)) for name in ('rebase-merge', 'rebase-apply')):
+        print("[WARN] Yarim kalmis rebase bulundu, geri aliniyor")
+        _git(['rebase', '--abort'], check=False)
+
+
+def _pull_rebase_and_push():
+    # Commit'i uzaktaki degisikliklerin ustune tasi; conflict'te repo yarim rebase'de kalmasin
+    pull = _git(['pull', 'origin', 'main', '--rebase'], check=False)
+    if pull.returncode != 0:
+        _git(['rebase', '--abort'], check=False)
+        raise RuntimeError(f"git pull --rebase basarisiz (exit code: {pull.returncode}), rebase geri alindi")
+    _git(['push', 'origin', 'main'])
+
+
+def push_to_oddsy_data(stats):
+    """oddsy-data reposunda sadece degisen data/ dosyalarini commit + push eder.
+
+    Once saklama politikasi uygulanir (eski tarihli dosyalar aylik arsive).
+    Hicbir dosya degismediyse ve push bekleyen commit yoksa pull/push dahil
+    hicbir ag islemi yapilmaz. Rebase conflict'inde rebase geri alinir ve
+    adim basarisiz sayilir.
+    """
+    if not os.path.exists(ODDSY_DATA_DIR):
+        print(f"[ERROR] oddsy-data klasoru bulunamadi: {ODDSY_DATA_DIR}")
+        stats.status = 'fail'
+        return
+
+    try:
+        today_str = datetime.now().strftime('%d.%m.%Y')
+        _abort_stale_rebase()
+
+        rolled = apply_retention(os.path.join(ODDSY_DATA_DIR, 'data'))
+        if rolled:
+            print(f"[INFO] {len(rolled)} eski dosya aylik arsive tasindi")
+
+        # Kilit: baska bir yayinlayici dosyalari degistirirken yarim set stage edilmez
+        with publish_lock():
+            paths = changed_paths(ODDSY_DATA_DIR, 'data/')
+            if paths:
+                _git(['add', '-A', '--'] + paths)
+
+        if paths:
+            print(f"[INFO] {len(paths)} dosya degisti: {', '.join(paths)}")
+            _git(['commit', '-m', f'chore: update daily predictions {today_str}', '--'] + paths)
+        else:
+            unpushed = _unpushed_commits()
+            if not unpushed:
+                print("[INFO] Veri degismedi, git pull/push atlandi.")
+                return
+            print(f"[INFO] Veri degismedi ama {unpushed} commit push edilmemis, push ediliyor")
+
+        _pull_rebase_and_push()
+        print("[OK] oddsy-data git push basarili! Frontend otomatik guncellenecek.")
+    except Exception as e:
+        print(f"[ERROR] Git push hatasi: {e}")
+        stats.status = 'fail'
 
 
 if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+    parser = argparse.ArgumentParser(description="Futbol bot pipeline")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Sadece baslamamis maclarin oranlarini yenile ve filtrele")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="Yarinin (ve sonraki gunlerin) fikstur + oranlarini onceden cek")
+    parser.add_argument("--days", type=int, default=PREFETCH_DAYS,
+                        help="--prefetch ile kac gun ileriye cekilecegi")
+    parser.add_argument("--full", action="store_true",
+                        help="Gun on cekilmis olsa da fikstur kesfini tekrar yap")
+    args = parser.parse_args()
     try:
-        main()
+        ok = main(refresh=args.refresh, prefetch=args.prefetch, days=args.days, full=args.full)
     except KeyboardInterrupt:
         print("\n\n[WARN] Islem durduruldu (Ctrl+C)")
+        sys.exit(130)
     except Exception as e:
         print(f"\n[CRITICAL] Kritik hata: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+        sys.exit(1)
+    # Basarisiz adim ya da push varsa sifir olmayan cikis kodu
+    sys.exit(0 if ok else 1)
\ No newline at end of file
@@ -2,11 +2,17 @@
 # -*- coding: utf-8 -*-
 import json
 import os
+import sys
 from difflib import SequenceMatcher
 from datetime import datetime
 import glob
 import pytz
 
+# Repo kokundeki ortak moduller icin
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+import run_ledger
+
 class MatchMergerBot:
     def __init__(self, mackolik_folder="../mackolik-excel-json/json_output", 
                  sofascore_folder="../sofa", 
@@ -90,8 +96,11 @@ class MatchMergerBot:
             print(f"[ERROR] JSON okuma hatasi ({file_path}): {e}")
             return None
     
-    def find_sofascore_file_for_date(self, date_str):
-        """Tarih string'ini (DD.MM.YYYY) -> YYYY-MM-DD'ye cevir ve matching dosya bul"""
+    def find_sofascore_file_for_date(self, date_str, allow_fallback=True):
+        """Tarih string'ini (DD.MM.YYYY) -> YYYY-MM-DD'ye cevir ve matching dosya bul
+
+        allow_fallback=False ise (on cekim) o gunun dosyasi yoksa None.
+        """
         try:
             # DD.MM.YYYY -> YYYY-MM-DD
             parts = date_str.split('.')
@@ -116,12 +125,16 @@ class MatchMergerBot:
                     print(f"[OK] SofaScore dosyasi bulundu: {os.path.basename(f)}")
                     return f
         
+        if not allow_fallback:
+            print(f"[ERROR] {date_str} icin SofaScore dosyasi yok, birlestirme atlandi")
+            return None
+
         # Fallback: most recent file
         sofascore_files.sort(reverse=True)
         print(f"[WARN] Exact date match bulunamadi, en yeni dosya kullanilacak: {os.path.basename(sofascore_files[0])}")
         return sofascore_files[0]
     
-    def merge_matches(self, mackolik_file):
+    def merge_matches(self, mackolik_file, allow_fallback=True):
         try:
             if not os.path.exists(mackolik_file):
                 print(f"[ERROR] Mackolik dosyasi bulunamadi: {mackolik_file}")
@@ -134,7 +147,7 @@ class MatchMergerBot:
             date_str = mackolik_data.get('date', 'unknown')
             
             # SofaScore dosyasini bul
-            sofascore_file = self.find_sofascore_file_for_date(date_str)
+            sofascore_file = self.find_sofascore_file_for_date(date_str, allow_fallback)
             if not sofascore_file or not os.path.exists(sofascore_file):
                 print(f"[ERROR] SofaScore dosyasi bulunamadi: {sofascore_file}")
                 return False
@@ -194,6 +207,8 @@ class MatchMergerBot:
                             'ms_5_5_ust': mackolik_match.get('ust_5_5'),
                             'iy_kg_var': mackolik_match.get('iy_kg_var'),
                             'iy_kg_yok': mackolik_match.get('iy_kg_yok'),
+                            'mackolik_id': mackolik_match.get('mackolik_id'),
+                            'mackolik_slug': mackolik_match.get('slug'),
                         }
                         
                         merged_matches.append(merged_match)
@@ -209,6 +224,14 @@ class MatchMergerBot:
             print(f"\n[RESULT] Eslesme raporu:")
             print(f"[RESULT] Eslesilen: {len(merged_matches)}")
             print(f"[RESULT] Eslesmeyen: {len(unmatched_mackolik)}")
+            run_ledger.add_records(
+                records_in=len(mackolik_data.get('matches', [])),
+                records_out=len(merged_matches)
+            )
+            total = len(merged_matches) + len(unmatched_mackolik)
+            metrics.set_gauge('oddsy_merger_matched', len(merged_matches))
+            metrics.set_gauge('oddsy_merger_unmatched', len(unmatched_mackolik))
+            metrics.set_gauge('oddsy_merger_match_ratio', round(len(merged_matches) / total, 4) if total else 0)
             
             output_data = {
                 'date': date_str,
@@ -230,7 +253,9 @@ class MatchMergerBot:
             traceback.print_exc()
             return False
     
-    def merge_all_dates(self):
+    def merge_all_dates(self, only_dates=None):
+        """Bugun ve sonrasinin dosyalarini birlestirir; only_dates (dd.mm.yyyy)
+        verilirse sadece o gunler (on cekim bugunun merged dosyasina dokunmaz)."""
         try:
             tz = pytz.timezone('Europe/Istanbul')
             today = datetime.now(tz).date()
@@ -256,6 +281,8 @@ class MatchMergerBot:
                     continue
                 
                 date_str = mackolik_data.get('date', 'unknown')
+                if only_dates is not None and date_str not in only_dates:
+                    continue
                 
                 try:
                     file_date = datetime.strptime(date_str, '%d.%m.%Y').date()
@@ -269,7 +296,8 @@ class MatchMergerBot:
                     skipped_count += 1
                     continue
                 
-                if self.merge_matches(mackolik_file):
+                # On cekilen gun baska gunun SofaScore dosyasiyla birlestirilmez
+                if self.merge_matches(mackolik_file, allow_fallback=only_dates is None):
                     success_count += 1
                 
                 print("-" * 80)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+METRICS - Prometheus formatinda pipeline ve scraper sagligi
+
+Pipeline isleri server'dan ayri bir surecte calistigi icin metrikler once
+surec icinde toplanir, calisma sonunda flush() ile logs/metrics_state.json
+dosyasina eklenir (counter/histogram toplanir, gauge uzerine yazilir).
+server.py'deki /metrics endpoint'i bu dosyayi render() ile Prometheus text
+formatinda dondurur. Harici bagimlilik yoktur.
+
+Kullanim:
+    metrics.track_session(session, 'sofascore')   # istek sayisi, gecikme, 403
+    metrics.inc('oddsy_upstream_retries_total', source='sofascore')
+    metrics.note_exception('mackolik', e)         # timeout sayaci
+    metrics.observe('oddsy_step_duration_seconds', 12.3, step='merge')
+    metrics.set_gauge('oddsy_merger_match_ratio', 0.82)
+"""
+import os
+import json
+import asyncio
+import threading
+from contextlib import contextmanager
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_STATE_PATH = os.environ.get(
+    'METRICS_STATE_PATH', os.path.join(BASE_DIR, 'logs', 'metrics_state.json')
+)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STEP_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800)
+
+# isim -> (tip, aciklama, histogram bucket'lari)
+METRICS = {
+    'oddsy_step_duration_seconds': ('histogram', 'Pipeline step wall time.', STEP_BUCKETS),
+    'oddsy_upstream_request_seconds': ('histogram', 'Upstream HTTP request latency.', LATENCY_BUCKETS),
+    'oddsy_parse_seconds': ('histogram', 'Time spent parsing a fetched upstream page.', LATENCY_BUCKETS),
+    'oddsy_upstream_requests_total': ('counter', 'Upstream HTTP requests.', None),
+    'oddsy_upstream_forbidden_total': ('counter', 'Upstream HTTP 403 responses.', None),
+    'oddsy_upstream_retries_total': ('counter', 'Upstream request retries.', None),
+    'oddsy_upstream_timeouts_total': ('counter', 'Upstream request timeouts.', None),
+    'oddsy_http_cache_total': ('counter', 'HTTP cache lookups by result (hit, revalidated, miss).', None),
+    'oddsy_merger_matched': ('gauge', 'Matches merged in the last merge.', None),
+    'oddsy_merger_unmatched': ('gauge', 'Mackolik matches left unmatched in the last merge.', None),
+    'oddsy_merger_match_ratio': ('gauge', 'Matched / Mackolik matches in the last merge.', None),
+    'oddsy_output_records': ('gauge', 'Records written to an output file in the last run.', None),
+    'oddsy_published_bytes_total': ('counter', 'Bytes of output files published to oddsy-data.', None),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    buckets = METRICS[name][2]
+    with _lock:
+        key = _key(name, labels)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                hist['buckets'][i] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+# ---------------------------------------------------------------------------
+# SCRAPER HOOK'LARI
+# ---------------------------------------------------------------------------
+
+def track_session(session, source):
+    """Session'in her cevabini `source` etiketiyle sayar ve gecikmesini olcer."""
+    if getattr(session, '_metrics_source', None) is not None:
+        session._metrics_source = source
+        return session
+    session._metrics_source = source
+
+    def _observe_response(response, *args, **kwargs):
+        src = session._metrics_source
+        cache_status = getattr(response, 'cache_status', None)
+        if cache_status == 'hit':
+            # Ag istegi yok (bkz. http_cache.py)
+            inc('oddsy_http_cache_total', source=src, result='hit')
+            return response
+        if cache_status == 'revalidated':
+            inc('oddsy_http_cache_total', source=src, result='revalidated')
+        elif getattr(response, 'cache_miss', False):
+            inc('oddsy_http_cache_total', source=src, result='miss')
+        inc('oddsy_upstream_requests_total', source=src)
+        observe('oddsy_upstream_request_seconds', response.elapsed.total_seconds(), source=src)
+        if response.status_code == 403:
+            inc('oddsy_upstream_forbidden_total', source=src)
+        return response
+
+    session.hooks['response'].append(_observe_response)
+    return session
+
+
+def note_retry(source):
+    inc('oddsy_upstream_retries_total', source=source)
+
+
+def note_exception(source, exc):
+    """Istek hatalarini siniflandirir; su an sadece timeout'lar sayilir."""
+    if isinstance(exc, (requests.Timeout, asyncio.TimeoutError)):
+        inc('oddsy_upstream_timeouts_total', source=source)
+
+
+# ---------------------------------------------------------------------------
+# KALICI DURUM + RENDER
+# ---------------------------------------------------------------------------
+
+def _dump_key(key):
+    name, labels = key
+    return json.dumps([name, list(labels)], ensure_ascii=False)
+
+
+def _load_key(raw):
+    name, labels = json.loads(raw)
+    return name, tuple(tuple(pair) for pair in labels)
+
+
+def load_state(path=None):
+    path = path or METRICS_STATE_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}, {}
+    counters = {_load_key(k): v for k, v in raw.get('counters', {}).items()}
+    gauges = {_load_key(k): v for k, v in raw.get('gauges', {}).items()}
+    histograms = {_load_key(k): v for k, v in raw.get('histograms', {}).items()}
+    return counters, gauges, histograms
+
+
+@contextmanager
+def _state_lock(path):
+    """Durum dosyasi icin surecler arasi kilit (yan .lock dosyasi); fcntl yoksa no-op."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def flush(path=None):
+    """Surecte biriken metrikleri durum dosyasina ekler ve sifirlar.
+
+    Cron'daki main.py ile server'in isleri ayni anda flush edebilir; oku /
+    birlestir / yaz dosya kilidi altinda yapilir, artislar kaybolmaz.
+    """
+    path = path or METRICS_STATE_PATH
+    with _lock:
+        if not (_counters or _gauges or _histograms):
+            return
+        local_counters = dict(_counters)
+        local_gauges = dict(_gauges)
+        local_histograms = dict(_histograms)
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+    try:
+        with _state_lock(path):
+            counters, gauges, histograms = load_state(path)
+            for key, value in local_counters.items():
+                counters[key] = counters.get(key, 0) + value
+            gauges.update(local_gauges)
+            for key, hist in local_histograms.items():
+                stored = histograms.get(key)
+                if stored is None or len(stored['buckets']) != len(hist['buckets']):
+                    histograms[key] = hist
+                else:
+                    stored['buckets'] = [a + b for a, b in zip(stored['buckets'], hist['buckets'])]
+                    stored['sum'] += hist['sum']
+                    stored['count'] += hist['count']
+
+            state = {
+                'counters': {_dump_key(k): v for k, v in counters.items()},
+                'gauges': {_dump_key(k): v for k, v in gauges.items()},
+                'histograms': {_dump_key(k): v for k, v in histograms.items()},
+            }
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[WARN] Metrikler yazilamadi ({path}): {e}")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for k, v in pairs:
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{k}="{v}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def render(path=None):
+    """Durum dosyasini Prometheus text exposition formatinda dondurur."""
+    counters, gauges, histograms = load_state(path)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        store = {'counter': counters, 'gauge': gauges, 'histogram': histograms}[kind]
+        series = sorted(((k, v) for k, v in store.items() if k[0] == name), key=lambda kv: kv[0])
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (_, labels), value in series:
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            # observe() bucket'lari zaten kumulatif sayar (value <= bound olan her bucket)
+            for bound, count in zip(buckets, value['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
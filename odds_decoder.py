@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ODDS DECODER - SofaScore kesirli oranlarini ondaliga cevirir
+
+Bir gunde binlerce donusum yapilir ama farkli kesir sayisi azdir ('5/2',
+'11/10', ...). fractional_to_decimal sinirli bir memo tablosu (lru_cache)
+kullanir; ayni kesir ikinci kez Fraction kurmaz.
+
+  fractional_to_decimal('5/2')           -> 3.5
+  decode_choices(market['choices'])      -> [1.5, 3.4, 6.0]   (toplu)
+  decode_choices(choices, 'initialFractionalValue')
+
+Cozulemeyen deger icin None doner.
+"""
+import os
+from fractions import Fraction
+from functools import lru_cache
+
+MEMO_SIZE = int(os.environ.get('ODDS_MEMO_SIZE', '4096'))
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def fractional_to_decimal(fractional_str):
+    try:
+        if not fractional_str or fractional_str == 'N/A':
+            return None
+        return round(float(Fraction(fractional_str)) + 1.0, 2)
+    except (ValueError, ZeroDivisionError, TypeError):
+        return None
+
+
+def decode_choices(choices, field='fractionalValue', default=None):
+    """Bir marketin butun secimlerini tek cagrida cevirir (sira korunur).
+
+    Alan hic yoksa `default` kesri cevrilir.
+    """
+    return [fractional_to_decimal(choice.get(field, default)) for choice in choices]
+
+
+def decode_market(market, field='fractionalValue'):
+    """{secim adi: ondalik oran}"""
+    choices = market.get('choices', [])
+    return {choice.get('name'): value
+            for choice, value in zip(choices, decode_choices(choices, field))}
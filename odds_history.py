@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ORAN GECMISI - Scraper calismalarinin oranlarini biriktiren kolon bazli depo
+
+sofascore_matches_<tarih>.json ve Mackolik json_output/<tarih>.json her
+calismada uzerine yazilir; oran hareketi kaybolur. SofascoreScraper ve
+guncel_bulten her calismanin oranlarini ayrica buraya ekler. Her gun
+(gozlemin Istanbul tarihi) icin sadece sonuna eklenen kolon dosyalari
+tutulur (cache/odds_history/<YYYY-MM-DD>/):
+
+    ts.u32       gozlem zamani (unix saniye)
+    event.u32    mac anahtari (SofaScore event_id / Mackolik iddaa Kod'u)
+    outcome.u8   kaynak + market/sonuc kodu (OUTCOMES tablosu)
+    odds.u16     oran * 100 (sabit nokta; 655.35 ustu kirpilir)
+
+Kayit basina 11 byte. Bir (mac, sonuc) orani gunun son gozlemiyle ayniysa
+yazilmaz; her gun kendi ilk gozlemiyle baslar, boylece bir gunun dosyalari
+tek basina okunabilir. Okuma numpy.memmap ile kopyasizdir. Oldurulen bir
+yazimdan kalan eksik kolonlar bir sonraki yazimda en kisa kolona kirpilir.
+
+ODDS_HISTORY=0 ile kapatilir.
+
+    odds_history.record('sofascore', {event_id: {'home_win': 1.85, ...}})
+    gun = odds_history.load('2026-10-18')        # {'ts': memmap, ...}
+    odds_history.history('mackolik', 123, ['2026-10-18'])
+
+    python odds_history.py [gun] [--event kaynak:anahtar]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DIR = os.environ.get('ODDS_HISTORY_DIR', os.path.join(BASE_DIR, 'cache', 'odds_history'))
+HISTORY_ENABLED = os.environ.get('ODDS_HISTORY', '1') != '0'
+
+TZ = pytz.timezone('Europe/Istanbul')
+
+# (kolon, dtype) - dosya adi <kolon>.<tur><bit>, orn. ts.u32
+COLUMNS = [
+    ('ts', np.uint32),
+    ('event', np.uint32),
+    ('outcome', np.uint8),
+    ('odds', np.uint16),
+]
+
+ODDS_SCALE = 100
+ODDS_MAX = np.iinfo(np.uint16).max
+EVENT_MAX = np.iinfo(np.uint32).max
+
+# Kod = sira + 1 (0 kullanilmaz). Kodlar dosyalara yazildigi icin kalicidir:
+# yeni alan sadece sona eklenir, mevcutlarin sirasi degistirilmez.
+OUTCOMES = [
+    ('sofascore', 'home_win'), ('sofascore', 'draw'), ('sofascore', 'away_win'),
+    ('sofascore', 'over_0_5'), ('sofascore', 'under_0_5'),
+    ('sofascore', 'over_1_5'), ('sofascore', 'under_1_5'),
+    ('sofascore', 'over_2_5'), ('sofascore', 'under_2_5'),
+    ('sofascore', 'over_3_5'), ('sofascore', 'under_3_5'),
+    ('sofascore', 'btts_yes'), ('sofascore', 'btts_no'),
+    ('mackolik', 'MS 1'), ('mackolik', 'MS X'), ('mackolik', 'MS 2'),
+    ('mackolik', 'IY 1'), ('mackolik', 'IY X'), ('mackolik', 'IY 2'),
+    ('mackolik', 'KG Var'), ('mackolik', 'KG Yok'),
+    ('mackolik', 'CS 1/X'), ('mackolik', 'CS 1/2'), ('mackolik', 'CS X/2'),
+    ('mackolik', 'IY 1,5 Alt'), ('mackolik', 'IY 1,5 Ust'),
+    ('mackolik', 'AU 1,5 Alt'), ('mackolik', 'AU 1,5 Ust'),
+    ('mackolik', 'AU 2,5 Alt'), ('mackolik', 'AU 2,5 Ust'),
+    ('mackolik', 'AU 3,5 Alt'), ('mackolik', 'AU 3,5 Ust'),
+    ('mackolik', 'AU 4,5 Alt'), ('mackolik', 'AU 4,5 Ust'),
+    ('mackolik', 'AU 5,5 Alt'), ('mackolik', 'AU 5,5 Ust'),
+    ('mackolik', 'TG 0-1'), ('mackolik', 'TG 2-3'), ('mackolik', 'TG 4-6'), ('mackolik', 'TG 7+'),
+    ('mackolik', 'IY KG Var'), ('mackolik', 'IY KG Yok'),
+]
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES, 1)}
+
+_lock = threading.Lock()
+
+
+def _column_path(day_dir, name, dtype):
+    dtype = np.dtype(dtype)
+    return os.path.join(day_dir, f"{name}.{dtype.kind}{dtype.itemsize * 8}")
+
+
+def day_of(ts):
+    return datetime.fromtimestamp(ts, TZ).strftime('%Y-%m-%d')
+
+
+def _fixed(value):
+    """Oran -> oran * 100 (int); gecersiz/sifir oran None."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not value > 0:
+        return None
+    return min(ODDS_MAX, int(round(value * ODDS_SCALE)))
+
+
+def _event_key(key):
+    try:
+        key = int(key)
+    except (TypeError, ValueError):
+        return None
+    return key if 0 < key <= EVENT_MAX else None
+
+
+def _lengths(day_dir):
+    lengths = []
+    for name, dtype in COLUMNS:
+        path = _column_path(day_dir, name, dtype)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        lengths.append(size // np.dtype(dtype).itemsize)
+    return lengths
+
+
+def load(day, directory=HISTORY_DIR):
+    """{kolon: dizi} - bir gunun kayitlari (memmap, salt okunur).
+
+    Kolonlar en kisa kolonun boyuna kirpilir (yarim kalmis yazim).
+    """
+    day_dir = os.path.join(directory, day)
+    count = min(_lengths(day_dir))
+    data = {}
+    for name, dtype in COLUMNS:
+        if count == 0:
+            data[name] = np.empty(0, dtype=dtype)
+        else:
+            data[name] = np.memmap(_column_path(day_dir, name, dtype), dtype=dtype,
+                                   mode='r', shape=(count,))
+    return data
+
+
+def _keys(events, outcomes):
+    return (np.asarray(events, dtype=np.uint64) << np.uint64(8)) | np.asarray(outcomes, dtype=np.uint64)
+
+
+def _last_values(data):
+    """{(event << 8) | outcome: son oran} - gunun mevcut kayitlarindan."""
+    if not len(data['event']):
+        return {}
+    keys = _keys(data['event'], data['outcome'])
+    # Ters dizide ilk gorulen = son kayit
+    unique, first = np.unique(keys[::-1], return_index=True)
+    last = len(keys) - 1 - first
+    return dict(zip(unique.tolist(), np.asarray(data['odds'])[last].tolist()))
+
+
+def _repair(day_dir):
+    """Yarim kalan yazimdan sonra butun kolonlari en kisa kolona kirpar."""
+    lengths = _lengths(day_dir)
+    count = min(lengths)
+    for (name, dtype), length in zip(COLUMNS, lengths):
+        if length != count:
+            with open(_column_path(day_dir, name, dtype), 'r+b') as f:
+                f.truncate(count * np.dtype(dtype).itemsize)
+
+
+def _rows(source, observations):
+    events, outcomes, odds = [], [], []
+    for key, fields in observations.items():
+        event = _event_key(key)
+        if event is None or not fields:
+            continue
+        for field, value in fields.items():
+            code = OUTCOME_CODES.get((source, field))
+            fixed = _fixed(value) if code is not None else None
+            if fixed is None:
+                continue
+            events.append(event)
+            outcomes.append(code)
+            odds.append(fixed)
+    return events, outcomes, odds
+
+
+def record(source, observations, now=None, directory=HISTORY_DIR):
+    """observations: {mac anahtari: {alan: oran}} -> yazilan kayit sayisi.
+
+    OUTCOMES'ta olmayan alanlar ve bos/sifir oranlar atlanir. Hata
+    calismayi durdurmaz, uyari basilir.
+    """
+    if not HISTORY_ENABLED:
+        return 0
+    now = int(now or time.time())
+    events, outcomes, odds = _rows(source, observations)
+    if not events:
+        return 0
+
+    day = day_of(now)
+    day_dir = os.path.join(directory, day)
+    try:
+        os.makedirs(day_dir, exist_ok=True)
+        with _lock, open(os.path.join(day_dir, '.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _repair(day_dir)
+            last = _last_values(load(day, directory))
+
+            keys = _keys(events, outcomes).tolist()
+            changed = [i for i, key in enumerate(keys) if last.get(key) != odds[i]]
+            if not changed:
+                return 0
+            columns = {
+                'ts': np.full(len(changed), now, dtype=np.uint32),
+                'event': np.asarray(events, dtype=np.uint32)[changed],
+                'outcome': np.asarray(outcomes, dtype=np.uint8)[changed],
+                'odds': np.asarray(odds, dtype=np.uint16)[changed],
+            }
+            for name, dtype in COLUMNS:
+                with open(_column_path(day_dir, name, dtype), 'ab') as f:
+                    columns[name].tofile(f)
+            return len(changed)
+    except OSError as e:
+        print(f"[WARN] Oran gecmisi yazilamadi ({day_dir}): {e}")
+        return 0
+
+
+def history(source, event, days, directory=HISTORY_DIR):
+    """[(ts, alan, oran)] - bir macin verilen gunlerdeki oran hareketleri."""
+    codes = [code for (src, _), code in OUTCOME_CODES.items() if src == source]
+    rows = []
+    for day in days:
+        data = load(day, directory)
+        mask = (data['event'] == event) & np.isin(data['outcome'], codes)
+        for ts, code, odds in zip(data['ts'][mask].tolist(), data['outcome'][mask].tolist(),
+                                  data['odds'][mask].tolist()):
+            rows.append((ts, OUTCOMES[code - 1][1], odds / ODDS_SCALE))
+    return rows
+
+
+def _summary(day, directory):
+    started = time.perf_counter()
+    data = load(day, directory)
+    loaded_ms = (time.perf_counter() - started) * 1000
+    count = len(data['ts'])
+    nbytes = count * sum(np.dtype(dtype).itemsize for _, dtype in COLUMNS)
+    events = len(np.unique(data['event'])) if count else 0
+    print(f"{day}: {count} kayit, {events} mac, {nbytes / 1024:.1f} KB, "
+          f"yukleme {loaded_ms:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Oran gecmisi deposu ozeti")
+    parser.add_argument('days', nargs='*', help="YYYY-MM-DD (varsayilan: butun gunler)")
+    parser.add_argument('--event', help="kaynak:anahtar (orn. sofascore:12345) hareketleri")
+    parser.add_argument('--dir', default=HISTORY_DIR)
+    args = parser.parse_args(argv)
+
+    days = args.days
+    if not days and os.path.isdir(args.dir):
+        days = sorted(d for d in os.listdir(args.dir) if os.path.isdir(os.path.join(args.dir, d)))
+    if not days:
+        print(f"[INFO] Kayit yok: {args.dir}")
+        return
+    for day in days:
+        _summary(day, args.dir)
+    if args.event:
+        source, _, key = args.event.partition(':')
+        for ts, field, odds in history(source, int(key), days, args.dir):
+            print(f"  {datetime.fromtimestamp(ts, TZ):%Y-%m-%d %H:%M}  {field:<12} {odds:.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ORAN YENILEME - Gun ici hafif mod
+
+Tam pipeline fikstur listelerini, butun ligleri ve butun ciktilari bastan
+ceker. Mac oncesi sadece guncel oran lazimsa bu modul bugunun merged
+dosyasindaki, henuz baslamamis maclarin oranlarini yeniler:
+
+  - SofaScore: gunun toplu oran listesi, listede olmayan maclar icin
+               event_id ile oran marketleri (beraberlik orani)
+  - Mackolik : mackolik_id + slug ile sadece iddaa sayfasi (KG, Alt/Ust)
+
+Fikstur listesi, lig filtresi ve eslestirme tekrar yapilmaz. Ardindan
+filtre adimi yeniden calisir (bkz. pipeline.build_refresh_steps).
+
+Toplu listedeki marketlerin parmak izi son cekimden beri degismemis
+maclarin (bkz. odds_state.py) SofaScore orani yeniden cekilmez; on
+cekilmis bir gunun sabahinda sadece orani oynayan maclar icin SofaScore'a
+istek atilir. Mackolik oranlari SofaScore'dan bagimsiz oynadigi icin
+iddaa sayfasi her zaman cekilir.
+"""
+import os
+import sys
+import json
+import time
+from datetime import datetime
+
+import pytz
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE_DIR, 'sofa'))
+
+import odds_state
+import run_ledger
+
+TZ = pytz.timezone('Europe/Istanbul')
+
+# Mackolik sutun adi -> merged alan adi
+MACKOLIK_FIELDS = {
+    'KG Var': 'kg_var',
+    'AU 2,5 Ust': '2_5_ust',
+    'AU 3,5 Ust': '3_5_ust',
+    'AU 5,5 Ust': 'ms_5_5_ust',
+    'IY KG Var': 'iy_kg_var',
+    'IY KG Yok': 'iy_kg_yok',
+}
+
+
+def is_not_started(match, now):
+    """date_time (GMT+3, SofaScore baslama saati) gecmediyse True."""
+    date_time = match.get('date_time')
+    if not date_time or date_time == 'N/A':
+        return False
+    try:
+        start = TZ.localize(datetime.strptime(date_time, '%Y-%m-%d %H:%M:%S'))
+    except ValueError:
+        return False
+    return start > now
+
+
+def refresh_merged_odds(merged_file, now=None):
+    """merged dosyasindaki baslamamis maclarin oranlarini yerinde gunceller.
+
+    Donus: guncellenen mac sayisi (dosya yoksa None).
+    """
+    from bet365data import SofascoreScraper
+    import guncel_bulten
+
+    if not os.path.exists(merged_file):
+        print(f"[SKIP] Merged dosyasi yok, once tam pipeline calismali: {merged_file}")
+        return None
+
+    with open(merged_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    now = now or datetime.now(TZ)
+    matches = data.get('matches', [])
+    upcoming = [m for m in matches if is_not_started(m, now)]
+    print(f"[INFO] {len(matches)} mac, {len(upcoming)} tanesi henuz baslamadi")
+    run_ledger.add_records(records_in=len(upcoming))
+
+    sofa = SofascoreScraper()
+    run_ledger.track_session(guncel_bulten.scraper)
+    # Gunun oranlari tek istekte; listede olmayan maclar icin mac bazli istek
+    iso_date = now.strftime('%Y-%m-%d')
+    bulk_odds = sofa.get_bulk_odds(iso_date) if upcoming else {}
+    state = odds_state.load_state(iso_date)
+    fetched_at = time.time()
+
+    updated = 0
+    unchanged = 0
+    for match in upcoming:
+        changed = False
+
+        event_id = match.get('event_id')
+        fingerprint = odds_state.odds_fingerprint(bulk_odds.get(event_id)) if event_id else None
+        # Parmak izi sadece SofaScore cekimini atlatir; Mackolik asagida yine cekilir
+        if odds_state.is_unchanged(state.get(str(event_id)), fingerprint, fetched_at):
+            unchanged += 1
+        elif event_id:
+            odds = sofa.parse_all_odds(bulk_odds.get(event_id))
+            if not odds['draw']:
+                odds = sofa.parse_all_odds(sofa.get_all_odds_markets(event_id))
+            if odds['draw']:
+                # Cekim basarisizsa durum yazilmaz; sonraki yenilemede tekrar denenir
+                if fingerprint is not None:
+                    state[str(event_id)] = {'fp': fingerprint, 'at': fetched_at}
+                if odds['draw'] != match.get('beraberlik_orani'):
+                    match['beraberlik_orani'] = odds['draw']
+                    changed = True
+
+        mackolik_id, slug = match.get('mackolik_id'), match.get('mackolik_slug')
+        if mackolik_id and slug:
+            oranlar = guncel_bulten.bahis_oranlarini_cek(mackolik_id, slug)
+            for column, field in MACKOLIK_FIELDS.items():
+                value = guncel_bulten.safe_val(oranlar.get(column))
+                if value and value != match.get(field):
+                    match[field] = value
+                    changed = True
+
+        if changed:
+            updated += 1
+            print(f"[UPDATE] {match.get('home_team')} vs {match.get('away_team')}")
+
+    if updated:
+        data['timestamp'] = now.isoformat()
+        tmp_file = merged_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, merged_file)
+
+    if upcoming:
+        odds_state.save_state(iso_date, state)
+
+    run_ledger.add_records(records_out=updated)
+    print(f"[RESULT] {updated}/{len(upcoming)} macin oranlari guncellendi, "
+          f"{unchanged} macin SofaScore orani degismedigi icin cekilmedi")
+    return updated
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ORAN DURUMU - Gun bazinda mac oranlarinin parmak izleri
+
+SofaScore'un gunluk toplu oran listesindeki her mac icin marketlerin
+parmak izi ve oranlarin en son ne zaman cekildigi saklanir
+(cache/odds_state/<YYYY-MM-DD>.json):
+
+    {"12345": {"fp": "9f2c...", "at": 1760781234.5}}
+
+On cekim (main.py --prefetch) ve tam pipeline toplu oranlari cektiginde
+parmak izlerini yazar; oran yenileme (odds_refresh.py) sadece parmak izi
+degisen ya da ODDS_REFRESH_MAX_AGE saniyeden eski maclari yeniden ceker.
+
+load_state/save_state'e directory verilerek ayni dosya duzeni baska
+durumlar icin de kullanilir (guncel_bulten: iddaa Kod'u basina son oranlar).
+"""
+import os
+import json
+import time
+import hashlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.environ.get('ODDS_STATE_DIR', os.path.join(BASE_DIR, 'cache', 'odds_state'))
+
+# Parmak izi degismese de bu kadar saniyeden eski oranlar yeniden cekilir
+MAX_AGE = int(os.environ.get('ODDS_REFRESH_MAX_AGE', '43200'))
+
+
+def odds_fingerprint(odds_data):
+    """Toplu listedeki bir macin marketlerinin ozeti (oran yoksa None)."""
+    if not odds_data or not odds_data.get('markets'):
+        return None
+    raw = json.dumps(odds_data['markets'], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _path(date, directory=None):
+    return os.path.join(directory or STATE_DIR, f"{date}.json")
+
+
+def load_state(date, directory=None):
+    try:
+        with open(_path(date, directory), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(date, state, directory=None):
+    path = _path(date, directory)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[WARN] Oran durumu yazilamadi ({path}): {e}")
+
+
+def is_unchanged(entry, fingerprint, now=None):
+    """Kayitli parmak izi ayni ve oranlar MAX_AGE'den yeni ise True."""
+    if not entry or fingerprint is None or entry.get('fp') != fingerprint:
+        return False
+    return (now or time.time()) - entry.get('at', 0) < MAX_AGE
+
+
+def record_bulk(date, bulk, now=None):
+    """Toplu oran listesinin parmak izlerini gunun durumuna yazar."""
+    now = now or time.time()
+    state = load_state(date)
+    for event_id, odds_data in bulk.items():
+        fingerprint = odds_fingerprint(odds_data)
+        if fingerprint is not None:
+            state[str(event_id)] = {'fp': fingerprint, 'at': now}
+    save_state(date, state)
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PIPELINE ADIMLARI + BAGIMLILIK TABANLI CALISTIRICI
+
+Her adim import edilebilir bir fonksiyondur ve hangi dosyalari okudugunu
+(inputs) ve hangi dosyalari urettigini (outputs) acikca bildirir.
+Calistirici bu bilgiden bagimlilik grafini cikarir:
+
+  - Birbirinin ciktisini okumayan adimlar (oran dusen, SofaScore, Mackolik,
+    kart/korner) ayni anda calisir.
+  - Birlestirme ve filtreleme, girdileri hazir olur olmaz baslar.
+
+Adimlar ayni Python surecinde calisir; pandas, cloudscraper, bs4 her adimda
+yeniden import edilmez. Sadece istatistik pipeline'i (Selenium + kendi
+cwd'sine bagli scriptler) ayri surecte calismaya devam eder.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import subprocess
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from functools import partial
+
+import pytz
+
+import metrics
+import run_ledger
+from artifact_cache import StageCache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOFA_DIR = os.path.join(BASE_DIR, 'sofa')
+MERGED_DIR = os.path.join(BASE_DIR, 'merged')
+MACKOLIK_JSON_DIR = os.path.join(BASE_DIR, 'mackolik-excel-json', 'json_output')
+ISTATISTIK_DIR = os.path.join(BASE_DIR, 'istatistik')
+
+# oddsy-data: CI'da ./oddsy-data, lokalde ../oddsy-data
+_ci_path = os.path.join(BASE_DIR, 'oddsy-data')
+_local_path = os.path.abspath(os.path.join(BASE_DIR, '..', 'oddsy-data'))
+ODDSY_DATA_DIR = _ci_path if os.path.exists(_ci_path) else _local_path
+DATA_OUTPUT_DIR = os.path.join(ODDSY_DATA_DIR, 'data')
+
+# Ayni anda calisacak en fazla adim sayisi (4 ag adimi paralel)
+MAX_WORKERS = int(os.environ.get('PIPELINE_WORKERS', '4'))
+
+# On cekim (main.py --prefetch): yarindan itibaren kac gun
+PREFETCH_DAYS = int(os.environ.get('PREFETCH_DAYS', '1'))
+# On cekilmis gunler: {dd.mm.yyyy: ISO zaman}
+PREFETCH_STATE_PATH = os.path.join(BASE_DIR, 'cache', 'prefetch.json')
+
+# Adim olaylarini stdout'ta digerlerinden ayiran onek (bkz. emit_step_event)
+STEP_EVENT_PREFIX = '##STEP '
+
+# sofa/ ve merged/ paket degil; modullerini import edebilmek icin yola ekle
+for _path in (BASE_DIR, SOFA_DIR, MERGED_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+
+def print_header(text):
+    print(f"\n{'='*70}")
+    print(f"  {text}")
+    print(f"{'='*70}")
+
+
+class Step:
+    """Pipeline adimi: isim, calistirilacak fonksiyon, girdi ve cikti dosyalari.
+
+    `after` sadece siralama icin kullanilir (ornegin clean -> filter);
+    dosya bagimliligi olmayan ama once bitmesi gereken adimlari belirtir.
+
+    `cache_name` verilirse adim artifact cache'e dahil olur: girdiler ve
+    `code` dosyalari degismediyse adim atlanir (bkz. artifact_cache.py).
+
+    `metric` adim suresi metriginin step etiketidir. Isimdeki "N/M:" ve on
+    cekim tarihi calismadan calismaya degisir; etiket sabit kalmazsa her
+    gece /metrics'e yeni seri eklenir. Tarih ledger'da isimle birlikte durur.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), after=(),
+                 code=(), cache_name=None, manifest_path=None, metric=None):
+        self.name = name
+        self.metric = metric or name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+        self.code = list(code)
+        self.cache_name = cache_name
+        self.manifest_path = manifest_path
+
+    def stage_cache(self):
+        if not self.cache_name:
+            return None
+        return StageCache(self.cache_name, self.inputs, self.code, self.outputs,
+                          manifest_path=self.manifest_path)
+
+    def __repr__(self):
+        return f"Step({self.name!r})"
+
+
+def run_script(script_name, work_dir):
+    """Bir scripti ayri bir Python surecinde calistirir."""
+    script_path = os.path.join(work_dir, script_name)
+
+    if not os.path.exists(script_path):
+        print(f"[ERROR] Script bulunamadi: {script_path}")
+        return False
+
+    try:
+        env = os.environ.copy()
+        env['PYTHONIOENCODING'] = 'utf-8'
+        subprocess.run(
+            [sys.executable, script_path],
+            cwd=work_dir,
+            check=True,
+            env=env
+        )
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"[ERROR] {script_name} basarisiz (exit code: {e.returncode})")
+        return False
+    except Exception as e:
+        print(f"[ERROR] {script_name} hatasi: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# ADIM FONKSIYONLARI
+# ---------------------------------------------------------------------------
+
+def step_dropping_odds():
+    from dropping_odds_bot import DroppingOddsBot
+    DroppingOddsBot().run()
+
+
+def sofa_output_ok(iso_date):
+    """sofascore_matches_<tarih>.json var ve en az bir mac iceriyorsa True."""
+    path = os.path.join(SOFA_DIR, f'sofascore_matches_{iso_date}.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return bool(json.load(f))
+    except (OSError, ValueError):
+        return False
+
+
+def step_sofascore(date=None):
+    from bet365data import SofascoreScraper
+    scraper = SofascoreScraper()
+    date = date or scraper.get_current_date_gmt3()
+    scraper.run(output_dir=SOFA_DIR, date=date)
+    # Dosya yoksa merger en yeni (baska gunun) dosyasina duserdi
+    if not sofa_output_ok(date):
+        print(f"[ERROR] SofaScore {date} icin mac yazilmadi (sofascore_matches_{date}.json yok/bos)")
+        return False
+
+
+def step_mackolik(date=None, full=False):
+    import guncel_bulten
+    guncel_bulten.main(date, full=full)
+
+
+def step_merge(dates=None):
+    from match_merger_bot import MatchMergerBot
+    merger = MatchMergerBot(
+        mackolik_folder=MACKOLIK_JSON_DIR,
+        sofascore_folder=SOFA_DIR,
+        output_folder=os.path.join(MERGED_DIR, 'merged_json')
+    )
+    merger.merge_all_dates(dates)
+
+
+def step_clean():
+    from clean import clean_old_data
+    clean_old_data()
+
+
+def step_filter(merged_file=None):
+    from filter_bot import filter_matches
+    filter_matches(merged_file)
+
+
+def step_istatistik():
+    return run_script('main.py', ISTATISTIK_DIR)
+
+
+def step_refresh_odds(merged_file):
+    from odds_refresh import refresh_merged_odds
+    return refresh_merged_odds(merged_file) is not None
+
+
+def _paths(now):
+    """Bugunun tarihine gore adimlarin okuyup yazdigi dosyalar."""
+    iso_date = now.strftime('%Y-%m-%d')
+    tr_date = now.strftime('%d.%m.%Y')
+    compact_date = now.strftime('%d%m%Y')
+    return {
+        'dropping_json': os.path.join(BASE_DIR, 'filtered', 'oran_dusen_maclar.json'),
+        'sofa_json': os.path.join(SOFA_DIR, f'sofascore_matches_{iso_date}.json'),
+        'mackolik_json': os.path.join(MACKOLIK_JSON_DIR, f'{compact_date}.json'),
+        'merged_json': os.path.join(MERGED_DIR, 'merged_json', f'merged_{tr_date}.json'),
+        'filter_outputs': [
+            os.path.join(DATA_OUTPUT_DIR, name)
+            for name in ('halfTimeGoals.json', 'dailyChoices.json',
+                         'dailySurprises.json', 'droppingOdds.json')
+        ],
+    }
+
+
+def merge_inputs(now, paths=None):
+    """merge_all_dates'in okudugu dosyalar (birlestirme cache anahtari icin).
+
+    Birlestirme sadece bugunu degil, bugun ve sonrasi tarihli butun
+    Mackolik JSON'larini isler (on cekilmis gunler dahil); SofaScore
+    dosyasi tarih eslesmezse en yeni dosyaya duser. Anahtar sadece
+    bugunun dosyalarindan olussaydi degisen bir ileri gun dosyasi cache
+    hit verir, o gunun merged ciktisi yeniden uretilmezdi.
+    """
+    paths = paths or _paths(now)
+    today = now.date()
+    inputs = {paths['sofa_json'], paths['mackolik_json']}
+    for path in glob.glob(os.path.join(MACKOLIK_JSON_DIR, '*.json')):
+        try:
+            day = datetime.strptime(os.path.basename(path)[:-len('.json')], '%d%m%Y').date()
+        except ValueError:
+            continue
+        if day >= today:
+            inputs.add(path)
+    inputs.update(glob.glob(os.path.join(SOFA_DIR, 'sofascore_matches_*.json')))
+    return sorted(inputs)
+
+
+def _filter_step(paths, name="6/7: FILTRELE + JSON KAYDET", after=()):
+    # Filtre cache anahtarindaki merged dosyasini okur (tarih tek yerde hesaplanir)
+    return Step(name, partial(step_filter, paths['merged_json']), metric='filter',
+                inputs=[paths['merged_json'], paths['dropping_json']],
+                outputs=paths['filter_outputs'],
+                after=after,
+                code=[os.path.join(BASE_DIR, 'filter_bot.py')],
+                cache_name='filter',
+                # Manifest oddsy-data'ya push edilmesin diye yerel filtered/ altinda
+                manifest_path=os.path.join(BASE_DIR, 'filtered', '.filter.manifest'))
+
+
+def load_prefetched():
+    try:
+        with open(PREFETCH_STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def mark_prefetched(days, now=None):
+    """Merged ve SofaScore dosyasi olusan on cekilmis gunleri kaydeder;
+    gecmis gunler silinir. SofaScore dosyasi yoksa merged dosyasi baska
+    gunun SofaScore verisiyle birlestirilmis olabilir, gun isaretlenmez."""
+    now = now or datetime.now(pytz.timezone('Europe/Istanbul'))
+    today = now.strftime('%Y-%m-%d')
+    state = {tr_date: at for tr_date, at in load_prefetched().items()
+             if datetime.strptime(tr_date, '%d.%m.%Y').strftime('%Y-%m-%d') >= today}
+    for day in days:
+        paths = _paths(day)
+        if os.path.exists(paths['merged_json']) and sofa_output_ok(day.strftime('%Y-%m-%d')):
+            state[day.strftime('%d.%m.%Y')] = now.isoformat(timespec='seconds')
+        else:
+            print(f"[WARN] {day:%d.%m.%Y} on cekilmis sayilmadi (SofaScore/merged dosyasi eksik)")
+    os.makedirs(os.path.dirname(PREFETCH_STATE_PATH), exist_ok=True)
+    tmp_path = PREFETCH_STATE_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, PREFETCH_STATE_PATH)
+    return state
+
+
+def prefetch_days(now=None, days=PREFETCH_DAYS):
+    now = now or datetime.now(pytz.timezone('Europe/Istanbul'))
+    return [now + timedelta(days=offset) for offset in range(1, days + 1)]
+
+
+def build_prefetch_steps(now=None, days=PREFETCH_DAYS):
+    """Yarin (ve PREFETCH_DAYS gun sonrasi) icin fikstur + oran on cekimi.
+
+    Gunler SofaScore ve Mackolik icin ayri ayri sirayla cekilir (host basina
+    istek butcesi paylasilir), iki kaynak birbirine paralel calisir. Sonunda
+    birlestirme butun ileri tarihleri merged_<tarih>.json olarak yazar;
+    o gunun sabahi build_steps fikstur kesfini atlar.
+    """
+    day_list = prefetch_days(now, days)
+    total = 2 * len(day_list) + 1
+    steps = []
+    merge_inputs, merge_outputs = [], []
+    previous = {'sofa': [], 'mackolik': []}
+    for index, day in enumerate(day_list):
+        paths = _paths(day)
+        iso_date = day.strftime('%Y-%m-%d')
+        sofa_name = f"{2 * index + 1}/{total}: SOFASCORE {iso_date}"
+        mackolik_name = f"{2 * index + 2}/{total}: MACKOLIK {iso_date}"
+        steps.append(Step(sofa_name, partial(step_sofascore, iso_date), metric='sofascore',
+                          outputs=[paths['sofa_json']], after=previous['sofa']))
+        steps.append(Step(mackolik_name, partial(step_mackolik, iso_date), metric='mackolik',
+                          outputs=[paths['mackolik_json']], after=previous['mackolik']))
+        previous = {'sofa': [sofa_name], 'mackolik': [mackolik_name]}
+        merge_inputs += [paths['sofa_json'], paths['mackolik_json']]
+        merge_outputs.append(paths['merged_json'])
+
+    tr_dates = [day.strftime('%d.%m.%Y') for day in day_list]
+    steps.append(Step(f"{total}/{total}: VERILERI BIRLESTIR", partial(step_merge, tr_dates),
+                      metric='merge', inputs=merge_inputs, outputs=merge_outputs))
+    return steps
+
+
+def build_steps(now=None, full=False):
+    """Bugunun tarihine gore pipeline adimlarini ve dosya bagimliliklarini kurar.
+
+    Gun on cekilmisse (bkz. build_prefetch_steps) ve full istenmediyse
+    fikstur kesfi atlanir: merged dosyasindaki maclarin sadece degisen
+    oranlari yenilenir (build_incremental_steps). full ayrica Mackolik
+    bulteninin kayitli oranlarini da kullanmaz (bkz. guncel_bulten).
+    """
+    now = now or datetime.now(pytz.timezone('Europe/Istanbul'))
+    paths = _paths(now)
+    if not full and now.strftime('%d.%m.%Y') in load_prefetched() \
+            and os.path.exists(paths['merged_json']):
+        return build_incremental_steps(paths)
+
+    dropping_json = paths['dropping_json']
+    sofa_json = paths['sofa_json']
+    mackolik_json = paths['mackolik_json']
+    merged_json = paths['merged_json']
+
+    return [
+        Step("1/7: ORAN DUSEN MACLAR", step_dropping_odds, metric='dropping_odds',
+             outputs=[dropping_json]),
+        Step("2/7: SOFASCORE VERILERI", step_sofascore, metric='sofascore',
+             outputs=[sofa_json]),
+        Step("3/7: MACKOLIK VERILERI", partial(step_mackolik, full=full), metric='mackolik',
+             outputs=[mackolik_json]),
+        Step("4/7: VERILERI BIRLESTIR", step_merge, metric='merge',
+             inputs=merge_inputs(now, paths), outputs=[merged_json],
+             code=[os.path.join(MERGED_DIR, 'match_merger_bot.py')],
+             cache_name='merge'),
+        Step("5/7: ESKI VERILERI TEMİZLE", step_clean, metric='clean'),
+        _filter_step(paths, after=["5/7: ESKI VERILERI TEMİZLE"]),
+        Step("7/7: KART & KORNER VERILERI", step_istatistik, metric='istatistik'),
+    ]
+
+
+def build_incremental_steps(paths):
+    """On cekilmis gunun sabah calismasi: fikstur listesi ve eslestirme yok."""
+    merged_json = paths['merged_json']
+    return [
+        Step("1/5: ORAN DUSEN MACLAR", step_dropping_odds, metric='dropping_odds',
+             outputs=[paths['dropping_json']]),
+        Step("2/5: ORAN YENILEME (ON CEKILMIS FIKSTUR)", lambda: step_refresh_odds(merged_json),
+             metric='refresh_odds', inputs=[merged_json], outputs=[merged_json]),
+        Step("3/5: ESKI VERILERI TEMİZLE", step_clean, metric='clean'),
+        _filter_step(paths, name="4/5: FILTRELE + JSON KAYDET", after=["3/5: ESKI VERILERI TEMİZLE"]),
+        Step("5/5: KART & KORNER VERILERI", step_istatistik, metric='istatistik'),
+    ]
+
+
+def build_refresh_steps(now=None):
+    """Gun ici oran yenileme modu: baslamamis maclarin oranlari + filtre.
+
+    Fikstur listesi, lig kontrolu ve eslestirme yapilmaz (bkz. odds_refresh.py).
+    """
+    paths = _paths(now or datetime.now(pytz.timezone('Europe/Istanbul')))
+    merged_json = paths['merged_json']
+    return [
+        Step("1/2: ORAN YENILEME", lambda: step_refresh_odds(merged_json), metric='refresh_odds',
+             inputs=[merged_json], outputs=[merged_json]),
+        _filter_step(paths, name="2/2: FILTRELE + JSON KAYDET"),
+    ]
+
+
+def resolve_dependencies(steps):
+    """Her adim icin once bitmesi gereken adim isimlerini dondurur."""
+    producers = {}
+    for step in steps:
+        for output in step.outputs:
+            producers[output] = step.name
+
+    deps = {}
+    for step in steps:
+        needed = {producers[i] for i in step.inputs if i in producers}
+        needed.update(step.after)
+        needed.discard(step.name)
+        deps[step.name] = needed
+    return deps
+
+
+def emit_step_event(step, event, **info):
+    """Adim baslangic/bitisini makinece okunabilir tek satir olarak yazar.
+
+    server.py'deki job manager stdout'u satir satir okur ve bu satirlardan
+    adim bazinda ilerleme/sure bilgisini cikarir.
+    """
+    payload = {'step': step, 'event': event}
+    payload.update(info)
+    print(STEP_EVENT_PREFIX + json.dumps(payload, ensure_ascii=False), flush=True)
+
+
+def execute_step(step, run_id=None):
+    """Adimi calistirir; exception ya da False donusu basarisizlik sayilir.
+
+    Adimin sureleri ve sayaclari run ledger'a yazilir (bkz. run_ledger.py).
+    """
+    print_header(step.name)
+    emit_step_event(step.name, 'start')
+    started = time.perf_counter()
+    with run_ledger.measure(step.name, run_id) as stats:
+        success = _run_step_body(step, stats)
+    wall = time.perf_counter() - started
+    metrics.observe('oddsy_step_duration_seconds', wall, step=step.metric)
+    emit_step_event(step.name, 'end', status=stats.status, wall_s=round(wall, 3))
+    return success
+
+
+def _run_step_body(step, stats):
+    cache = step.stage_cache()
+    if cache and cache.is_fresh():
+        print(f"[CACHE] Girdiler ve kod degismedi, onceki ciktilar kullaniliyor ({cache.manifest_path})")
+        stats.status = 'cached'
+        return True
+
+    try:
+        success = step.func() is not False
+    except Exception as e:
+        print(f"[ERROR] {step.name} hatasi: {e}")
+        traceback.print_exc()
+        success = False
+
+    stats.status = 'ok' if success else 'fail'
+    if success and cache:
+        try:
+            cache.record()
+        except OSError as e:
+            print(f"[WARN] Manifest yazilamadi ({cache.manifest_path}): {e}")
+    return success
+
+
+def run_pipeline(steps, max_workers=MAX_WORKERS, run_id=None):
+    """Adimlari bagimlilik sirasina gore, bagimsiz olanlari paralel calistirir.
+
+    Eski sirali davranisla uyumlu olmasi icin bir adim, girdisini ureten adim
+    basarisiz olsa da calisir (onceki calismadan kalan dosyalar kullanilabilir).
+    Donus: [(adim_ismi, basarili_mi), ...] adimlarin tanim sirasinda.
+    """
+    run_id = run_id or run_ledger.new_run_id()
+    deps = resolve_dependencies(steps)
+    pending = {step.name: step for step in steps}
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, step in list(pending.items()):
+                if deps[name] <= results.keys():
+                    running[executor.submit(execute_step, step, run_id)] = name
+                    del pending[name]
+
+            if not running:
+                # Kalan adimlarin bagimliliklari hic tamamlanamaz (dongu/eksik adim)
+                for name in pending:
+                    print(f"[ERROR] {name} bagimliliklari cozulemedi: {sorted(deps[name])}")
+                    results[name] = False
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    return [(step.name, results.get(step.name, False)) for step in steps]
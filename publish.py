@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+STAGED PUBLISHER - oddsy-data ciktilarini atomik olarak yayinlar
+
+Ciktilar once canli klasorun yanindaki bir staging klasorune yazilir.
+commit() her dosyayi canli kopyasiyla sha256 ozetinden karsilastirir:
+
+  - Icerik ayniysa canli dosyaya dokunulmaz (mtime, git diff degismez).
+  - Degistiyse os.replace ile atomik olarak yerine konur; okuyucular hicbir
+    zaman yarim yazilmis ya da silinmis bir dosya gormez.
+
+Degistirme ve git yayini publish_lock() altinda yapilir, boylece ayni anda
+calisan iki yayinlayici birbirinin yarim kalmis setini gormez.
+
+Minimal diff:
+  - JSON'lar sabit bicimde yazilir (girinti 2, ensure_ascii=False, sonda
+    \n). Liste ve anahtar sirasi ureticinin sirasidir ve anlam tasir
+    (droppingOdds dusus buyuklugune gore, dailyChoices kategori kategori);
+    yeniden siralanmaz. Boylece ayni veri byte byte ayni dosyayi uretir.
+  - changed_paths() git'e sadece degisen dosyalari sorar; main.py hicbir
+    sey degismediyse pull/push'u tamamen atlar.
+  - apply_retention() tarihli (ad_YYYY-MM-DD.json) dosyalari RETENTION_DAYS
+    gunden eskiyse archive/ad_YYYY-MM.json altinda aylik tek dosyada toplar.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOCK_PATH = os.path.join(BASE_DIR, 'logs', 'publish.lock')
+RETENTION_DAYS = int(os.environ.get('PUBLISH_RETENTION_DAYS', '14'))
+
+DATED_FILE_RE = re.compile(r'^(?P<stem>.+)_(?P<date>\d{4}-\d{2}-\d{2})\.json$')
+ARCHIVE_DIR = 'archive'
+
+
+def canonical_json(data):
+    """Ayni veri icin her zaman ayni metni ureten JSON (sira korunur, sadece bicim sabit)."""
+    return json.dumps(data, ensure_ascii=False, indent=2) + '\n'
+
+
+def _digest(path):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def staging_dir_for(live_dir):
+    """Canli klasorle ayni dosya sisteminde (rename atomik olsun diye) staging yolu."""
+    live_dir = os.path.abspath(live_dir)
+    return os.path.join(os.path.dirname(live_dir), f".staging-{os.path.basename(live_dir)}")
+
+
+@contextmanager
+def publish_lock():
+    """Yayin (swap + git) icin surecler arasi kilit; fcntl yoksa no-op."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(LOCK_PATH), exist_ok=True)
+    with open(LOCK_PATH, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class StagedPublisher:
+    def __init__(self, live_dir, staging_dir=None):
+        self.live_dir = os.path.abspath(live_dir)
+        self.staging_dir = staging_dir or staging_dir_for(self.live_dir)
+        self.staged = []
+
+    def _staging_path(self, filename):
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.staged.append(filename)
+        return os.path.join(self.staging_dir, filename)
+
+    def stage_json(self, filename, data):
+        """JSON'u staging'e yazar; staging yolunu dondurur."""
+        path = self._staging_path(filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(canonical_json(data))
+        return path
+
+    def stage_file(self, filename, source_path):
+        """Hazir bir dosyayi staging'e kopyalar."""
+        path = self._staging_path(filename)
+        shutil.copyfile(source_path, path)
+        return path
+
+    def commit(self):
+        """Degisen dosyalari canliya tasir.
+
+        Donus: [(dosya_adi, byte), ...] sadece gercekten degisen dosyalar.
+        """
+        changed = []
+        os.makedirs(self.live_dir, exist_ok=True)
+        with publish_lock():
+            for filename in self.staged:
+                staged_path = os.path.join(self.staging_dir, filename)
+                live_path = os.path.join(self.live_dir, filename)
+                if not os.path.exists(staged_path):
+                    continue
+                if _digest(staged_path) == _digest(live_path):
+                    os.remove(staged_path)
+                    continue
+                size = os.path.getsize(staged_path)
+                os.replace(staged_path, live_path)
+                changed.append((filename, size))
+        self.staged = []
+        self.discard()
+        return changed
+
+    def discard(self):
+        """Staging klasorunu (yarim kalmis calismalardan kalanlar dahil) siler."""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# GIT + SAKLAMA POLITIKASI
+# ---------------------------------------------------------------------------
+
+def changed_paths(repo_dir, pathspec='data/'):
+    """git status ile pathspec altindaki degisen/yeni/silinen dosyalar."""
+    result = subprocess.run(
+        ['git', 'status', '--porcelain', '-z', '--untracked-files=all', '--', pathspec],
+        cwd=repo_dir, capture_output=True, check=True
+    )
+    paths = []
+    entries = result.stdout.decode('utf-8', errors='replace').split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        status, path = entry[:2], entry[3:]
+        paths.append(path)
+        if 'R' in status or 'C' in status:
+            # rename/copy: -z ciktisinda eski yol ayri bir girdi olarak gelir
+            paths.append(entries[i])
+            i += 1
+    return paths
+
+
+def apply_retention(data_dir, keep_days=RETENTION_DAYS, today=None):
+    """Eski tarihli dosyalari aylik arsiv dosyalarina toplar.
+
+    data/ad_2026-01-03.json -> data/archive/ad_2026-01.json {"2026-01-03": ...}
+    Donus: arsive tasinan dosya adlari.
+    """
+    if not os.path.isdir(data_dir):
+        return []
+    today = today or datetime.now().date()
+    cutoff = today - timedelta(days=keep_days)
+
+    rolled = {}
+    for filename in sorted(os.listdir(data_dir)):
+        match = DATED_FILE_RE.match(filename)
+        if not match:
+            continue
+        try:
+            day = datetime.strptime(match.group('date'), '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        if day >= cutoff:
+            continue
+        archive_name = f"{match.group('stem')}_{day.strftime('%Y-%m')}.json"
+        rolled.setdefault(archive_name, []).append((filename, match.group('date')))
+
+    moved = []
+    archive_dir = os.path.join(data_dir, ARCHIVE_DIR)
+    for archive_name, files in rolled.items():
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, archive_name)
+        archive = {}
+        if os.path.exists(archive_path):
+            with open(archive_path, 'r', encoding='utf-8') as f:
+                archive = json.load(f)
+        for filename, day in files:
+            with open(os.path.join(data_dir, filename), 'r', encoding='utf-8') as f:
+                archive[day] = json.load(f)
+
+        # Arsivde gunlerin sirasi anlam tasimaz; tarih sirasi dosyayi sabit tutar
+        archive = dict(sorted(archive.items()))
+        tmp_path = archive_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(canonical_json(archive))
+        with publish_lock():
+            os.replace(tmp_path, archive_path)
+            for filename, _ in files:
+                os.remove(os.path.join(data_dir, filename))
+        moved.extend(filename for filename, _ in files)
+    return moved
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RUN LEDGER - Her pipeline adimi icin olcum kaydi (JSONL)
+
+Her calismada adim basina bir satir eklenir:
+
+    {"run_id", "step", "started_at", "status", "wall_s", "cpu_s",
+     "peak_rss_mb", "http_requests", "http_bytes", "http_errors",
+     "retries", "records_in", "records_out"}
+
+Olcumler adimi calistiran thread'e baglidir (measure() context manager'i).
+Scraper'lar kendi session'larini track_session() ile kaydeder; cevaplar
+session'i kaydeden adimin sayaclarina yazilir, boylece adimin kendi
+worker thread'lerindeki istekler de ayni adima sayilir.
+Pipeline disinda (script tek basina calisirken) tum fonksiyonlar no-op'tur.
+
+Notlar:
+  - cpu_s adim thread'inin CPU suresi + alt sureclerin CPU suresidir;
+    adimin kendi ThreadPoolExecutor worker'lari dahil degildir.
+  - peak_rss_mb surecin o ana kadarki tepe RSS degeridir (adimlar ayni
+    surecte paralel calistigi icin adim bazinda ayrilamaz). Alt surec
+    calistiran adimlarda alt sureclerin tepe RSS'i ile karsilastirilir.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEDGER_PATH = os.environ.get('RUN_LEDGER_PATH', os.path.join(BASE_DIR, 'logs', 'run_ledger.jsonl'))
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class StepStats:
+    """Tek bir adimin sayaclari. Birden fazla thread'den guncellenebilir."""
+
+    def __init__(self, run_id, step):
+        self.run_id = run_id
+        self.step = step
+        self.http_requests = 0
+        self.http_bytes = 0
+        self.http_errors = 0
+        self.retries = 0
+        self.records_in = None
+        self.records_out = None
+        self._lock = threading.Lock()
+
+    def add_response(self, status_code, nbytes):
+        with self._lock:
+            self.http_requests += 1
+            self.http_bytes += nbytes
+            if status_code >= 400:
+                self.http_errors += 1
+
+    def add_retry(self, count=1):
+        with self._lock:
+            self.retries += count
+
+    def add_records(self, records_in=None, records_out=None):
+        with self._lock:
+            if records_in is not None:
+                self.records_in = (self.records_in or 0) + records_in
+            if records_out is not None:
+                self.records_out = (self.records_out or 0) + records_out
+
+
+def current_stats():
+    """Bu thread'de calisan adimin sayaclari (pipeline disinda None)."""
+    return getattr(_local, 'stats', None)
+
+
+def _peak_rss_mb(who):
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux KB, macOS byte dondurur
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def measure(step, run_id):
+    """Adimi olcer ve bitince ledger'a bir satir ekler.
+
+    with measure(...) as stats: bloğu icinde stats.status ayarlanabilir
+    ('ok', 'fail', 'cached'); exception durumunda 'error' yazilir.
+    """
+    stats = StepStats(run_id, step)
+    stats.status = 'ok'
+    previous = current_stats()
+    _local.stats = stats
+
+    started_at = datetime.now().isoformat(timespec='seconds')
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    children_cpu_start = _children_cpu()
+    try:
+        yield stats
+    except BaseException:
+        stats.status = 'error'
+        raise
+    finally:
+        _local.stats = previous
+        cpu = (time.thread_time() - cpu_start) + (_children_cpu() - children_cpu_start)
+        peak = _peak_rss_mb(resource.RUSAGE_SELF) if resource else None
+        if resource is not None:
+            children_peak = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+            peak = max(peak or 0, children_peak or 0)
+        record = {
+            'run_id': run_id,
+            'step': step,
+            'started_at': started_at,
+            'status': stats.status,
+            'wall_s': round(time.perf_counter() - wall_start, 3),
+            'cpu_s': round(cpu, 3),
+            'peak_rss_mb': peak,
+            'http_requests': stats.http_requests,
+            'http_bytes': stats.http_bytes,
+            'http_errors': stats.http_errors,
+            'retries': stats.retries,
+            'records_in': stats.records_in,
+            'records_out': stats.records_out,
+        }
+        append_record(record)
+
+
+def append_record(record, path=None):
+    path = path or LEDGER_PATH
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps(record, ensure_ascii=False)
+        with _write_lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    except OSError as e:
+        print(f"[WARN] Run ledger yazilamadi ({path}): {e}")
+
+
+def new_run_id():
+    return datetime.now().strftime('%Y%m%d-%H%M%S') + f"-{os.getpid()}"
+
+
+# ---------------------------------------------------------------------------
+# SCRAPER HOOK'LARI
+# ---------------------------------------------------------------------------
+
+def track_session(session):
+    """requests/cloudscraper session'ini o anki adima baglar.
+
+    Cevap hook'u eklenir; session'in butun istekleri (hangi thread'den
+    gelirse gelsin) bu adimin sayaclarina yazilir. Tekrar cagrilirsa
+    baglanti yeni adima tasinir, hook ikinci kez eklenmez.
+    """
+    session._ledger_stats = current_stats()
+    if getattr(session, '_ledger_hooked', False):
+        return session
+
+    def _count_response(response, *args, **kwargs):
+        stats = getattr(session, '_ledger_stats', None)
+        cache_status = getattr(response, 'cache_status', None)
+        if stats is not None and cache_status != 'hit':
+            # 304 ile dogrulanan cevapta govde agdan gelmedi
+            nbytes = 0 if cache_status == 'revalidated' else len(response.content or b'')
+            stats.add_response(response.status_code, nbytes)
+        return response
+
+    session.hooks['response'].append(_count_response)
+    session._ledger_hooked = True
+    return session
+
+
+def note_retry(session=None):
+    """Bir yeniden deneme kaydeder (session'in ya da thread'in adimina)."""
+    stats = getattr(session, '_ledger_stats', None) if session is not None else None
+    stats = stats or current_stats()
+    if stats is not None:
+        stats.add_retry()
+
+
+def add_records(records_in=None, records_out=None):
+    """Calisan adimin okudugu/yazdigi kayit sayisini ekler."""
+    stats = current_stats()
+    if stats is not None:
+        stats.add_records(records_in, records_out)
+
+
+# ---------------------------------------------------------------------------
+# OKUMA
+# ---------------------------------------------------------------------------
+
+def load_runs(limit=10, path=None):
+    """Son `limit` calismayi [{run_id, started_at, steps: [...]}, ...] olarak dondurur."""
+    path = path or LEDGER_PATH
+    if not os.path.exists(path):
+        return []
+
+    runs = {}
+    order = deque()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            run_id = record.get('run_id')
+            if run_id not in runs:
+                runs[run_id] = {'run_id': run_id, 'started_at': record.get('started_at'), 'steps': []}
+                order.append(run_id)
+                if len(order) > limit:
+                    del runs[order.popleft()]
+            runs[run_id]['steps'].append(record)
+
+    return [runs[run_id] for run_id in reversed(order)]
@@ -1,31 +1,79 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
-import subprocess
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import asyncio
 import os
 import sys
 
+import metrics
+import run_ledger
+from jobs import JobManager, JobQueueFull
+
 app = FastAPI()
 
-def run_script(script_path, cwd):
-    """Runs a python script in a specific directory."""
-    python_exe = sys.executable
-    print(f"Starting {script_path} in {cwd}...")
+jobs = JobManager()
+
+# How often an open stream checks its job for new lines
+STREAM_POLL_SECONDS = 0.5
+
+# Built-in schedule: full pipeline once a day, odds refresh every N minutes
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "1") not in ("0", "false", "no")
+SCHEDULE_TIMEZONE = "Europe/Istanbul"
+SCHEDULE_FULL_AT = os.environ.get("SCHEDULE_FULL_AT", "09:00")
+SCHEDULE_REFRESH_MINUTES = int(os.environ.get("SCHEDULE_REFRESH_MINUTES", "30"))
+# Off-peak prefetch of tomorrow's fixtures and odds; empty disables it
+SCHEDULE_PREFETCH_AT = os.environ.get("SCHEDULE_PREFETCH_AT", "23:00")
+
+scheduler = BackgroundScheduler(timezone=SCHEDULE_TIMEZONE)
+
+def scheduled_job(kind, args=()):
+    """Submits a pipeline run from the scheduler (no HTTP error handling)."""
+    try:
+        job, coalesced = jobs.submit(kind, "main.py", os.getcwd(), args)
+        note = " (coalesced)" if coalesced else ""
+        print(f"[SCHEDULER] {kind} -> job {job.id}{note}")
+    except JobQueueFull as e:
+        print(f"[SCHEDULER] {kind} skipped, job queue full: {e}")
+
+def start_scheduler():
+    hour, minute = (int(part) for part in SCHEDULE_FULL_AT.split(":"))
+    scheduler.add_job(scheduled_job, CronTrigger(hour=hour, minute=minute, timezone=SCHEDULE_TIMEZONE),
+                      args=["main"], id="full-pipeline", replace_existing=True)
+    if SCHEDULE_REFRESH_MINUTES > 0:
+        scheduler.add_job(scheduled_job, IntervalTrigger(minutes=SCHEDULE_REFRESH_MINUTES),
+                          args=["refresh", ["--refresh"]], id="odds-refresh",
+                          replace_existing=True)
+    if SCHEDULE_PREFETCH_AT:
+        hour, minute = (int(part) for part in SCHEDULE_PREFETCH_AT.split(":"))
+        scheduler.add_job(scheduled_job, CronTrigger(hour=hour, minute=minute, timezone=SCHEDULE_TIMEZONE),
+                          args=["prefetch", ["--prefetch"]], id="prefetch",
+                          replace_existing=True)
+    scheduler.start()
+
+@app.on_event("startup")
+def start_job_workers():
+    """Warms the job worker forkserver so the first trigger starts instantly."""
+    jobs.start_workers()
+    if SCHEDULER_ENABLED:
+        start_scheduler()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
+
+def submit_job(kind, script, cwd, args=()):
+    """Queues a pipeline run, coalescing with an active run of the same kind."""
     try:
-        # Capture output to log or just let it go to stdout/stderr of server
-        result = subprocess.run(
-            [python_exe, script_path], 
-            cwd=cwd, 
-            capture_output=True, 
-            text=True
-        )
-        if result.returncode != 0:
-            print(f"Script {script_path} failed:\n{result.stderr}")
-        else:
-            print(f"Script {script_path} finished successfully:\n{result.stdout}")
-    except Exception as e:
-        print(f"Error running {script_path}: {e}")
+        job, coalesced = jobs.submit(kind, script, cwd, args)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Job queue full: {e}")
+    return job, coalesced
 
 @app.post("/run-main")
-async def run_main(background_tasks: BackgroundTasks):
+async def run_main():
     """
     Triggers the root main.py (Dropping Odds -> Sofa -> etc)
     """
@@ -34,11 +82,48 @@ async def run_main(background_tasks: BackgroundTasks):
     if not os.path.exists(os.path.join(cwd, script)):
          raise HTTPException(status_code=404, detail="main.py not found in root")
          
-    background_tasks.add_task(run_script, script, cwd)
-    return {"status": "Main pipeline started in background"}
+    job, coalesced = submit_job("main", script, cwd)
+    status = "Main pipeline already queued/running" if coalesced else "Main pipeline queued"
+    return {"status": status, "job_id": job.id, "coalesced": coalesced}
+
+@app.post("/run-refresh")
+async def run_refresh():
+    """
+    Triggers main.py --refresh: refetches odds for not-started matches in
+    today's merged set, then re-runs the filter. Coalesces into a full
+    pipeline run that is already queued or running.
+    """
+    job, coalesced = submit_job("refresh", "main.py", os.getcwd(), ["--refresh"])
+    status = "Odds refresh already covered by a queued/running job" if coalesced else "Odds refresh queued"
+    return {"status": status, "job_id": job.id, "coalesced": coalesced}
+
+@app.post("/run-prefetch")
+async def run_prefetch(days: int = 1):
+    """
+    Triggers main.py --prefetch: scrapes and merges fixtures and odds for
+    the next `days` days so that day's morning run only refreshes odds.
+    """
+    if days < 1:
+        raise HTTPException(status_code=400, detail="days must be >= 1")
+    job, coalesced = submit_job("prefetch", "main.py", os.getcwd(), ["--prefetch", "--days", str(days)])
+    status = "Prefetch already queued/running" if coalesced else "Prefetch queued"
+    return {"status": status, "job_id": job.id, "coalesced": coalesced}
+
+@app.get("/schedule")
+def get_schedule():
+    """
+    Lists the scheduled jobs and their next run times.
+    """
+    return {
+        "enabled": SCHEDULER_ENABLED,
+        "jobs": [
+            {"id": job.id, "next_run_time": job.next_run_time.isoformat() if job.next_run_time else None}
+            for job in scheduler.get_jobs()
+        ],
+    }
 
 @app.post("/run-stats")
-async def run_stats(background_tasks: BackgroundTasks):
+async def run_stats():
     """
     Triggers istatistik/main.py
     """
@@ -48,14 +133,90 @@ async def run_stats(background_tasks: BackgroundTasks):
     if not os.path.exists(cwd):
         raise HTTPException(status_code=404, detail="istatistik directory not found")
         
-    background_tasks.add_task(run_script, script, cwd)
-    return {"status": "Statistics pipeline started in background"}
+    job, coalesced = submit_job("stats", script, cwd)
+    status = "Statistics pipeline already queued/running" if coalesced else "Statistics pipeline queued"
+    return {"status": status, "job_id": job.id, "coalesced": coalesced}
+
+@app.get("/jobs")
+def list_jobs():
+    """
+    Lists known jobs, newest first (without per-step details).
+    """
+    return {"jobs": [job.to_dict(include_steps=False) for job in jobs.list()]}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Returns a job's state, per-step progress and timings.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request, since: int = 0):
+    """
+    Streams a job's output as Server-Sent Events while it runs.
+
+    Each output line is one "log" event; step start/end markers are sent as
+    "step" events with a JSON payload. Buffered lines are replayed first, so
+    late subscribers catch up. Reconnecting clients resume from
+    Last-Event-ID (or ?since=N). The stream ends with an "end" event once
+    the job has finished.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def events():
+        seq = since
+        while True:
+            finished = job.done
+            for seq, kind, text in job.log_since(seq):
+                yield f"id: {seq}\nevent: {kind}\ndata: {text}\n\n"
+            if finished:
+                yield f"event: end\ndata: {job.state}\n\n"
+                return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Prometheus text exposition of pipeline and scraper health: step
+    durations, upstream latency, per-source request/403/retry/timeout
+    counters, merger match ratio, records per output file, bytes published.
+    """
+    return PlainTextResponse(metrics.render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/runs")
+def get_runs(limit: int = 10):
+    """
+    Returns the last N pipeline runs from the run ledger, newest first,
+    with per-step wall/CPU time, peak RSS, HTTP counters and record counts.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be >= 1")
+    return {"runs": run_ledger.load_runs(limit=limit)}
 
 @app.get("/")
 def read_root():
-    return {"status": "Server is running. POST to /run-main or /run-stats to execute bots."}
+    return {"status": "Server is running. POST to /run-main or /run-stats to execute bots, GET /jobs to follow them."}
 
 if __name__ == "__main__":
-    import uvicorn
+    # Re-exec as `python -m uvicorn server:app`: multiprocessing re-imports a
+    # file-based __main__ (this module, with fastapi, apscheduler and the
+    # pipeline behind it) in every warm job worker, see jobs.WarmWorkers.
     # Listen on all interfaces so Docker/External can access
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    os.execv(sys.executable, [sys.executable, "-m", "uvicorn", "server:app",
+                              "--host", "0.0.0.0", "--port", "8000"])
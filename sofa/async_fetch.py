@@ -0,0 +1,209 @@
+"""
+ASYNC SOFASCORE FETCHER - Mac detayi + oran marketlerini eszamanli ceker
+
+SofascoreScraper eskiden maclari tek tek isler, her mac icin 2-3 bloklayan
+istek atar ve aralara sabit sleep koyardi. Burada ayni istekler asyncio +
+aiohttp ile eszamanli atilir:
+
+  - SOFA_CONCURRENCY : ayni anda islenen en fazla mac sayisi (varsayilan 8)
+  - SOFA_RATE        : butun isteklerin paylastigi token bucket hizi,
+                       saniyede istek (varsayilan 4). SofaScore'un 403
+                       esiginin altinda kalmak icin toplam hiz bununla
+                       sinirlanir; gecikmeler ust uste biner, toplanmaz.
+  - SOFA_BURST       : bucket kapasitesi (varsayilan SOFA_RATE)
+
+Istekler run_ledger ve metrics'e requests session hook'lariyla ayni sekilde
+sayilir (adimin thread'inde asyncio.run ile calisir). GET'ler http_cache'in
+disk cache'ini, retry'lar http_client'in backoff'unu ve host devre
+kesicisini kullanir.
+"""
+import os
+import json
+import time
+import asyncio
+from urllib.parse import urlparse
+
+import aiohttp
+
+import fixtures
+import http_cache
+import http_client
+import metrics
+import run_ledger
+
+CONCURRENCY = int(os.environ.get('SOFA_CONCURRENCY', '8'))
+RATE_PER_SEC = float(os.environ.get('SOFA_RATE', '4'))
+BURST = float(os.environ.get('SOFA_BURST', str(RATE_PER_SEC)))
+
+
+class TokenBucket:
+    """asyncio token bucket: acquire() saniyede en fazla `rate` kez doner."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = max(1.0, capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncSofaFetcher:
+    """SofascoreScraper'in header/cookie/parse mantigini kullanan async istemci."""
+
+    def __init__(self, scraper, concurrency=CONCURRENCY, rate=RATE_PER_SEC, burst=BURST,
+                 source='sofascore'):
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.source = source
+        self.headers = dict(scraper.headers)
+        # brotli kurulu olmayabilir; aiohttp 'br' cevabini cozemezse hata verir
+        self.headers['Accept-Encoding'] = 'gzip, deflate'
+        self.cookies = scraper.session.cookies.get_dict()
+        self.stats = None
+        self.bucket = None
+
+    async def get_json(self, http, url, timeout):
+        """(status, json | None) dondurur; ag hatasinda exception yukselir.
+
+        Cevaplar http_cache uzerinden gecer: taze kayit varsa istek atilmaz,
+        eskiyse ETag/Last-Modified ile yeniden dogrulanir.
+        """
+        cache = http_cache.default_cache() if http_cache.is_cacheable(url) else None
+        entry = cache.get(url) if cache else None
+        if entry is not None and entry.fresh:
+            metrics.inc('oddsy_http_cache_total', source=self.source, result='hit')
+            return 200, entry.json()
+
+        # requests tarafiyla ayni host devre kesicisi (bkz. http_client.py)
+        breaker = http_client.breaker_for(urlparse(url).hostname or '')
+        breaker.before_request()
+        await self.bucket.acquire()
+        started = time.perf_counter()
+        headers = entry.conditional_headers() if entry is not None else None
+        # HTTP_FIXTURES=replay: istek yerel stub'a gider (bkz. fixtures.py)
+        request_url = fixtures.stub_url('GET', url) if fixtures.replaying() else url
+        try:
+            async with http.get(request_url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                body = await response.read()
+                status = response.status
+                if fixtures.recording():
+                    fixtures.default_store().save('GET', url, status, response.headers, body)
+                if cache and status == 200:
+                    cache.store(url, response.headers, body)
+        except BaseException:
+            breaker.release_trial()
+            raise
+        breaker.record(status)
+        if status == 304 and entry is not None:
+            cache.touch(url, entry)
+            metrics.inc('oddsy_http_cache_total', source=self.source, result='revalidated')
+            status, body = 200, entry.body
+        elif cache:
+            metrics.inc('oddsy_http_cache_total', source=self.source, result='miss')
+        metrics.inc('oddsy_upstream_requests_total', source=self.source)
+        metrics.observe('oddsy_upstream_request_seconds', time.perf_counter() - started, source=self.source)
+        if status == 403:
+            metrics.inc('oddsy_upstream_forbidden_total', source=self.source)
+        if self.stats is not None:
+            self.stats.add_response(status, 0 if entry is not None and body is entry.body else len(body))
+        if status != 200:
+            return status, None
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+    def _note_retry(self):
+        if self.stats is not None:
+            self.stats.add_retry()
+        metrics.note_retry(self.source)
+
+    async def match_details(self, http, event_id):
+        url = f"{self.scraper.base_url}/event/{event_id}"
+        try:
+            status, data = await self.get_json(http, url, timeout=10)
+        except Exception as e:
+            metrics.note_exception(self.source, e)
+            print(f"  Detay çekme hatası: {e}")
+            return None
+        if data is None:
+            return None
+        return self.scraper.details_from_event(data.get('event', {}))
+
+    async def odds_markets(self, http, event_id, max_retries=http_client.MAX_RETRIES):
+        endpoints = [
+            f"{self.scraper.base_url}/event/{event_id}/odds/1/all",
+            f"{self.scraper.base_url}/event/{event_id}/markets",
+        ]
+        all_markets = []
+        for endpoint in endpoints:
+            for attempt in range(max_retries + 1):
+                try:
+                    status, data = await self.get_json(http, endpoint, timeout=15)
+                    if status == 200 and data and 'markets' in data:
+                        all_markets.extend(data['markets'])
+                    if status not in http_client.RETRY_STATUSES:
+                        break
+                except http_client.CircuitOpenError:
+                    break
+                except Exception as e:
+                    metrics.note_exception(self.source, e)
+                if attempt < max_retries:
+                    self._note_retry()
+                    await asyncio.sleep(http_client.backoff_delay(attempt))
+        return {'markets': all_markets} if all_markets else None
+
+    async def fetch_event(self, http, semaphore, event_id, known_details, on_result=None):
+        """(detay, oranlar): mac baslamissa oranlar hic cekilmez (None).
+
+        on_result(event_id, sonuc) her mac bitince cagrilir (checkpoint journal'i).
+        """
+        async with semaphore:
+            details = known_details.get(event_id) or await self.match_details(http, event_id)
+            if details and not details['is_not_started']:
+                result = details, None
+            else:
+                result = details, await self.odds_markets(http, event_id)
+        if on_result is not None:
+            on_result(event_id, result)
+        return result
+
+    async def _fetch_all(self, event_ids, known_details, on_result=None):
+        self.bucket = TokenBucket(self.rate, self.burst)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        async with aiohttp.ClientSession(headers=self.headers, cookies=self.cookies,
+                                         connector=connector) as http:
+            results = await asyncio.gather(
+                *(self.fetch_event(http, semaphore, event_id, known_details, on_result)
+                  for event_id in event_ids),
+                return_exceptions=True,
+            )
+        fetched = {}
+        for event_id, result in zip(event_ids, results):
+            if isinstance(result, Exception):
+                print(f"Hata (Event ID: {event_id}): {result}")
+                result = (None, None)
+            fetched[event_id] = result
+        return fetched
+
+    def fetch_events(self, event_ids, known_details=None, on_result=None):
+        """{event_id: (detay, oranlar)}; cagiran thread'in ledger adimina sayilir.
+
+        known_details'te olan maclar icin detay istegi atilmaz.
+        """
+        self.stats = run_ledger.current_stats()
+        return asyncio.run(self._fetch_all(list(event_ids), known_details or {}, on_result))
@@ -5,28 +5,119 @@ from datetime import datetime, timedelta
 import pytz
 import time
 import os
-from fractions import Fraction
+import sys
+from functools import lru_cache
+
+SOFA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Repo kokundeki ortak moduller icin
+sys.path.insert(0, os.path.dirname(SOFA_DIR))
+import http_client
+import metrics
+import excel_export
+import odds_decoder
+import odds_history
+import odds_state
+import run_ledger
+from checkpoint import CheckpointJournal
+
+from league_index import LeagueIndex
+
+try:
+    from async_fetch import AsyncSofaFetcher
+except ImportError:  # aiohttp yok
+    AsyncSofaFetcher = None
+
+ASYNC_ENABLED = os.environ.get('SOFA_ASYNC', '1') != '0'
+
+LEAGUE_INDEX = LeagueIndex()
+
+# bulk: gunun oranlari tek istekte, durum scheduled-events'ten (varsayilan)
+# full: her mac icin detay + butun oran marketleri (Alt/Ust, KG dahil)
+ODDS_MODE = os.environ.get('SOFA_ODDS_MODE', 'bulk')
+
+# Yarida kalan calismanin mac sonuclari bu kadar saniye taze sayilir
+CHECKPOINT_TTL = int(os.environ.get('SOFA_CHECKPOINT_TTL', '1800'))
+
+# ---------------------------------------------------------------------------
+# ORAN MARKETLERI: marketId -> parser (bilinmeyen id'ler icin ada gore)
+# ---------------------------------------------------------------------------
+
+OVER_UNDER_LINES = ['0.5', '1.5', '2.5', '3.5']
+
+
+def _parse_1x2(market, result):
+    choices = market.get('choices', [])
+    if len(choices) >= 3:
+        home, draw, away = odds_decoder.decode_choices(choices[:3])
+        if home is not None:
+            result['home_win'] = home
+        if draw is not None:
+            result['draw'] = draw
+        if away is not None:
+            result['away_win'] = away
+
+
+def _parse_goals(market, result):
+    choices = market.get('choices', [])
+    group = str(market.get('choiceGroup') or '')
+    for choice, decimal in zip(choices, odds_decoder.decode_choices(choices)):
+        if not choice.get('fractionalValue'):
+            continue
+        choice_name = choice.get('name', '').lower()
+        for line in OVER_UNDER_LINES:
+            # "Over 2.5" ya da choiceGroup "2.5" + "Over"
+            if line in choice_name or group == line:
+                key = line.replace('.', '_')
+                if 'over' in choice_name:
+                    result[f'over_{key}'] = decimal
+                elif 'under' in choice_name:
+                    result[f'under_{key}'] = decimal
+
+
+def _parse_btts(market, result):
+    choices = market.get('choices', [])
+    for choice, decimal in zip(choices, odds_decoder.decode_choices(choices)):
+        if not choice.get('fractionalValue'):
+            continue
+        choice_name = choice.get('name', '').lower()
+        if 'yes' in choice_name:
+            result['btts_yes'] = decimal
+        elif 'no' in choice_name:
+            result['btts_no'] = decimal
+
+
+MARKET_PARSERS = {'1x2': _parse_1x2, 'goals': _parse_goals, 'btts': _parse_btts}
+
+# SofaScore marketId'leri: 1 = Full time, 5 = Both teams to score, 9 = Match goals
+MARKET_KINDS_BY_ID = {1: ('1x2',), 5: ('btts',), 9: ('goals',)}
+
+
+@lru_cache(maxsize=1024)
+def market_kinds(market_id, market_name):
+    """Marketin parser'lari; id tablodaysa tek bakis, degilse ad kurallari (memo'lu)."""
+    if market_id in MARKET_KINDS_BY_ID:
+        return MARKET_KINDS_BY_ID[market_id]
+    name = market_name.lower()
+    kinds = []
+    if '1x2' in name or 'full time' in name:
+        kinds.append('1x2')
+    if 'over/under' in name or 'total' in name or 'goals' in name:
+        kinds.append('goals')
+    if 'both teams to score' in name or 'btts' in name:
+        kinds.append('btts')
+    return tuple(kinds)
+
 
 class SofascoreScraper:
     def __init__(self):
         self.base_url = "https://api.sofascore.com/api/v1"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'tr-TR,tr;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Origin': 'https://www.sofascore.com',
-            'Referer': 'https://www.sofascore.com/',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-            'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120"',
-            'Sec-Ch-Ua-Mobile': '?0',
-            'Sec-Ch-Ua-Platform': '"Windows"',
-            'Connection': 'keep-alive',
-        }
+        self.headers = dict(http_client.SOFASCORE_HEADERS)
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        http_client.configure(self.session, cache=True)
+        run_ledger.track_session(self.session)
+        metrics.track_session(self.session, 'sofascore')
 
     def warm_up(self):
         """Önce ana siteye gir, cookie al"""
@@ -36,65 +127,12 @@ class SofascoreScraper:
         except:
             print("⚠️ Warm-up atlandı")
 
-    def is_allowed_league(self, league_name, country_name):
-        if not league_name:
-            return False
-
-        league_lower = league_name.lower().strip()
-        country_lower = country_name.lower() if country_name else ''
-
-        allowed_combinations = {
-            'australia': ['a-league men'],
-            'austria': ['bundesliga', '2. liga', 'admiral bundesliga'],
-            'belgium': ['pro league', 'jupiler pro league', 'challenger pro league'],
-            'denmark': ['superliga', 'superligaen', '1. division'],
-            'england': ['premier league', 'championship', 'efl championship'],
-            'germany': ['bundesliga', '2. bundesliga'],
-            'france': ['ligue 1', 'ligue 2'],
-            'netherlands': ['eredivisie', 'vriendenloterij eredivisie', 'eerste divisie', 'keuken kampioen divisie'],
-            'italy': ['serie a', 'serie b'],
-            'spain': ['laliga', 'la liga'],
-            'norway': ['eliteserien'],
-            'sweden': ['allsvenskan'],
-            'switzerland': ['super league', 'raiffeisen super league', 'challenge league'],
-            'turkey': ['süper lig', '1. lig', 'super lig', 'trendyol süper lig'],
-            'portugal': ['primeira liga', 'liga portugal', 'liga portugal 2'],
-            'scotland': ['premiership', 'scottish premiership', 'championship', 'scottish championship']
-        }
-
-        european_cups = [
-            'champions league', 'uefa champions league',
-            'europa league', 'uefa europa league',
-            'conference league', 'uefa conference league'
-        ]
-
-        for cup in european_cups:
-            if cup == league_lower or cup in league_lower:
-                return True
-
-        for country, leagues in allowed_combinations.items():
-            if country in country_lower:
-                for allowed_league in leagues:
-                    if league_lower == allowed_league:
-                        return True
-                    if allowed_league in league_lower:
-                        if any(x in league_lower for x in ['women', 'u23', 'u21', 'reserve', 'fa cup', 'cup']):
-                            continue
-                        if 'laliga 2' in league_lower or 'la liga 2' in league_lower:
-                            continue
-                        return True
-
-        return False
+    def is_allowed_league(self, league_name, country_name, tournament_id=None):
+        """Derlenmis allowlist + uniqueTournament ID karar cache'i (bkz. league_index.py)."""
+        return LEAGUE_INDEX.is_allowed(league_name, country_name, tournament_id)
 
     def fractional_to_decimal(self, fractional_str):
-        try:
-            if not fractional_str or fractional_str == 'N/A':
-                return None
-            fraction = Fraction(fractional_str)
-            decimal = float(fraction) + 1.0
-            return round(decimal, 2)
-        except:
-            return None
+        return odds_decoder.fractional_to_decimal(fractional_str)
 
     def get_current_date_gmt3(self):
         tz_gmt3 = pytz.timezone('Europe/Istanbul')
@@ -104,38 +142,46 @@ class SofascoreScraper:
     def get_timezone(self):
         return pytz.timezone('Europe/Istanbul')
 
+    @staticmethod
+    def details_from_event(event):
+        status_code = event.get('status', {}).get('code')
+        status_type = event.get('status', {}).get('type')
+        is_not_started = status_code in [0, 1] or status_type == 'notstarted'
+        home_score = event.get('homeScore', {}).get('current')
+        away_score = event.get('awayScore', {}).get('current')
+        return {
+            'is_not_started': is_not_started,
+            'home_score': home_score if not is_not_started else None,
+            'away_score': away_score if not is_not_started else None,
+            'status_code': status_code,
+            'status_type': status_type
+        }
+
     def get_match_details(self, event_id):
         url = f"{self.base_url}/event/{event_id}"
         try:
             response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
-                event = data.get('event', {})
-                status_code = event.get('status', {}).get('code')
-                status_type = event.get('status', {}).get('type')
-                is_not_started = status_code in [0, 1] or status_type == 'notstarted'
-                home_score = event.get('homeScore', {}).get('current')
-                away_score = event.get('awayScore', {}).get('current')
-                return {
-                    'is_not_started': is_not_started,
-                    'home_score': home_score if not is_not_started else None,
-                    'away_score': away_score if not is_not_started else None,
-                    'status_code': status_code,
-                    'status_type': status_type
-                }
+                return self.details_from_event(data.get('event', {}))
             return None
         except Exception as e:
+            metrics.note_exception('sofascore', e)
             print(f"  Detay çekme hatası: {e}")
             return None
 
     def get_daily_matches(self, date):
+        """date (YYYY-MM-DD) gununun (GMT+3) maclari; on cekimde ileri tarih."""
         url = f"{self.base_url}/sport/football/scheduled-events/{date}"
         try:
             response = self.session.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 tz_gmt3 = pytz.timezone('Europe/Istanbul')
-                now = datetime.now(tz_gmt3)
+                # Pencere istenen gunden kurulur (bugunden degil)
+                day = datetime.strptime(date, '%Y-%m-%d')
+                today_start = tz_gmt3.localize(day)
+                tomorrow_start = tz_gmt3.localize(day + timedelta(days=1))
 
                 if 'events' in data:
                     filtered_events = []
@@ -143,8 +189,6 @@ class SofascoreScraper:
                         start_timestamp = event.get('startTimestamp')
                         if start_timestamp:
                             match_time = datetime.fromtimestamp(start_timestamp, tz_gmt3)
-                            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-                            tomorrow_start = today_start + timedelta(days=1)
                             if today_start <= match_time < tomorrow_start:
                                 filtered_events.append(event)
                     data['events'] = filtered_events
@@ -154,10 +198,11 @@ class SofascoreScraper:
                 print(f"Maçlar çekilemedi. Status code: {response.status_code}")
                 return None
         except Exception as e:
+            metrics.note_exception('sofascore', e)
             print(f"Maç çekme hatası: {e}")
             return None
 
-    def get_all_odds_markets(self, event_id, max_retries=3):
+    def get_all_odds_markets(self, event_id):
         endpoints = [
             f"{self.base_url}/event/{event_id}/odds/1/all",
             f"{self.base_url}/event/{event_id}/markets",
@@ -165,24 +210,16 @@ class SofascoreScraper:
 
         all_markets = []
 
+        # 429/5xx ve baglanti hatalari http_client'ta backoff ile tekrar denenir
         for endpoint in endpoints:
-            for attempt in range(max_retries):
-                try:
-                    response = self.session.get(endpoint, timeout=15)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if 'markets' in data:
-                            all_markets.extend(data['markets'])
-                        break
-                    elif response.status_code == 404:
-                        break
-                    else:
-                        if attempt < max_retries - 1:
-                            time.sleep(0.5)
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        time.sleep(0.5)
-                    continue
+            try:
+                response = self.session.get(endpoint, timeout=15)
+                if response.status_code == 200:
+                    data = response.json()
+                    if 'markets' in data:
+                        all_markets.extend(data['markets'])
+            except Exception as e:
+                metrics.note_exception('sofascore', e)
 
         return {'markets': all_markets} if all_markets else None
 
@@ -200,48 +237,127 @@ class SofascoreScraper:
             return result
 
         for market in odds_data['markets']:
-            market_name = market.get('marketName', '').lower()
-            market_id = market.get('marketId')
-
-            if market_id == 1 or '1x2' in market_name or 'full time' in market_name:
-                choices = market.get('choices', [])
-                if len(choices) >= 3:
-                    if choices[0].get('fractionalValue'):
-                        result['home_win'] = self.fractional_to_decimal(choices[0]['fractionalValue'])
-                    if choices[1].get('fractionalValue'):
-                        result['draw'] = self.fractional_to_decimal(choices[1]['fractionalValue'])
-                    if choices[2].get('fractionalValue'):
-                        result['away_win'] = self.fractional_to_decimal(choices[2]['fractionalValue'])
-
-            if 'over/under' in market_name or 'total' in market_name or 'goals' in market_name:
-                for choice in market.get('choices', []):
-                    choice_name = choice.get('name', '').lower()
-                    fractional = choice.get('fractionalValue')
-                    if fractional:
-                        decimal = self.fractional_to_decimal(fractional)
-                        for line in ['0.5', '1.5', '2.5', '3.5']:
-                            if line in choice_name:
-                                key = line.replace('.', '_')
-                                if 'over' in choice_name:
-                                    result[f'over_{key}'] = decimal
-                                elif 'under' in choice_name:
-                                    result[f'under_{key}'] = decimal
-
-            if 'both teams to score' in market_name or 'btts' in market_name:
-                for choice in market.get('choices', []):
-                    choice_name = choice.get('name', '').lower()
-                    fractional = choice.get('fractionalValue')
-                    if fractional:
-                        decimal = self.fractional_to_decimal(fractional)
-                        if 'yes' in choice_name:
-                            result['btts_yes'] = decimal
-                        elif 'no' in choice_name:
-                            result['btts_no'] = decimal
+            for kind in market_kinds(market.get('marketId'), market.get('marketName', '')):
+                MARKET_PARSERS[kind](market, result)
 
         return result
 
-    def scrape_matches_with_odds(self, show_debug=True):
-        current_date = self.get_current_date_gmt3()
+    def get_bulk_odds(self, date):
+        """Gunun butun maclarinin oranlari tek istekte: {event_id: {'markets': [...]}}.
+
+        SofaScore'un gunluk oran listesi mac basina sadece ana marketi (1X2)
+        icerir; listede olmayan maclar icin {} doner ve cagiran taraf mac
+        bazli isteklere duser.
+        """
+        url = f"{self.base_url}/sport/football/odds/1/{date}"
+        try:
+            response = self.session.get(url, timeout=15)
+            if response.status_code != 200:
+                print(f"Toplu oranlar çekilemedi. Status code: {response.status_code}")
+                return {}
+            data = response.json()
+        except Exception as e:
+            metrics.note_exception('sofascore', e)
+            print(f"Toplu oran çekme hatası: {e}")
+            return {}
+
+        bulk = {}
+        for event_id, odds in (data.get('odds') or {}).items():
+            if isinstance(odds, dict) and 'markets' in odds:
+                markets = odds['markets']
+            elif isinstance(odds, list):
+                markets = odds
+            else:
+                markets = [odds]
+            try:
+                bulk[int(event_id)] = {'markets': markets}
+            except (TypeError, ValueError):
+                continue
+        return bulk
+
+    def fetch_event_data(self, event_ids, known_details=None, on_result=None):
+        """{event_id: (detay, oran marketleri)}.
+
+        Varsayilan olarak AsyncSofaFetcher ile eszamanli ceker (SOFA_ASYNC=0
+        ya da aiohttp yoksa eski sirali yol, maclar arasi bekleme ile).
+        known_details'te durumu bilinen maclar icin detay istegi atilmaz;
+        baslamis maclar icin oran istegi atilmaz. on_result(event_id, sonuc)
+        her mac bittiginde cagrilir.
+        """
+        known_details = known_details or {}
+        if ASYNC_ENABLED and AsyncSofaFetcher is not None:
+            return AsyncSofaFetcher(self).fetch_events(event_ids, known_details, on_result)
+
+        fetched = {}
+        for event_id in event_ids:
+            details = known_details.get(event_id) or self.get_match_details(event_id)
+            if details and not details['is_not_started']:
+                fetched[event_id] = (details, None)
+                delay = 0.3
+            else:
+                fetched[event_id] = (details, self.get_all_odds_markets(event_id))
+                delay = 0.7
+            if on_result is not None:
+                on_result(event_id, fetched[event_id])
+            time.sleep(delay)
+        return fetched
+
+    def fetch_bulk_event_data(self, date, candidates, on_result=None):
+        """Toplu mod: durum scheduled-events'ten, oranlar gunluk listeden.
+
+        Sadece toplu listede 1X2'si olmayan, baslamamis maclar icin mac bazli
+        oran istegi atilir.
+        """
+        # Durumu payload'da olmayan maclar icin detay istegi yine atilir
+        known_details = {event.get('id'): self.details_from_event(event)
+                         for _, event in candidates if event.get('status')}
+        bulk = self.get_bulk_odds(date)
+        # Oran yenileme sadece parmak izi degisen maclari yeniden ceker
+        odds_state.record_bulk(date, bulk)
+
+        fetched, missing = {}, []
+        for _, event in candidates:
+            event_id = event.get('id')
+            details = known_details.get(event_id)
+            odds_data = bulk.get(event_id)
+            if details is None:
+                missing.append(event_id)
+            elif not details['is_not_started']:
+                fetched[event_id] = (details, None)
+            elif odds_data and all(v for k, v in self.parse_all_odds(odds_data).items()
+                                   if k in ('home_win', 'draw', 'away_win')):
+                fetched[event_id] = (details, odds_data)
+            else:
+                missing.append(event_id)
+                continue
+            if on_result is not None:
+                on_result(event_id, fetched[event_id])
+
+        print(f"Toplu oranlar: {len(fetched)}/{len(candidates)} maç, "
+              f"{len(missing)} maç için tekil istek atılacak")
+        if missing:
+            fetched.update(self.fetch_event_data(missing, known_details, on_result))
+        return fetched
+
+    def checkpoint_journal(self, date):
+        return CheckpointJournal(f'sofascore_{date}_{ODDS_MODE}', CHECKPOINT_TTL)
+
+    @staticmethod
+    def checkpoint_writer(journal):
+        """Sadece tamamlanmis maclari yazar; detayi ya da orani alinamayan
+        (403, ag hatasi) maclar sonraki calismada yeniden denenir."""
+        def on_result(event_id, result):
+            details, odds_data = result
+            if details is None:
+                return
+            if details['is_not_started'] and odds_data is None:
+                return
+            journal.append(event_id, [details, odds_data])
+        return on_result
+
+    def scrape_matches_with_odds(self, show_debug=True, date=None):
+        """date (YYYY-MM-DD) verilmezse bugun (GMT+3); on cekimde ileri tarih."""
+        current_date = date or self.get_current_date_gmt3()
         print(f"Tarih (GMT+3): {current_date}")
         print("Maçlar çekiliyor...")
 
@@ -253,13 +369,50 @@ class SofascoreScraper:
 
         events = matches_data['events']
         print(f"Toplam {len(events)} maç bulundu.")
+        run_ledger.add_records(records_in=len(events))
 
         all_matches = []
         skipped_no_odds = 0
         skipped_already_started = 0
         skipped_league = 0
 
+        # 1) Lig filtresi: istek gerektirmez
+        candidates = []
         for idx, event in enumerate(events, 1):
+            home_team = event.get('homeTeam', {}).get('name', 'N/A')
+            away_team = event.get('awayTeam', {}).get('name', 'N/A')
+            tournament = event.get('tournament', {}).get('name', 'N/A')
+            category = event.get('tournament', {}).get('category', {}).get('name', 'N/A')
+
+            unique_id = event.get('tournament', {}).get('uniqueTournament', {}).get('id')
+            if not self.is_allowed_league(tournament, category, unique_id):
+                if idx <= 50:
+                    print(f"{idx}/{len(events)} - {home_team} vs {away_team} ({category} - {tournament})")
+                    print(f"   ⛔ Atlandı - Lig/Ülke listede yok")
+                skipped_league += 1
+                continue
+            candidates.append((idx, event))
+        LEAGUE_INDEX.save()
+
+        # 2) Detay + oranlar: izinli maclar icin eszamanli (bkz. async_fetch.py).
+        # Yarida kalan calismanin taze sonuclari journal'dan alinir.
+        journal = self.checkpoint_journal(current_date)
+        fetched = {int(event_id): tuple(result) for event_id, result in journal.load().items()}
+        pending = [(idx, event) for idx, event in candidates if event.get('id') not in fetched]
+        if fetched:
+            print(f"Checkpoint: {len(candidates) - len(pending)} maç önceki çalışmadan alındı, "
+                  f"{len(pending)} maç çekilecek")
+        on_result = self.checkpoint_writer(journal)
+
+        if pending and ODDS_MODE == 'bulk':
+            fetched.update(self.fetch_bulk_event_data(current_date, pending, on_result))
+        elif pending:
+            print(f"{len(pending)} maç için detay ve oranlar çekiliyor...")
+            fetched.update(self.fetch_event_data([event.get('id') for _, event in pending],
+                                                 on_result=on_result))
+
+        # 3) Sonuclar orijinal sirada
+        for idx, event in candidates:
             try:
                 event_id = event.get('id')
                 home_team = event.get('homeTeam', {}).get('name', 'N/A')
@@ -267,13 +420,6 @@ class SofascoreScraper:
                 tournament = event.get('tournament', {}).get('name', 'N/A')
                 category = event.get('tournament', {}).get('category', {}).get('name', 'N/A')
 
-                if not self.is_allowed_league(tournament, category):
-                    if idx <= 50:
-                        print(f"{idx}/{len(events)} - {home_team} vs {away_team} ({category} - {tournament})")
-                        print(f"   ⛔ Atlandı - Lig/Ülke listede yok")
-                    skipped_league += 1
-                    continue
-
                 start_timestamp = event.get('startTimestamp')
                 if start_timestamp:
                     tz_gmt3 = pytz.timezone('Europe/Istanbul')
@@ -284,15 +430,13 @@ class SofascoreScraper:
 
                 print(f"{idx}/{len(events)} - {home_team} vs {away_team} ({tournament}) - Kontrol ediliyor...")
 
-                match_details = self.get_match_details(event_id)
+                match_details, odds_data = fetched.get(event_id, (None, None))
 
                 if match_details and not match_details['is_not_started']:
                     print(f"   ⛔ Atlandı - Maç başlamış/bitti")
                     skipped_already_started += 1
-                    time.sleep(0.3)
                     continue
 
-                odds_data = self.get_all_odds_markets(event_id)
                 odds = self.parse_all_odds(odds_data)
 
                 has_1x2 = odds['home_win'] and odds['draw'] and odds['away_win']
@@ -300,7 +444,6 @@ class SofascoreScraper:
                 if not has_1x2:
                     print(f"   ⚠️  Atlandı - 1X2 oranları bulunamadı")
                     skipped_no_odds += 1
-                    time.sleep(0.3)
                     continue
 
                 match_info = {
@@ -331,8 +474,6 @@ class SofascoreScraper:
                 under_2_5_str = f"U2.5:{odds['under_2_5']}" if odds['under_2_5'] else "U2.5:-"
                 print(f"   ✅ Kaydedildi - 1:{odds['home_win']} X:{odds['draw']} 2:{odds['away_win']} | {over_2_5_str} {under_2_5_str}")
 
-                time.sleep(0.7)
-
             except Exception as e:
                 print(f"Hata (Event ID: {event.get('id')}): {e}")
                 continue
@@ -349,11 +490,11 @@ class SofascoreScraper:
     def save_to_json(self, data, filename='sofascore_matches.json'):
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+        run_ledger.add_records(records_out=len(data))
         print(f"✓ JSON kaydedildi: {filename}")
 
     def save_to_excel(self, data, filename='sofascore_matches.xlsx'):
-        df = pd.DataFrame(data)
-
+        """Ortak Excel katmani: akan yazim, sutun formati, arka plan (bkz. excel_export.py)."""
         column_order = [
             'event_id', 'date_time', 'country', 'league',
             'home_team', 'away_team',
@@ -364,27 +505,19 @@ class SofascoreScraper:
             'over_3_5', 'under_3_5',
             'btts_yes', 'btts_no'
         ]
+        # Eskiden G..R sutunlari (home_win .. under_3_5) hucre hucre formatlaniyordu
+        odds_formats = {column: '0.00' for column in column_order[6:18]}
+        excel_export.export(filename, [excel_export.records_sheet('Maçlar', data, column_order)],
+                            formats=odds_formats)
 
-        df = df[column_order]
-
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Maçlar')
-            worksheet = writer.sheets['Maçlar']
-            odds_columns = ['G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R']
-            for col in odds_columns:
-                for row in range(2, len(df) + 2):
-                    cell = worksheet[f'{col}{row}']
-                    cell.number_format = '0.00'
-
-        print(f"✓ Excel kaydedildi: {filename}")
-
-    def run(self, show_debug=True):
+    def run(self, show_debug=True, output_dir=SOFA_DIR, date=None):
         print("=" * 60)
         print("SOFASCORE MAÇ VE ORAN ÇEKİCİ (LİG FİLTRELİ)")
         print("=" * 60)
 
+        current_date = date or self.get_current_date_gmt3()
         self.warm_up()
-        matches = self.scrape_matches_with_odds(show_debug=show_debug)
+        matches = self.scrape_matches_with_odds(show_debug=show_debug, date=current_date)
 
         if not matches:
             print("\n! Kaydedilecek veri bulunamadı.")
@@ -393,12 +526,15 @@ class SofascoreScraper:
         print(f"\n✓ Toplam {len(matches)} maç verisi çekildi.")
         print("\nDosyalar kaydediliyor...")
 
-        current_date = self.get_current_date_gmt3()
-        json_filename = f'sofascore_matches_{current_date}.json'
-        excel_filename = f'sofascore_matches_{current_date}.xlsx'
+        json_filename = os.path.join(output_dir, f'sofascore_matches_{current_date}.json')
+        excel_filename = os.path.join(output_dir, f'sofascore_matches_{current_date}.xlsx')
 
         self.save_to_json(matches, json_filename)
         self.save_to_excel(matches, excel_filename)
+        # JSON her calismada uzerine yazilir; oran hareketi ayrica birikir
+        written = odds_history.record('sofascore', {m['event_id']: m for m in matches})
+        print(f"✓ Oran geçmişine {written} yeni gözlem eklendi")
+        self.checkpoint_journal(current_date).clear()
 
         print("\n✅ TAMAMLANDI!")
 
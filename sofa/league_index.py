@@ -0,0 +1,129 @@
+"""
+LIG ALLOWLIST INDEKSI - is_allowed_league icin derlenmis filtre
+
+Allowlist acilista bir kez derlenir:
+
+  - (ulke, lig) tam eslesmeleri icin hash set
+  - ulke basina izinli lig adlarinin tek regex'i (alt dize eslesmesi)
+  - Avrupa kupalari ve dislama kelimeleri (women/u21/reserve/cup ...) icin
+    birer regex
+
+Kararlar SofaScore uniqueTournament ID'sine gore saklanir ve
+cache/league_decisions.json dosyasina yazilir; ayni turnuva sonraki
+calismalarda tek sozluk bakisina iner. Allowlist degisirse dosyadaki
+parmak izi tutmaz ve kayitli kararlar atilir.
+"""
+import os
+import re
+import json
+import hashlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DECISIONS_PATH = os.environ.get(
+    'LEAGUE_DECISIONS_PATH', os.path.join(BASE_DIR, 'cache', 'league_decisions.json')
+)
+
+ALLOWED_COMBINATIONS = {
+    'australia': ['a-league men'],
+    'austria': ['bundesliga', '2. liga', 'admiral bundesliga'],
+    'belgium': ['pro league', 'jupiler pro league', 'challenger pro league'],
+    'denmark': ['superliga', 'superligaen', '1. division'],
+    'england': ['premier league', 'championship', 'efl championship'],
+    'germany': ['bundesliga', '2. bundesliga'],
+    'france': ['ligue 1', 'ligue 2'],
+    'netherlands': ['eredivisie', 'vriendenloterij eredivisie', 'eerste divisie', 'keuken kampioen divisie'],
+    'italy': ['serie a', 'serie b'],
+    'spain': ['laliga', 'la liga'],
+    'norway': ['eliteserien'],
+    'sweden': ['allsvenskan'],
+    'switzerland': ['super league', 'raiffeisen super league', 'challenge league'],
+    'turkey': ['süper lig', '1. lig', 'super lig', 'trendyol süper lig'],
+    'portugal': ['primeira liga', 'liga portugal', 'liga portugal 2'],
+    'scotland': ['premiership', 'scottish premiership', 'championship', 'scottish championship']
+}
+
+EUROPEAN_CUPS = [
+    'champions league', 'uefa champions league',
+    'europa league', 'uefa europa league',
+    'conference league', 'uefa conference league'
+]
+
+# Alt dize ile eslesen liglerde bunlari iceren adlar elenir (tam eslesme haric)
+EXCLUDED_WORDS = ['women', 'u23', 'u21', 'reserve', 'fa cup', 'cup']
+EXCLUDED_LEAGUES = ['laliga 2', 'la liga 2']
+
+
+def _alternation(words):
+    return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+class LeagueIndex:
+    def __init__(self, combinations=ALLOWED_COMBINATIONS, cups=EUROPEAN_CUPS,
+                 path=DECISIONS_PATH):
+        self.path = path
+        self.cups_re = _alternation(cups)
+        self.excluded_re = _alternation(EXCLUDED_WORDS + EXCLUDED_LEAGUES)
+        self.countries = {country: (frozenset(leagues), _alternation(leagues))
+                          for country, leagues in combinations.items()}
+        self.fingerprint = hashlib.sha256(
+            json.dumps([combinations, cups, EXCLUDED_WORDS, EXCLUDED_LEAGUES],
+                       sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+        self.by_name = {}
+        self.by_tournament = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('fingerprint') != self.fingerprint:
+            return {}
+        return data.get('decisions', {})
+
+    def save(self):
+        """Yeni kararlar varsa dosyaya yazar (atomik)."""
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': self.fingerprint, 'decisions': self.by_tournament}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"[WARN] Lig kararlari yazilamadi ({self.path}): {e}")
+
+    def _decide(self, league_lower, country_lower):
+        if self.cups_re.search(league_lower):
+            return True
+
+        matched = [entry for country, entry in self.countries.items() if country in country_lower]
+        if any(league_lower in exact for exact, _ in matched):
+            return True
+        if self.excluded_re.search(league_lower):
+            return False
+        return any(pattern.search(league_lower) for _, pattern in matched)
+
+    def is_allowed(self, league_name, country_name, tournament_id=None):
+        if not league_name:
+            return False
+
+        key = str(tournament_id) if tournament_id is not None else None
+        if key is not None and key in self.by_tournament:
+            return self.by_tournament[key]
+
+        name_key = (league_name, country_name)
+        allowed = self.by_name.get(name_key)
+        if allowed is None:
+            league_lower = league_name.lower().strip()
+            country_lower = country_name.lower() if country_name else ''
+            allowed = self.by_name[name_key] = self._decide(league_lower, country_lower)
+
+        if key is not None:
+            self.by_tournament[key] = allowed
+            self.dirty = True
+        return allowed